@@ -2,6 +2,8 @@ import os
 import requests
 from pathlib import Path
 from typing import Optional
+from agents.story_boarder import workspace
+from agents.story_boarder.rate_limit import get_limiter
 
 class ElevenLabsService:
     """Service for interacting with Eleven Labs API"""
@@ -19,7 +21,7 @@ class ElevenLabsService:
         }
         
         # Create output directory if it doesn't exist
-        self.output_dir = Path("output/audio")
+        self.output_dir = Path(workspace.output_dir()) / "audio"
         self.output_dir.mkdir(parents=True, exist_ok=True)
     
     def generate_audio(
@@ -52,7 +54,7 @@ class ElevenLabsService:
         }
         
         try:
-            response = requests.post(url, json=data, headers=self.headers)
+            response = get_limiter("elevenlabs").call(requests.post, url, json=data, headers=self.headers)
             response.raise_for_status()
             
             # Generate a filename based on first few words of text
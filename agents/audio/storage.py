@@ -1,11 +1,12 @@
-from agents.story_boarder.db_client import StoryboardDBClient
+from agents.story_boarder.storage import StoryboardStorage
 
 class AudioStorage:
     """Storage class for audio-related data"""
     
     def __init__(self):
         """Initialize the storage with database client"""
-        self.db = StoryboardDBClient()
+        self.storyboard = StoryboardStorage()
+        self.db = self.storyboard.db
     
     def get_script_by_id(self, scene_id: str):
         """Get script data for a specific scene"""
@@ -13,4 +14,28 @@ class AudioStorage:
     
     def load_shot_image_specs(self):
         """Load all shot image specifications"""
-        return self.db.load_shot_image_specs() 
\ No newline at end of file
+        return self.storyboard.load_shot_image_specs()
+    
+    def iter_shot_image_specs(self):
+        """Stream shot image specifications in bounded batches"""
+        return self.storyboard.iter_shot_image_specs()
+    
+    def record_rendered_asset(self, scene_id: str, kind: str, path: str, shot_id: str = None):
+        """Record a rendered audio (or image) file for scene status"""
+        self.storyboard.record_rendered_asset(scene_id, kind, path, shot_id)
+    
+    def changes_since(self, cursor: int = 0, tables=None):
+        """Storyboard rows changed after change-log position ``cursor``, and the next cursor"""
+        return self.storyboard.changes_since(cursor, tables)
+    
+    def get_consumer_cursor(self, consumer: str):
+        """Change-log position ``consumer`` last saved, None if it never saved one"""
+        return self.storyboard.get_consumer_cursor(consumer)
+    
+    def save_consumer_cursor(self, consumer: str, cursor: int):
+        """Record that ``consumer`` has processed every change up to ``cursor``"""
+        self.storyboard.save_consumer_cursor(consumer, cursor)
+    
+    def prune_change_log(self) -> int:
+        """Delete the change-log entries every saved consumer cursor has passed"""
+        return self.storyboard.prune_change_log()
\ No newline at end of file
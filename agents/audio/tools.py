@@ -1,33 +1,61 @@
 from typing import Dict, List
 from agents.audio.storage import AudioStorage
-from agents.audio.eleven_labs_service import ElevenLabsService
+from agents.story_boarder import workspace
+from agents.story_boarder.db_client import resume_cursor
 import os
-from mutagen.mp3 import MP3
-from moviepy.editor import ImageClip, AudioFileClip, concatenate_videoclips
 import glob
 import subprocess
 
-def process_scripts_for_audio() -> str:
+# Change-log consumer name under which the audio agent stores its cursor
+CHANGE_CONSUMER = "audio"
+
+def process_scripts_for_audio(regenerate_all: bool = False) -> str:
     """
     Load all shot images from the database, extract scene IDs,
     and fetch corresponding script data for audio processing.
     Uses Eleven Labs to generate audio for each script.
+    Only scenes whose script changed, or that got their first shots, since
+    the last run are processed unless regenerate_all is set. Scenes whose
+    audio fails are picked up again by the next run.
     
     Returns:
         A string message indicating where the audio files were created.
     """
+    from agents.audio.eleven_labs_service import ElevenLabsService
+
     # Initialize storage and audio service clients
     storage = AudioStorage()
     audio_service = ElevenLabsService()
     
-    # Get all shot specs from storage
-    shot_specs = storage.load_shot_image_specs()
+    # Read the change log before the specs so nothing written in between is skipped
+    saved_cursor = storage.get_consumer_cursor(CHANGE_CONSUMER)
+    changes, cursor = storage.changes_since(saved_cursor or 0, ["scenes", "shot_image_specs"])
+    
+    new_shots = {
+        change.key for change in changes
+        if change.table == "shot_image_specs" and change.operation == "insert"
+    }
+    changed_scenes = {
+        change.key for change in changes
+        if change.table == "scenes" and change.operation != "delete"
+    }
     
-    # Extract unique scene IDs
-    scene_ids = list(set(spec.scene_id for spec in shot_specs))
+    # Extract unique scene IDs, streaming the shot specs instead of loading them all
+    scene_ids = set()
+    scene_changes = {scene_id: {scene_id} for scene_id in changed_scenes}
+    for spec in storage.iter_shot_image_specs():
+        scene_ids.add(spec.scene_id)
+        if spec.shot_id in new_shots:
+            changed_scenes.add(spec.scene_id)
+            scene_changes.setdefault(spec.scene_id, {spec.scene_id}).add(spec.shot_id)
+    scene_ids = sorted(scene_ids)
+    # The first run voices every scene, including those older than the change log
+    if not (regenerate_all or saved_cursor is None):
+        scene_ids = [scene_id for scene_id in scene_ids if scene_id in changed_scenes]
     
-    # Track generated audio files
+    # Track generated audio files, and the change-log keys of failed scenes
     generated_files = []
+    failed = set()
     
     # Fetch script data for each scene
     for scene_id in scene_ids:
@@ -41,12 +69,18 @@ def process_scripts_for_audio() -> str:
             audio_path = audio_service.generate_audio(text=script_data['script_text'], scene_id=scene_id)
             if audio_path:
                 generated_files.append(audio_path)
+                storage.record_rendered_asset(scene_id, "audio", audio_path)
                 print(f"Generated audio file: {audio_path}")
             else:
+                failed |= scene_changes.get(scene_id, set())
                 print(f"Failed to generate audio for scene: {script_data['title']}")
             
             print("-" * 80)
 
+    # A first run that failed stays a full run: its failed scenes may not be in the log
+    if saved_cursor is not None or not failed:
+        storage.save_consumer_cursor(CHANGE_CONSUMER, resume_cursor(changes, cursor, failed))
+        storage.prune_change_log()
     create_videos_from_audio_and_images()
     
     return f"Generated {len(generated_files)} audio files in the output/audio directory"
@@ -62,8 +96,10 @@ def create_videos_from_audio_and_images() -> str:
     Returns:
         A string message indicating where the videos were created.
     """
+    from mutagen.mp3 import MP3
+
     # Setup output directories  
-    output_dir = "output"
+    output_dir = workspace.output_dir()
     audio_dir = os.path.join(output_dir, "audio")
     image_dir = os.path.join(output_dir, "images")
     video_dir = os.path.join(output_dir, "videos")
@@ -188,7 +224,12 @@ tools = [
                 "description": "Load shot images, extract scene IDs, and generate audio for scripts using Eleven Labs",
                 "parameters": {
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "regenerate_all": {
+                            "type": "boolean",
+                            "description": "Generate audio for every scene instead of only new or changed scenes"
+                        }
+                    },
                     "required": []
                 }
             }
@@ -7,16 +7,23 @@ import re
 import os
 import json
 from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+from agents.story_boarder import workspace
+from agents.story_boarder.llm_usage import track_llm_call, usage_tags
+from agents.story_boarder.rate_limit import get_limiter
 
-# Define output directory structure
-OUTPUT_DIR = "output"
-IMAGE_DIR = os.path.join(OUTPUT_DIR, "images")
-METADATA_DIR = os.path.join(OUTPUT_DIR, "metadata")
+# Output directory structure, under the active run workspace's output root
+def image_dir() -> str:
+    return os.path.join(workspace.output_dir(), "images")
+
+def metadata_dir() -> str:
+    return os.path.join(workspace.output_dir(), "metadata")
 
 def setup_output_directories():
     """Create output directories if they don't exist."""
-    os.makedirs(IMAGE_DIR, exist_ok=True)
-    os.makedirs(METADATA_DIR, exist_ok=True)
+    os.makedirs(image_dir(), exist_ok=True)
+    os.makedirs(metadata_dir(), exist_ok=True)
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
 def save_metadata(character: CharacterDescription, image_path: str, session_id: str, index: int):
@@ -31,7 +38,7 @@ def save_metadata(character: CharacterDescription, image_path: str, session_id:
         }
     }
     
-    metadata_path = os.path.join(METADATA_DIR, f"character_{index}_{character.name.lower()}_{session_id}.json")
+    metadata_path = os.path.join(metadata_dir(), f"character_{index}_{character.name.lower()}_{session_id}.json")
     with open(metadata_path, 'w') as f:
         json.dump(metadata, f, indent=2)
     return metadata_path
@@ -97,18 +104,25 @@ def extract_attribute(text: str, pattern: str) -> str:
 def create_moderated_prompt(prompt: str) -> str:
     """Create a moderated prompt through an LLM call."""
     # create the moderated prompt through an LLM call
-    client = OpenAI()
-    result = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that moderates prompts for NSFW content. Also summarize the prompt if its too long."},
-            {"role": "user", "content": prompt}
-        ]
-    )
+    client = OpenAI(max_retries=0)
+    with track_llm_call("gpt-4o-mini") as call:
+        result = get_limiter("openai").call(
+            client.chat.completions.create,
+            on_retry=call.add_retry,
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant that moderates prompts for NSFW content. Also summarize the prompt if its too long."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        call.add_usage(result)
     return result.choices[0].message.content
 
 
-async def generate_character_image(characters: list[CharacterDescription], index: int, session_id: str, scene_prompt: str = None, shot_id: str = None) -> bool:
+async def generate_character_image(characters: list[CharacterDescription], index: int, session_id: str, scene_prompt: str = None, shot_id: str = None, scene_id: str = None) -> Optional[bool]:
+    """Generate and save an image; returns whether it has NSFW concepts, or None if no image was saved."""
+    result = None
+    saved = False
     try:
         # Create a merged prompt that includes both scene and character details
         if scene_prompt:
@@ -151,37 +165,42 @@ async def generate_character_image(characters: list[CharacterDescription], index
         print("\n📝 Generated Prompt:")
         print(prompt)
         
-        # Submit the image generation request
-        handler = await fal_client.submit_async(
-            "fal-ai/flux-pro/v1.1-ultra",
-            arguments={
-                "prompt": prompt,
-                "num_images": 1,
-                "aspect_ratio": "4:5",  # Keep original aspect ratio
-                "enable_safety_checker": False,
-                "safety_tolerance": "5",
-                "output_format": "jpeg",
-                "raw": False
-            }
-        )
+        async def generate() -> dict:
+            # Submit the image generation request
+            handler = await fal_client.submit_async(
+                "fal-ai/flux-pro/v1.1-ultra",
+                arguments={
+                    "prompt": prompt,
+                    "num_images": 1,
+                    "aspect_ratio": "4:5",  # Keep original aspect ratio
+                    "enable_safety_checker": False,
+                    "safety_tolerance": "5",
+                    "output_format": "jpeg",
+                    "raw": False
+                }
+            )
+
+            print(f"\n📋 Request ID: {handler.request_id}")
 
-        print(f"\n📋 Request ID: {handler.request_id}")
+            # Wait for and process the result
+            async for event in handler.iter_events(with_logs=True):
+                if isinstance(event, dict) and event.get("status") == "error":
+                    raise Exception(event.get("message", "Unknown error during generation"))
+                elif isinstance(event, dict) and event.get("status") == "completed":
+                    print(f"\n✅ Generation completed!")
 
-        # Wait for and process the result
-        async for event in handler.iter_events(with_logs=True):
-            if isinstance(event, dict) and event.get("status") == "error":
-                raise Exception(event.get("message", "Unknown error during generation"))
-            elif isinstance(event, dict) and event.get("status") == "completed":
-                print(f"\n✅ Generation completed!")
+            # Get the final result
+            return await handler.get()
 
-        # Get the final result
-        result = await handler.get()
+        # The fal slot is held until the image is done, so concurrency counts running jobs
+        result = await get_limiter("fal").acall(generate)
 
         if result and result.get("has_nsfw_concepts")[0] == "true":
             # rerun the generation with a moderated prompt
             # create the moderated prompt through an LLM call
-            moderated_prompt = create_moderated_prompt(prompt)
-            return await generate_character_image(characters, index, session_id, moderated_prompt, shot_id)
+            with usage_tags(scene_id=scene_id, shot_id=shot_id):
+                moderated_prompt = create_moderated_prompt(prompt)
+            return await generate_character_image(characters, index, session_id, moderated_prompt, shot_id, scene_id)
         
         if result and result.get("images"):
             # Save the generated image
@@ -201,13 +220,19 @@ async def generate_character_image(characters: list[CharacterDescription], index
                             # For individual portraits
                             filename = f"character_{index}_{characters[0].name.lower()}_{session_id}.jpg"
                         
-                        image_path = os.path.join(IMAGE_DIR, filename)
+                        image_path = os.path.join(image_dir(), filename)
                         
                         # Save image
                         with open(image_path, 'wb') as f:
                             f.write(await resp.read())
                         print(f"\n💾 Image saved as: {image_path}")
                         
+                        # Record the shot's image so scene status reflects it
+                        if scene_prompt and scene_id:
+                            from agents.story_boarder.storage import StoryboardStorage
+                            StoryboardStorage().record_rendered_asset(scene_id, "image", image_path, shot_id)
+                        saved = True
+                        
                         # Save metadata for all characters in the scene
                         metadata_paths = []
                         for i, char in enumerate(characters):
@@ -220,6 +245,8 @@ async def generate_character_image(characters: list[CharacterDescription], index
     except Exception as e:
         print(f"\n❌ An error occurred while generating image: {str(e)}")
 
+    if not saved:
+        return None
     # if the result has a has_nsfw_concepts key, and the value is a list with true in it,
     # return true, else return false
     if result and result.get("has_nsfw_concepts"):
@@ -227,61 +254,68 @@ async def generate_character_image(characters: list[CharacterDescription], index
     else:
         return False
 
-async def generate_test_image(scene_panel: ScenePanel = None) -> bool:
+@lru_cache(maxsize=256)
+def character_from_record(name: str, description: str, traits: str) -> CharacterDescription:
+    """Build a CharacterDescription from a registered script character.
+    
+    Parsing is cached per character record, so a character that appears in
+    many shots is only parsed once.
+    """
+    # Initialize empty dictionaries for required attributes
+    physical = {"build": "", "height": "", "hair": "", "eyes": "", "skin": ""}
+    clothing = {"outfit": "", "accessories": "", "details": ""}
+    demeanor = {"posture": "", "movement": "", "expression": ""}
+    
+    # Extract physical attributes if they exist in traits or description
+    for attr in ['build', 'height', 'hair', 'eyes', 'skin']:
+        value = extract_attribute(traits, f"{attr}[^,\.]+") or extract_attribute(description, f"{attr}[^,\.]+")
+        if value:
+            physical[attr] = value
+            
+    # Extract clothing details if they exist
+    for attr in ['outfit', 'accessories', 'details']:
+        value = extract_attribute(description, f"{attr}[^,\.]+")
+        if value:
+            clothing[attr] = value
+            
+    # Extract demeanor if it exists
+    for attr in ['posture', 'movement', 'expression']:
+        value = extract_attribute(traits, f"{attr}[^,\.]+") or extract_attribute(description, f"{attr}[^,\.]+")
+        if value:
+            demeanor[attr] = value
+    
+    # Create character with required fields
+    return CharacterDescription(
+        name=name,
+        age="adult",  # Required field
+        gender="unspecified",  # Required field
+        physical_appearance=physical,  # Required field
+        clothing=clothing,  # Required field
+        demeanor=demeanor  # Required field
+    )
+
+async def generate_test_image(scene_panel: ScenePanel = None) -> Optional[bool]:
+    """Render a shot; True if the image is clean, False if NSFW, None if rendering failed."""
     # Setup output directories and get session ID
     session_id = setup_output_directories()
     print(f"🆔 Session ID: {session_id}")
-    print(f"📁 Output directories created at {OUTPUT_DIR}")
+    print(f"📁 Output directories created at {workspace.output_dir()}")
 
-    # Get characters from the storyboard database
+    # Look up only the scene's characters, by their registered (normalized) name
+    from agents.story_boarder.db_client import normalize_character_name
     from agents.story_boarder.storage import StoryboardStorage
     storage = StoryboardStorage()
-    db_characters = storage.db.load_script_characters()
-    
-    # Convert database characters to CharacterDescription objects
-    characters = []
-    for char in db_characters:
-        # Initialize empty dictionaries for required attributes
-        physical = {"build": "", "height": "", "hair": "", "eyes": "", "skin": ""}
-        clothing = {"outfit": "", "accessories": "", "details": ""}
-        demeanor = {"posture": "", "movement": "", "expression": ""}
-        
-        # Extract physical attributes if they exist in traits or description
-        for attr in ['build', 'height', 'hair', 'eyes', 'skin']:
-            value = extract_attribute(char['traits'], f"{attr}[^,\.]+") or extract_attribute(char['description'], f"{attr}[^,\.]+")
-            if value:
-                physical[attr] = value
-                
-        # Extract clothing details if they exist
-        for attr in ['outfit', 'accessories', 'details']:
-            value = extract_attribute(char['description'], f"{attr}[^,\.]+")
-            if value:
-                clothing[attr] = value
-                
-        # Extract demeanor if it exists
-        for attr in ['posture', 'movement', 'expression']:
-            value = extract_attribute(char['traits'], f"{attr}[^,\.]+") or extract_attribute(char['description'], f"{attr}[^,\.]+")
-            if value:
-                demeanor[attr] = value
-        
-        # Create character with required fields
-        character = CharacterDescription(
-            name=char['name'],
-            age="adult",  # Required field
-            gender="unspecified",  # Required field
-            physical_appearance=physical,  # Required field
-            clothing=clothing,  # Required field
-            demeanor=demeanor  # Required field
+    focus_keys = list(dict.fromkeys(normalize_character_name(name) for name in scene_panel.character_focus))
+    db_characters = storage.get_script_characters(focus_keys)
+    scene_characters = [
+        character_from_record(
+            db_characters[key]['name'], db_characters[key]['description'], db_characters[key]['traits']
         )
-        characters.append(character)
+        for key in focus_keys if key in db_characters
+    ]
     
-    print(f"\n🎭 Found {len(characters)} characters in the database")
+    print(f"\n🎭 Found {len(scene_characters)} of the scene's characters in the database")
     
-    # make scene panel character focus objects lower case and also remove quotes
-    character_focus = [char.lower().replace('"', '').replace("“", "").replace("”", "") for char in scene_panel.character_focus]
-
-    # Filter characters to only those in the scene
-    scene_characters = [char for char in characters if char.name.lower().replace('"', '').replace("“", "").replace("”", "") in character_focus]
     # Create a detailed scene description with characters
     scene_description = f"{scene_panel.description} "
     
@@ -322,9 +356,13 @@ async def generate_test_image(scene_panel: ScenePanel = None) -> bool:
         index=1,
         session_id=session_id,
         scene_prompt=scene_description,
-        shot_id=scene_panel.panel_id
+        shot_id=scene_panel.panel_id,
+        scene_id=scene_panel.scene_id
     )
 
+    if nsfw is None:
+        print(f"\n❌ Shot image could not be generated")
+        return None
     if nsfw:
         print(f"\n❌ NSFW content detected")
         return False
@@ -333,5 +371,5 @@ async def generate_test_image(scene_panel: ScenePanel = None) -> bool:
         return True
 
     print(f"\n✨ Generation session completed!")
-    print(f"📁 Images saved in: {IMAGE_DIR}")
-    print(f"📄 Metadata saved in: {METADATA_DIR}")
+    print(f"📁 Images saved in: {image_dir()}")
+    print(f"📄 Metadata saved in: {metadata_dir()}")
@@ -13,9 +13,12 @@ import tempfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 from functools import partial
+from agents.story_boarder import workspace
+from agents.story_boarder.rate_limit import get_limiter
 
 class VideoService:
-    def __init__(self, output_dir: str = "output", max_workers: int = None):
+    def __init__(self, output_dir: str = None, max_workers: int = None):
+        output_dir = output_dir or workspace.output_dir()
         self.output_dir = output_dir
         self.video_dir = os.path.join(output_dir, "videos")
         self.metadata_dir = os.path.join(output_dir, "metadata")
@@ -35,7 +38,7 @@ class VideoService:
             image_base64 = base64.b64encode(image_data).decode('utf-8')
             
             # Upload using the file upload API
-            url = fal_client.upload_file(image_path)
+            url = get_limiter("fal").call(fal_client.upload_file, image_path)
             print(f"\n📤 Image uploaded successfully: {os.path.basename(image_path)}")
             return url
             
@@ -77,7 +80,9 @@ class VideoService:
                         print(f"📋 {log['message']}")
 
             # Submit video generation request using subscribe pattern
-            result = fal_client.subscribe(
+            # The fal slot is held until the video is done, so concurrency counts running jobs
+            result = get_limiter("fal").call(
+                fal_client.subscribe,
                 "fal-ai/minimax/video-01-subject-reference",
                 arguments={
                     "prompt": prompt,
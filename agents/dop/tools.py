@@ -1,18 +1,25 @@
 from typing import Dict, List
 from pathlib import Path
 from agents.dop.models.scene import ScenePanel, CameraAngle
-from agents.dop.image_service import generate_test_image
-from agents.dop.generate_story_video import generate_story_video_for_image
 from agents.story_boarder.storage import StoryboardStorage
+from agents.story_boarder.db_client import resume_cursor
+from agents.story_boarder.llm_usage import usage_tags
+
+# Change-log consumer name under which the DOP stores its cursor
+CHANGE_CONSUMER = "dop"
 
 async def generate_shot_images(
     lighting: str = None,
     colors: str = None,
     camera_angle: str = None,
-    character_focus: List[str] = None
+    character_focus: List[str] = None,
+    regenerate_all: bool = False
 ) -> str:
     """
-    Generate images for all shot specifications in the storyboard database.
+    Generate images for the shot specifications in the storyboard database.
+    Only shots inserted or modified since the last run are generated, unless
+    regenerate_all is set or an override is given. Shots whose image fails
+    are picked up again by the next run.
     Optional parameters can override the values from the database.
     
     Args:
@@ -20,18 +27,34 @@ async def generate_shot_images(
         colors: Optional colors override for all shots
         camera_angle: Optional camera angle override for all shots
         character_focus: Optional character focus override for all shots
+        regenerate_all: Regenerate every shot, not only the changed ones
     
     Returns:
         A string message indicating where the images were created.
     """
+    # fal and litellm are only loaded once images are actually generated
+    from agents.dop.image_service import generate_test_image
+
     # Initialize storage client
     storage = StoryboardStorage()
     
-    # Get all shot specs from storage
-    shot_specs = storage.load_shot_image_specs()
+    # Read the change log before the specs so nothing written in between is skipped
+    saved_cursor = storage.get_consumer_cursor(CHANGE_CONSUMER)
+    changes, cursor = storage.changes_since(saved_cursor or 0, ["shot_image_specs"])
+    # Stream the specs so only one batch of shots is held in memory at a time
+    shot_specs = storage.iter_shot_image_specs()
+    
+    overridden = lighting or colors or camera_angle or character_focus
+    # The first run renders every shot, including those older than the change log
+    if not (regenerate_all or overridden or saved_cursor is None):
+        changed = {change.key for change in changes if change.operation != "delete"}
+        shot_specs = (spec for spec in shot_specs if spec.shot_id in changed)
     
     # Default values
     size = (1024, 1024)
+    nsfw = False
+    generated = 0
+    failed = set()
 
     for shot_spec in shot_specs:
         # Convert camera type to CameraAngle enum
@@ -58,10 +81,23 @@ async def generate_shot_images(
             character_focus=character_focus or shot_spec.characters
         )
 
-        nsfw = await generate_test_image(scene_panel)
+        with usage_tags(agent="dop", tool="generate_shot_images"):
+            rendered = await generate_test_image(scene_panel)
+        if rendered is None:
+            failed.add(shot_spec.shot_id)
+            continue
+        nsfw = rendered
+        generated += 1
         # await generate_story_video_for_image(scene_panel)
     
-    return f"I have created {len(shot_specs)} images and story videos in this directory: output/videos directory. NSFW content was detected: {nsfw}"
+    # A first run that failed stays a full run: its failed shots may not be in the log
+    if saved_cursor is not None or not failed:
+        storage.save_consumer_cursor(CHANGE_CONSUMER, resume_cursor(changes, cursor, failed))
+        storage.prune_change_log()
+    message = f"I have created {generated} images and story videos in this directory: output/videos directory. NSFW content was detected: {nsfw}"
+    if failed:
+        message += f". {len(failed)} shots failed and will be retried on the next run: {', '.join(sorted(failed))}"
+    return message
 
 # Add the image generation tool to the list of available tools
 tools = [
@@ -90,6 +126,10 @@ tools = [
                             "type": "array",
                             "items": {"type": "string"},
                             "description": "Optional character focus override for all shots"
+                        },
+                        "regenerate_all": {
+                            "type": "boolean",
+                            "description": "Regenerate images for every shot instead of only new or changed shots"
                         }
                     },
                     "required": []
@@ -1,4 +1,11 @@
-from .research_agent import ScriptWriterResearchAgent
 from .tools import get_script_with_research
 
-__all__ = ['ScriptWriterResearchAgent', 'get_script_with_research'] 
\ No newline at end of file
+__all__ = ['ScriptWriterResearchAgent', 'get_script_with_research']
+
+
+def __getattr__(name):
+    # The research agent pulls in smolagents and litellm, so load it on first access
+    if name == 'ScriptWriterResearchAgent':
+        from .research_agent import ScriptWriterResearchAgent
+        return ScriptWriterResearchAgent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,6 +7,8 @@ import litellm
 
 from .research_agent_tools import ScriptResearchTools
 from .prompt import story_writer_prompt
+from agents.story_boarder.llm_usage import current_call, track_llm_call, usage_tags
+from agents.story_boarder.rate_limit import get_limiter
 
 # Load environment variables and login to Hugging Face
 load_dotenv(override=True)
@@ -29,6 +31,31 @@ AUTHORIZED_IMPORTS = [
     "csv"
 ]
 
+class TrackedLiteLLMModel(LiteLLMModel):
+    """LiteLLMModel that records every completion in the LLM usage log"""
+
+    def __call__(self, *args, **kwargs):
+        return self._tracked(super().__call__, *args, **kwargs)
+
+    def generate(self, *args, **kwargs):
+        return self._tracked(super().generate, *args, **kwargs)
+
+    def _tracked(self, method, *args, **kwargs):
+        # Newer smolagents implement __call__ through generate; record the call once
+        if current_call() is not None:
+            return method(*args, **kwargs)
+        # litellm model ids are "provider/model", or a bare OpenAI model name
+        provider = self.model_id.split("/")[0] if "/" in self.model_id else "openai"
+        with track_llm_call(self.model_id) as call:
+            message = get_limiter(provider).call(method, *args, on_retry=call.add_retry, **kwargs)
+            call.add_usage(message)
+            if call.prompt_tokens is None:
+                # Older smolagents keep the counts of the last call on the model
+                call.prompt_tokens = getattr(self, "last_input_token_count", None)
+                call.completion_tokens = getattr(self, "last_output_token_count", None)
+        return message
+
+
 class ScriptWriterResearchAgent:
     """Agent for writing movie scripts with integrated research capabilities"""
     
@@ -41,7 +68,7 @@ class ScriptWriterResearchAgent:
         max_tokens: int = 4096
     ):
         # Initialize the LLM model
-        self.model = LiteLLMModel(
+        self.model = TrackedLiteLLMModel(
             model_id,
             custom_role_conversions={"tool-call": "assistant", "tool-response": "user"},
             max_completion_tokens=max_tokens,
@@ -98,16 +125,19 @@ class ScriptWriterResearchAgent:
         query = f"Research historical and cultural context for {time_period if time_period else ''} {location if location else ''}"
         if additional_context:
             query += f" {additional_context}"
-        return self.research_agent.run(query)
+        with usage_tags(agent=self.research_agent.name):
+            return self.research_agent.run(query)
     
     def analyze_theme(self, theme: str) -> str:
         """Analyze similar movies with the given theme"""
         query = f"Research and analyze movies with the theme: {theme}"
-        return self.research_agent.run(query)
+        with usage_tags(agent=self.research_agent.name):
+            return self.research_agent.run(query)
     
     def write_script(self, prompt: str) -> str:
         """Write a script based on the given prompt, using research tools as needed"""
-        return self.manager.run(prompt)
+        with usage_tags(agent=self.manager.name):
+            return self.manager.run(prompt)
     
     def get_tools(self) -> List[Dict[str, Any]]:
         """Get all available tools"""
@@ -13,6 +13,7 @@ from .scripts.text_web_browser import (
     ArchiveSearchTool,
 )
 from .scripts.text_inspector_tool import TextInspectorTool
+from agents.story_boarder.llm_usage import track_llm_call
 
 load_dotenv(override=True)
 
@@ -33,12 +34,14 @@ class ScriptAnalysisTool(Tool):
         self.model = model
 
     def forward(self, script_text: str) -> str:
-        response = self.model.chat.completions.create(
-            messages=[
-                {"role": "system", "content": "You are a professional script analyst. Analyze this script's structure and provide detailed feedback."},
-                {"role": "user", "content": script_text}
-            ]
-        )
+        with track_llm_call(self.model.model_id, tool=self.name) as call:
+            response = self.model.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": "You are a professional script analyst. Analyze this script's structure and provide detailed feedback."},
+                    {"role": "user", "content": script_text}
+                ]
+            )
+            call.add_usage(response)
         return response.choices[0].message.content
 
 class SceneGeneratorTool(Tool):
@@ -65,12 +68,14 @@ class SceneGeneratorTool(Tool):
         
         Follow standard screenplay format."""
         
-        response = self.model.chat.completions.create(
-            messages=[
-                {"role": "system", "content": "You are a professional screenwriter. Write a scene following standard screenplay format."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        with track_llm_call(self.model.model_id, tool=self.name) as call:
+            response = self.model.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": "You are a professional screenwriter. Write a scene following standard screenplay format."},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            call.add_usage(response)
         return response.choices[0].message.content
 
 class ScriptResearchTools:
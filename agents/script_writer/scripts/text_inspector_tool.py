@@ -3,6 +3,8 @@ from typing import Optional
 from smolagents import Tool
 from smolagents.models import MessageRole, Model
 
+from agents.story_boarder.llm_usage import usage_tags
+
 from .mdconvert import MarkdownConverter
 
 
@@ -71,7 +73,8 @@ This tool handles the following file extensions: [".html", ".htm", ".xlsx", ".pp
                 ],
             },
         ]
-        return self.model(messages).content
+        with usage_tags(tool=self.name):
+            return self.model(messages).content
 
     def forward(self, file_path, question: Optional[str] = None) -> str:
         result = self.md_converter.convert(file_path)
@@ -119,4 +122,5 @@ This tool handles the following file extensions: [".html", ".htm", ".xlsx", ".pp
                 ],
             },
         ]
-        return self.model(messages).content
+        with usage_tags(tool=self.name):
+            return self.model(messages).content
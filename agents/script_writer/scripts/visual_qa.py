@@ -3,21 +3,36 @@ import json
 import mimetypes
 import os
 import uuid
+from functools import lru_cache
 from io import BytesIO
 from typing import Optional
 
 import requests
 from dotenv import load_dotenv
-from huggingface_hub import InferenceClient
 from PIL import Image
-from transformers import AutoProcessor
 
 from smolagents import Tool, tool
 
 
 load_dotenv(override=True)
 
-idefics_processor = AutoProcessor.from_pretrained("HuggingFaceM4/idefics2-8b-chatty")
+IDEFICS_MODEL = "HuggingFaceM4/idefics2-8b-chatty"
+
+
+@lru_cache(maxsize=None)
+def idefics_processor():
+    """Chat-template processor, downloaded the first time a question is asked"""
+    from transformers import AutoProcessor
+
+    return AutoProcessor.from_pretrained(IDEFICS_MODEL)
+
+
+@lru_cache(maxsize=None)
+def inference_client():
+    """Hosted inference endpoint, created on first use"""
+    from huggingface_hub import InferenceClient
+
+    return InferenceClient(IDEFICS_MODEL)
 
 
 def process_images_and_text(image_path, query, client):
@@ -31,7 +46,7 @@ def process_images_and_text(image_path, query, client):
         },
     ]
 
-    prompt_with_template = idefics_processor.apply_chat_template(messages, add_generation_prompt=True)
+    prompt_with_template = idefics_processor().apply_chat_template(messages, add_generation_prompt=True)
 
     # load images from local directory
 
@@ -119,7 +134,9 @@ class VisualQATool(Tool):
     }
     output_type = "string"
 
-    client = InferenceClient("HuggingFaceM4/idefics2-8b-chatty")
+    @property
+    def client(self):
+        return inference_client()
 
     def forward(self, image_path: str, question: Optional[str] = None) -> str:
         output = ""
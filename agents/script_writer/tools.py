@@ -1,7 +1,43 @@
 import os
-from agents.script_writer.research_agent import ScriptWriterResearchAgent
+from typing import Dict, List
+from pydantic import BaseModel
+from agents.story_boarder.llm_usage import usage_tags
 
+CHARACTER_SYSTEM_PROMPT = "You are a professional script analyst specializing in character analysis and development."
 
+
+class Character(BaseModel):
+    """Character information extracted from the script"""
+    name: str
+    description: str
+    role: str  # main, supporting, etc.
+    traits: str  # comma-separated list of traits
+
+
+def character_extraction_messages(script_text: str) -> List[Dict[str, str]]:
+    """Chat messages asking for the characters of a script, as a list of Character"""
+    # Create prompt for character extraction
+    prompt = f"""
+    Analyze this script and extract detailed information about all characters.
+    For each character, identify:
+    1. Their full name as it appears in the script
+    2. A comprehensive description of their character
+    3. Their role in the story (main or supporting)
+    4. Their key personality traits and characteristics
+    
+    Focus on both explicitly stated and implied character traits.
+    Include any character development or changes throughout the story.
+    
+    Script to analyze:
+    {script_text}
+    """
+    return [
+        {"role": "system", "content": CHARACTER_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+@usage_tags(agent="script_writer", tool="get_script_with_research")
 def get_script_with_research(script_prompt: str) -> str:
     """
     Get a script with research using the ScriptWriterResearchAgent.
@@ -13,6 +49,9 @@ def get_script_with_research(script_prompt: str) -> str:
     Returns:
         str: The generated script text
     """
+    # smolagents, litellm and the Hugging Face login are only needed here
+    from agents.script_writer.research_agent import ScriptWriterResearchAgent
+
     # Initialize the agent with default settings
     agent = ScriptWriterResearchAgent(
         model_id="o1",  # Default model
@@ -35,6 +74,7 @@ def get_script_with_research(script_prompt: str) -> str:
     
     return "I have saved the script to data/script_writer/script.txt and extracted character information to the database"
 
+@usage_tags(agent="script_writer", tool="extract_and_save_characters")
 def extract_and_save_characters(script_text: str) -> str:
     """
     Extract character information from the script and save it to the storyboard database.
@@ -47,46 +87,19 @@ def extract_and_save_characters(script_text: str) -> str:
         str: A message indicating success and summary of characters saved
     """
     from agents.story_boarder.db_client import StoryboardDBClient
-    import instructor
-    from openai import OpenAI
-    from pydantic import BaseModel
-    from typing import List
-    
-    class Character(BaseModel):
-        """Character information extracted from the script"""
-        name: str
-        description: str
-        role: str  # main, supporting, etc.
-        traits: str  # comma-separated list of traits
+    from agents.story_boarder.llm_cache import cached_create
+    from agents.story_boarder.llm_usage import instructor_client
     
     # Initialize OpenAI client with instructor
-    client = instructor.patch(OpenAI())
-    
-    # Create prompt for character extraction
-    prompt = f"""
-    Analyze this script and extract detailed information about all characters.
-    For each character, identify:
-    1. Their full name as it appears in the script
-    2. A comprehensive description of their character
-    3. Their role in the story (main or supporting)
-    4. Their key personality traits and characteristics
-    
-    Focus on both explicitly stated and implied character traits.
-    Include any character development or changes throughout the story.
-    
-    Script to analyze:
-    {script_text}
-    """
+    client = instructor_client()
     
     try:
         # Use OpenAI to extract character information
-        characters = client.chat.completions.create(
+        characters = cached_create(
+            client,
             model="gpt-4o-mini",
             response_model=List[Character],
-            messages=[
-                {"role": "system", "content": "You are a professional script analyst specializing in character analysis and development."},
-                {"role": "user", "content": prompt}
-            ]
+            messages=character_extraction_messages(script_text)
         )
         
         # Convert to format expected by database
@@ -102,9 +115,9 @@ def extract_and_save_characters(script_text: str) -> str:
         
         # Save to database
         db = StoryboardDBClient()
-        db.save_script_characters(db_characters)
+        stats = db.save_script_characters(db_characters)
         
-        return f"Successfully extracted and saved {len(db_characters)} characters to the database"
+        return f"Successfully extracted and saved {len(db_characters)} characters to the database ({stats})"
         
     except Exception as e:
         print(f"Error extracting characters: {e}")
@@ -0,0 +1,463 @@
+"""Offline batch mode for the storyboard's bulk LLM work.
+
+For overnight runs, where cost and throughput matter more than latency, the
+per-scene analysis and visual planning calls and the character extraction
+can go through a batch endpoint instead of interactive chat completions:
+
+    python -m agents.story_boarder.batch run script_characters scene_analyses visual_plans
+    python -m agents.story_boarder.batch submit scene_analyses
+    python -m agents.story_boarder.batch status
+    python -m agents.story_boarder.batch ingest scene_analyses-20250101-020000
+
+A job writes every request of one stage to ``batch/<job_id>/requests.jsonl``
+under the active workspace's storage directory, submits it, polls until the
+batch is done and saves the results through ``StoryboardStorage`` with the
+input hashes the requests were built from, exactly as the interactive tools
+do. Failed requests are reported and simply stay stale for the next run.
+Ingested responses are also added to the LLM response cache and the usage log.
+
+The transport is pluggable: ``OpenAIBatchTransport`` talks to the OpenAI Batch
+API (or, with ``--base-url``, a local stand-in server that speaks it), and
+``ReplayTransport`` answers from a JSONL file of canned batch output lines,
+such as the ``results.jsonl`` of an earlier job.
+"""
+import abc
+import argparse
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, get_origin
+
+from pydantic import TypeAdapter, ValidationError
+
+from agents.script_writer.tools import Character, character_extraction_messages
+from . import workspace
+from .llm_cache import cache_key, get_response_cache
+from .llm_usage import LLMCall, record_call
+from .models import SceneAnalysis, VisualPlan
+from .rate_limit import get_limiter
+from .storage import StoryboardStorage
+from .tools import (
+    ANALYSIS_SYSTEM_PROMPT,
+    VISUAL_PLAN_SYSTEM_PROMPT,
+    scene_analysis_prompt,
+    visual_plan_prompt,
+)
+
+BATCH_MODEL = "gpt-4o-mini"
+BATCH_ENDPOINT = "/v1/chat/completions"
+SCRIPT_PATH = "data/script_writer/script.txt"
+DEFAULT_POLL_INTERVAL = 60.0  # seconds
+
+# Stages in the order they depend on each other, with the model each request returns
+STAGE_MODELS: Dict[str, Any] = {
+    "script_characters": List[Character],
+    "scene_analyses": SceneAnalysis,
+    "visual_plans": VisualPlan,
+}
+STAGE_AGENTS = {
+    "script_characters": "script_writer",
+    "scene_analyses": "story_boarder",
+    "visual_plans": "story_boarder",
+}
+# Batch statuses after which nothing more will change
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def jobs_dir() -> str:
+    """Batch jobs of the active workspace"""
+    return os.path.join(workspace.storage_dir(), "batch")
+
+
+def _is_list(response_model: Any) -> bool:
+    return get_origin(response_model) in (list, List)
+
+
+def response_format(name: str, response_model: Any) -> Dict[str, Any]:
+    """Structured output format for ``response_model``; lists are wrapped in an ``items`` object"""
+    schema = TypeAdapter(response_model).json_schema()
+    if _is_list(response_model):
+        defs = schema.pop("$defs", None)
+        schema = {"type": "object", "properties": {"items": schema}, "required": ["items"]}
+        if defs:
+            schema["$defs"] = defs
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema}}
+
+
+def parse_content(content: str, response_model: Any) -> Any:
+    """Validate a structured output message against ``response_model``"""
+    if _is_list(response_model):
+        return TypeAdapter(response_model).validate_python(json.loads(content)["items"])
+    return TypeAdapter(response_model).validate_json(content)
+
+
+def build_requests(storage: StoryboardStorage, stage: str,
+                   regenerate_all: bool = False) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[str]]]:
+    """Batch request lines for a stage, and the input hashes of the scenes they cover.
+
+    Like the interactive tools, only stale scenes are included unless
+    ``regenerate_all`` is set.
+    """
+    if stage not in STAGE_MODELS:
+        raise ValueError(f"Unknown batch stage: {stage}")
+    input_hashes: Dict[str, Optional[str]] = {}
+    if stage == "script_characters":
+        with open(SCRIPT_PATH, "r") as f:
+            requests = [("script_characters", character_extraction_messages(f.read()))]
+    elif stage == "scene_analyses":
+        input_hashes = storage.stage_inputs(stage, only_stale=not regenerate_all)
+        requests = [
+            (f"{stage}:{scene.scene_id}", [
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": scene_analysis_prompt(scene)}
+            ])
+            for scene in storage.load_scenes() if scene.scene_id in input_hashes
+        ]
+    else:
+        input_hashes = storage.stage_inputs(stage, only_stale=not regenerate_all)
+        requests = [
+            (f"{stage}:{analysis.scene_id}", [
+                {"role": "system", "content": VISUAL_PLAN_SYSTEM_PROMPT},
+                {"role": "user", "content": visual_plan_prompt(analysis)}
+            ])
+            for analysis in storage.load_scene_analyses() if analysis.scene_id in input_hashes
+        ]
+    fmt = response_format(stage, STAGE_MODELS[stage])
+    lines = [
+        {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {"model": BATCH_MODEL, "messages": messages, "response_format": fmt},
+        }
+        for custom_id, messages in requests
+    ]
+    return lines, input_hashes
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _write_jsonl(path: str, lines: List[Dict[str, Any]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+class BatchTransport(abc.ABC):
+    """Where batch jobs are submitted; subclasses talk to a real or stand-in endpoint"""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def submit(self, requests_path: str) -> str:
+        """Submit a JSONL file of request lines and return the batch id"""
+
+    @abc.abstractmethod
+    def status(self, batch_id: str) -> str:
+        """Batch status, in OpenAI's terms ("validating", "in_progress", "completed", ...)"""
+
+    @abc.abstractmethod
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Output lines (``custom_id``, ``response``, ``error``) of every finished request"""
+
+
+class OpenAIBatchTransport(BatchTransport):
+    """The OpenAI Batch API, or a server that speaks it at ``base_url``"""
+
+    name = "openai"
+
+    def __init__(self, base_url: Optional[str] = None, completion_window: str = "24h"):
+        self.base_url = base_url
+        self.completion_window = completion_window
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            # Throttled requests are retried by the shared limiter
+            self._client = OpenAI(base_url=self.base_url, max_retries=0)
+        return self._client
+
+    def submit(self, requests_path: str) -> str:
+        limiter = get_limiter("openai")
+        with open(requests_path, "rb") as f:
+            upload = limiter.call(self.client.files.create, file=f, purpose="batch")
+        batch = limiter.call(
+            self.client.batches.create, input_file_id=upload.id,
+            endpoint=BATCH_ENDPOINT, completion_window=self.completion_window
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return get_limiter("openai").call(self.client.batches.retrieve, batch_id).status
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        limiter = get_limiter("openai")
+        batch = limiter.call(self.client.batches.retrieve, batch_id)
+        lines = []
+        # Failed requests are reported in a separate error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = limiter.call(self.client.files.content, file_id).text
+                lines.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        return lines
+
+
+class ReplayTransport(BatchTransport):
+    """Answers every request from canned batch output lines, keyed by ``custom_id``.
+
+    Batches complete as soon as they are submitted. Requests without a canned
+    line fail, as they would in a real batch.
+    """
+
+    name = "replay"
+
+    def __init__(self, results_path: str):
+        self.results_path = results_path
+        self.canned = {line["custom_id"]: line for line in _read_jsonl(results_path)}
+
+    def submit(self, requests_path: str) -> str:
+        # The batch id is the request file, so any process can replay the job
+        return f"replay:{os.path.abspath(requests_path)}"
+
+    def status(self, batch_id: str) -> str:
+        return "completed"
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        requests = _read_jsonl(batch_id.split(":", 1)[1])
+        return [
+            self.canned.get(request["custom_id"]) or {
+                "custom_id": request["custom_id"],
+                "response": None,
+                "error": {"code": "not_found", "message": f"No canned response in {self.results_path}"},
+            }
+            for request in requests
+        ]
+
+
+@dataclass
+class BatchJob:
+    """One stage's batch: its requests, where it was submitted and whether it has been ingested"""
+
+    job_id: str
+    stage: str
+    transport: str
+    request_count: int
+    input_hashes: Dict[str, Optional[str]] = field(default_factory=dict)
+    batch_id: Optional[str] = None
+    status: str = "created"
+    created_at: float = field(default_factory=time.time)
+    ingested: Optional[str] = None  # summary of the ingest, once done
+
+    @property
+    def path(self) -> str:
+        return os.path.join(jobs_dir(), self.job_id)
+
+    @property
+    def requests_path(self) -> str:
+        return os.path.join(self.path, "requests.jsonl")
+
+    @property
+    def results_path(self) -> str:
+        return os.path.join(self.path, "results.jsonl")
+
+    def save(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = os.path.join(self.path, "job.json.partial")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, "job.json"))
+
+    @classmethod
+    def load(cls, job_id: str) -> "BatchJob":
+        with open(os.path.join(jobs_dir(), job_id, "job.json"), "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def list_jobs() -> List[BatchJob]:
+    """Batch jobs of the active workspace, oldest first"""
+    if not os.path.isdir(jobs_dir()):
+        return []
+    jobs = [
+        BatchJob.load(job_id) for job_id in os.listdir(jobs_dir())
+        if os.path.exists(os.path.join(jobs_dir(), job_id, "job.json"))
+    ]
+    return sorted(jobs, key=lambda job: job.created_at)
+
+
+def submit(stage: str, transport: BatchTransport, regenerate_all: bool = False,
+           storage: Optional[StoryboardStorage] = None) -> Optional[BatchJob]:
+    """Write and submit the batch of a stage; None if nothing in it is stale"""
+    storage = storage or StoryboardStorage()
+    requests, input_hashes = build_requests(storage, stage, regenerate_all)
+    if not requests:
+        return None
+    base_id = job_id = f"{stage}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    suffix = 1
+    while os.path.exists(os.path.join(jobs_dir(), job_id)):
+        suffix += 1
+        job_id = f"{base_id}-{suffix}"
+    job = BatchJob(
+        job_id=job_id,
+        stage=stage, transport=transport.name,
+        request_count=len(requests), input_hashes=input_hashes
+    )
+    os.makedirs(job.path, exist_ok=True)
+    _write_jsonl(job.requests_path, requests)
+    job.batch_id = transport.submit(job.requests_path)
+    job.status = "submitted"
+    job.save()
+    return job
+
+
+def poll(job: BatchJob, transport: BatchTransport, interval: float = DEFAULT_POLL_INTERVAL,
+         timeout: Optional[float] = None) -> str:
+    """Wait until the job's batch reaches a terminal status and return it"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        status = transport.status(job.batch_id)
+        if status != job.status:
+            job.status = status
+            job.save()
+        if status in TERMINAL_STATUSES:
+            return status
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Batch job {job.job_id} is still {status}")
+        time.sleep(interval)
+
+
+def ingest(job: BatchJob, transport: BatchTransport,
+           storage: Optional[StoryboardStorage] = None) -> str:
+    """Save the results of a finished job through ``StoryboardStorage``"""
+    storage = storage or StoryboardStorage()
+    response_model = STAGE_MODELS[job.stage]
+    requests = {line["custom_id"]: line["body"] for line in _read_jsonl(job.requests_path)}
+    lines = transport.results(job.batch_id)
+    _write_jsonl(job.results_path, lines)
+
+    cache = get_response_cache()
+    parsed: Dict[str, Any] = {}
+    failed: List[str] = []
+    for line in lines:
+        custom_id = line["custom_id"]
+        response = line.get("response") or {}
+        body = response.get("body") or {}
+        request = requests.get(custom_id)
+        if request is None or response.get("status_code") != 200:
+            failed.append(custom_id)
+            continue
+        try:
+            value = parse_content(body["choices"][0]["message"]["content"], response_model)
+        except (KeyError, IndexError, TypeError, ValueError, ValidationError) as e:
+            print(f"Could not parse batch result {custom_id}: {e}")
+            failed.append(custom_id)
+            continue
+        parsed[custom_id] = value
+        scene_id = custom_id.split(":", 1)[1] if ":" in custom_id else None
+        tags = {"agent": STAGE_AGENTS[job.stage], "tool": f"batch_{job.stage}"}
+        if scene_id:
+            tags["scene_id"] = scene_id
+        call = LLMCall(model=body.get("model", request["model"]), tags=tags)
+        call.add_usage(body)
+        record_call(call)
+        # Interactive re-runs on the same input are then served from the cache
+        key = cache_key(request["model"], request["messages"], response_model)
+        cache.put(key, request["model"], response_model, value)
+    failed.extend(custom_id for custom_id in requests if custom_id not in parsed and custom_id not in failed)
+
+    if job.stage == "script_characters":
+        characters = [character.model_dump() for value in parsed.values() for character in value]
+        stats = storage.save_script_characters(characters)
+    else:
+        values = list(parsed.values())
+        for custom_id, value in parsed.items():
+            # Key results by the scene asked about, as the interactive tools do
+            value.scene_id = custom_id.split(":", 1)[1]
+        if job.stage == "scene_analyses":
+            stats = storage.save_scene_analyses(values, job.input_hashes)
+        else:
+            stats = storage.save_visual_plans(values, job.input_hashes)
+
+    job.ingested = f"{len(parsed)} of {job.request_count} saved ({stats})"
+    job.status = "ingested"
+    job.save()
+    summary = f"Ingested {job.stage} job {job.job_id}: {job.ingested}"
+    if failed:
+        summary += f"; {len(failed)} failed and stay stale: {', '.join(sorted(failed))}"
+    return summary
+
+
+def run(stages: List[str], transport: BatchTransport, regenerate_all: bool = False,
+        interval: float = DEFAULT_POLL_INTERVAL) -> List[str]:
+    """Submit, poll and ingest each stage in turn, then derive the shot image specs"""
+    storage = StoryboardStorage()
+    # Later stages are built from what the earlier ones saved
+    stages = [stage for stage in STAGE_MODELS if stage in stages]
+    reports = []
+    for stage in stages:
+        job = submit(stage, transport, regenerate_all, storage)
+        if job is None:
+            reports.append(f"{stage}: nothing to do")
+            continue
+        print(f"Submitted {job.request_count} {stage} requests as job {job.job_id} ({job.batch_id})")
+        status = poll(job, transport, interval)
+        if status not in ("completed", "expired"):
+            reports.append(f"{stage}: batch {job.batch_id} {status}, nothing ingested")
+            break
+        reports.append(ingest(job, transport, storage))
+    if "visual_plans" in stages:
+        stale = list(storage.stage_inputs("shot_image_specs"))
+        stats = storage.derive_shot_image_specs(stale)
+        reports.append(f"Shot image specs of {len(stale)} scenes derived ({stats})")
+    return reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run storyboard LLM stages as offline batches")
+    parser.add_argument("--replay", metavar="RESULTS_JSONL",
+                        help="answer from canned batch output lines instead of calling the API")
+    parser.add_argument("--base-url", help="OpenAI-compatible batch server to submit to")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="submit, poll and ingest stages in order")
+    run_parser.add_argument("stages", nargs="+", choices=list(STAGE_MODELS))
+    run_parser.add_argument("--regenerate-all", action="store_true")
+    run_parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    submit_parser = commands.add_parser("submit", help="submit one stage and return")
+    submit_parser.add_argument("stage", choices=list(STAGE_MODELS))
+    submit_parser.add_argument("--regenerate-all", action="store_true")
+    status_parser = commands.add_parser("status", help="list jobs, refreshing unfinished ones")
+    status_parser.add_argument("job_id", nargs="?")
+    ingest_parser = commands.add_parser("ingest", help="save the results of a finished job")
+    ingest_parser.add_argument("job_id")
+    args = parser.parse_args()
+
+    transport = ReplayTransport(args.replay) if args.replay else OpenAIBatchTransport(args.base_url)
+    if args.command == "run":
+        for report in run(args.stages, transport, args.regenerate_all, args.poll_interval):
+            print(report)
+    elif args.command == "submit":
+        job = submit(args.stage, transport, args.regenerate_all)
+        print(f"Submitted job {job.job_id} ({job.batch_id})" if job else f"No stale {args.stage} to submit")
+    elif args.command == "status":
+        jobs = [BatchJob.load(args.job_id)] if args.job_id else list_jobs()
+        for job in jobs:
+            if job.status not in TERMINAL_STATUSES + ("ingested",):
+                job.status = transport.status(job.batch_id)
+                job.save()
+            print(f"{job.job_id}: {job.request_count} requests, {job.status}"
+                  + (f", {job.ingested}" if job.ingested else ""))
+    elif args.command == "ingest":
+        job = BatchJob.load(args.job_id)
+        status = job.status if job.status == "ingested" else transport.status(job.batch_id)
+        if status not in ("completed", "expired", "ingested"):
+            raise SystemExit(f"Batch job {job.job_id} is {status}; ingest it once it completes")
+        print(ingest(job, transport))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,611 @@
+"""Benchmarks for the storyboard SQLite store.
+
+Run with ``python -m agents.story_boarder.benchmarks``. Every benchmark works
+on a throwaway database seeded with synthetic data, so it never touches
+``data/storyboard/storyboard.db``. It also imports the control plane in a
+fresh interpreter under ``-X importtime`` and fails if its cold start exceeds
+``--import-budget-ms``.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from .db_client import StoryboardDBClient, WriteStats
+from .models import ScriptScene, Shot, SceneAnalysis, SceneAnalysisAndPlan, VisualPlan, ShotImageSpec
+
+
+class _CountingCursor:
+    """Cursor (or connection) wrapper counting the statements executed through it.
+
+    Unlike a trace callback this doesn't count trigger programs, or the
+    BEGIN and COMMIT of the connection manager, only what the code issues.
+    """
+
+    def __init__(self, target, client: "QueryCountingDBClient"):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_client", client)
+
+    def execute(self, sql: str, parameters: Sequence = ()):
+        self._client.query_count += 1
+        return self._target.execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        rows = list(seq_of_parameters)
+        self._client.query_count += len(rows)
+        return self._target.executemany(sql, rows)
+
+    def cursor(self) -> "_CountingCursor":
+        return _CountingCursor(self._target.cursor(), self._client)
+
+    def __iter__(self):
+        return iter(self._target)
+
+    def __getattr__(self, name: str):
+        return getattr(self._target, name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._target, name, value)
+
+
+class QueryCountingDBClient(StoryboardDBClient):
+    """StoryboardDBClient that counts every SQL statement it executes, triggers excluded"""
+
+    def __init__(self, db_path: str):
+        self.query_count = 0
+        super().__init__(db_path)
+
+    @contextmanager
+    def _get_connection(self):
+        with super()._get_connection() as conn:
+            yield _CountingCursor(conn, self)
+
+    @contextmanager
+    def _transaction(self):
+        with super()._transaction() as conn:
+            yield _CountingCursor(conn, self)
+
+
+def seed_benchmark_db(client: StoryboardDBClient, scenes: int = 120,
+                      shots_per_scene: int = 8) -> None:
+    """Fill the database with a synthetic feature-length storyboard"""
+    scene_models = []
+    analyses = []
+    plans = []
+    specs = []
+    for s in range(1, scenes + 1):
+        scene_id = f"scene_{s}"
+        characters = [f"Character {c}" for c in range(1, 4)]
+        scene_models.append(ScriptScene(
+            scene_id=scene_id,
+            title=f"Scene {s}",
+            script_text=f"Script text for scene {s}. " * 20,
+            importance="high",
+            characters=characters,
+            description=f"Description of scene {s}"
+        ))
+        shots = [
+            Shot(
+                type="action",
+                camera="medium shot",
+                description=f"Shot {n} of scene {s}",
+                duration="3-4 seconds",
+                camera_movement="pan",
+                focus="Main character"
+            )
+            for n in range(1, shots_per_scene + 1)
+        ]
+        analyses.append(SceneAnalysis(
+            scene_id=scene_id,
+            key_moments=["Opening", "Conflict", "Resolution"],
+            shots=shots,
+            setting="Zoo enclosure",
+            mood="calm",
+            pacing="medium",
+            time_of_day="day"
+        ))
+        plans.append(VisualPlan(
+            scene_id=scene_id,
+            lighting="Soft daylight",
+            props=["Bamboo", "Wooden barrier"],
+            atmosphere="Peaceful",
+            special_effects=["Light breeze"]
+        ))
+        for n, shot in enumerate(shots, start=1):
+            specs.append(ShotImageSpec(
+                scene_id=scene_id,
+                shot_id=f"{scene_id}_shot_{n}",
+                description=shot.description,
+                camera_specs={"type": shot.camera, "movement": shot.camera_movement, "focus": shot.focus},
+                visual_elements={"lighting": "Soft daylight", "atmosphere": "Peaceful", "time_of_day": "day"},
+                props=["Bamboo", "Wooden barrier"],
+                special_effects=["Light breeze"],
+                characters=characters
+            ))
+    client.save_scenes(scene_models)
+    client.save_scene_analyses(analyses)
+    client.save_visual_plans(plans)
+    client.save_shot_image_specs(specs)
+
+
+def legacy_load_shot_image_specs(client: StoryboardDBClient) -> List[ShotImageSpec]:
+    """Original N+1 implementation of load_shot_image_specs, kept for comparison"""
+    with client._get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM shot_image_specs")
+        specs = []
+        for row in cursor.fetchall():
+            shot_id = row['shot_id']
+            cursor.execute("SELECT prop FROM shot_spec_props WHERE shot_id = ?", (shot_id,))
+            props = [r['prop'] for r in cursor.fetchall()]
+            cursor.execute("SELECT effect FROM shot_spec_effects WHERE shot_id = ?", (shot_id,))
+            effects = [r['effect'] for r in cursor.fetchall()]
+            cursor.execute("SELECT character_name FROM shot_spec_characters WHERE shot_id = ?", (shot_id,))
+            characters = [r['character_name'] for r in cursor.fetchall()]
+            specs.append(ShotImageSpec(
+                scene_id=row['scene_id'],
+                shot_id=shot_id,
+                description=row['description'],
+                camera_specs={
+                    'type': row['camera_type'],
+                    'movement': row['camera_movement'],
+                    'focus': row['camera_focus']
+                },
+                visual_elements={
+                    'lighting': row['lighting'],
+                    'atmosphere': row['atmosphere'],
+                    'time_of_day': row['time_of_day']
+                },
+                props=props,
+                special_effects=effects,
+                characters=characters
+            ))
+        return specs
+
+
+def legacy_create_shot_image_specs(client: StoryboardDBClient) -> WriteStats:
+    """Original Python join of create_shot_image_specs, the reference for derive_shot_image_specs"""
+    scene_dict = {scene.scene_id: scene for scene in client.load_scenes()}
+    visual_plan_dict = {plan.scene_id: plan for plan in client.load_visual_plans()}
+    shot_specs = []
+    for analysis in client.load_scene_analyses():
+        scene = scene_dict.get(analysis.scene_id)
+        visual_plan = visual_plan_dict.get(analysis.scene_id)
+        if not scene or not visual_plan:
+            continue
+        for i, shot in enumerate(analysis.shots):
+            shot_specs.append(ShotImageSpec(
+                scene_id=analysis.scene_id,
+                shot_id=f"{analysis.scene_id}_shot_{i+1}",
+                description=f"Scene: {scene.description}\nShot: {shot.description}",
+                camera_specs={
+                    "type": shot.camera,
+                    "movement": shot.camera_movement,
+                    "focus": shot.focus
+                },
+                visual_elements={
+                    "lighting": visual_plan.lighting,
+                    "atmosphere": visual_plan.atmosphere,
+                    "time_of_day": analysis.time_of_day
+                },
+                props=visual_plan.props,
+                special_effects=visual_plan.special_effects,
+                characters=scene.characters
+            ))
+    return client.save_shot_image_specs(shot_specs)
+
+
+def legacy_load_scene_analyses(client: StoryboardDBClient) -> List[SceneAnalysis]:
+    """Original N+1 implementation of load_scene_analyses, kept for comparison"""
+    with client._get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM scene_analyses")
+        analyses = []
+        for row in cursor.fetchall():
+            scene_id = row['scene_id']
+            cursor.execute("SELECT moment FROM key_moments WHERE scene_id = ?", (scene_id,))
+            key_moments = [r['moment'] for r in cursor.fetchall()]
+            cursor.execute("SELECT * FROM shots WHERE scene_id = ?", (scene_id,))
+            shots = [
+                Shot(
+                    type=r['type'],
+                    camera=r['camera'],
+                    description=r['description'],
+                    duration=r['duration'],
+                    camera_movement=r['camera_movement'],
+                    focus=r['focus']
+                )
+                for r in cursor.fetchall()
+            ]
+            analyses.append(SceneAnalysis(
+                scene_id=scene_id,
+                key_moments=key_moments,
+                shots=shots,
+                setting=row['setting'],
+                mood=row['mood'],
+                pacing=row['pacing'],
+                time_of_day=row['time_of_day']
+            ))
+        return analyses
+
+
+def _measure(client: QueryCountingDBClient, loader: Callable[[], list],
+             repeat: int) -> Dict[str, float]:
+    """Run a loader ``repeat`` times and report queries per call and best wall time"""
+    best = float("inf")
+    queries = 0
+    rows = 0
+    for _ in range(repeat):
+        client.query_count = 0
+        start = time.perf_counter()
+        rows = len(loader())
+        best = min(best, time.perf_counter() - start)
+        queries = client.query_count
+    return {"rows": rows, "queries": queries, "seconds": best}
+
+
+def benchmark_loaders(scenes: int = 120, shots_per_scene: int = 8, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Compare the batch loaders against the original N+1 loaders"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = QueryCountingDBClient(os.path.join(tmp, "storyboard.db"))
+        seed_benchmark_db(client, scenes, shots_per_scene)
+
+        results = {
+            "load_shot_image_specs (legacy)": _measure(
+                client, lambda: legacy_load_shot_image_specs(client), repeat),
+            "load_shot_image_specs (batch)": _measure(
+                client, client.load_shot_image_specs, repeat),
+            "load_scene_analyses (legacy)": _measure(
+                client, lambda: legacy_load_scene_analyses(client), repeat),
+            "load_scene_analyses (batch)": _measure(
+                client, client.load_scene_analyses, repeat),
+            "load_scenes (batch)": _measure(client, client.load_scenes, repeat),
+            "load_visual_plans (batch)": _measure(client, client.load_visual_plans, repeat),
+            "get_scene_metadata (every scene)": _measure(
+                client, lambda: [client.get_scene_metadata(scene_id)
+                                 for scene_id in client.get_all_scene_ids()], repeat),
+            "get_all_scene_statuses": _measure(client, client.get_all_scene_statuses, repeat),
+            "search (ranked, 20 hits)": _measure(
+                client, lambda: client.search("character 2 in the zoo at night"), repeat),
+        }
+    return results
+
+
+def benchmark_hydration(scenes: int = 120, shots_per_scene: int = 8, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Compare trusted row hydration (no pydantic validation) against full validation"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "storyboard.db")
+        trusted = QueryCountingDBClient(db_path)
+        seed_benchmark_db(trusted, scenes, shots_per_scene)
+        validated = QueryCountingDBClient(db_path)
+        validated.validate_rows = True
+        trusted.validate_rows = False
+
+        return {
+            "load_shot_image_specs (validated)": _measure(
+                validated, validated.load_shot_image_specs, repeat),
+            "load_shot_image_specs (trusted)": _measure(
+                trusted, trusted.load_shot_image_specs, repeat),
+            "load_scene_analyses (validated)": _measure(
+                validated, validated.load_scene_analyses, repeat),
+            "load_scene_analyses (trusted)": _measure(
+                trusted, trusted.load_scene_analyses, repeat),
+        }
+
+
+def benchmark_writes(scenes: int = 120, shots_per_scene: int = 8) -> Dict[str, Dict[str, float]]:
+    """Measure rows touched when re-saving shot specs with and without changes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = QueryCountingDBClient(os.path.join(tmp, "storyboard.db"))
+        seed_benchmark_db(client, scenes, shots_per_scene)
+        specs = client.load_shot_image_specs()
+
+        def save(specs_to_save: List[ShotImageSpec]) -> Dict[str, float]:
+            client.query_count = 0
+            start = time.perf_counter()
+            stats = client.save_shot_image_specs(specs_to_save)
+            return {
+                "rows": stats.total,
+                "queries": client.query_count,
+                "seconds": time.perf_counter() - start,
+            }
+
+        results = {"resave unchanged specs": save(specs)}
+        specs[0].props = specs[0].props + ["Extra prop"]
+        results["resave with one prop added"] = save(specs)
+        # Every child row is what the old delete-and-reinsert path rewrote
+        rewritten = len(specs) + sum(
+            len(spec.props) + len(spec.special_effects) + len(spec.characters) for spec in specs
+        )
+        results["legacy rewrite (rows deleted + inserted)"] = {
+            "rows": 2 * rewritten - len(specs), "queries": 0, "seconds": 0.0
+        }
+    return results
+
+
+def benchmark_spec_generation(scenes: int = 120, shots_per_scene: int = 8) -> Dict[str, Dict[str, float]]:
+    """Compare the Python and in-database shot spec generation on identical databases.
+
+    Both paths must leave the same specs and the same change-log entries
+    behind and report the same row counts, on the first run, on an unchanged
+    re-run and after a plan edit. The SQL path only rebuilds stale scenes, as
+    create_shot_image_specs does; refreshing the input hash of a spec whose
+    content is unchanged is not counted as a write.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        clients = {}
+        for name in ("python", "sql"):
+            clients[name] = QueryCountingDBClient(os.path.join(tmp, f"{name}.db"))
+            seed_benchmark_db(clients[name], scenes, shots_per_scene)
+        generators = {
+            "python": lambda: legacy_create_shot_image_specs(clients["python"]),
+            "sql": lambda: clients["sql"].derive_shot_image_specs(
+                list(clients["sql"].stage_inputs("shot_image_specs"))
+            ),
+        }
+
+        def run(label: str) -> Dict[str, Dict[str, float]]:
+            results = {}
+            for name, generate in generators.items():
+                client = clients[name]
+                client.query_count = 0
+                start = time.perf_counter()
+                stats = generate()
+                results[f"{label} ({name})"] = {
+                    "rows": stats.total,
+                    "queries": client.query_count,
+                    "seconds": time.perf_counter() - start,
+                }
+            python, sql = clients["python"], clients["sql"]
+            specs = [
+                sorted((spec.model_dump() for spec in client.load_shot_image_specs()),
+                       key=lambda spec: spec["shot_id"])
+                for client in (python, sql)
+            ]
+            changes = [
+                sorted(tuple(change[1:]) for change in client.changes_since()[0])
+                for client in (python, sql)
+            ]
+            rows = {results[f"{label} ({name})"]["rows"] for name in generators}
+            if specs[0] != specs[1] or changes[0] != changes[1] or len(rows) != 1:
+                raise AssertionError(f"derive_shot_image_specs diverged from the Python path: {label}")
+            return results
+
+        results = run("first run")
+        results.update(run("unchanged re-run"))
+        for client in clients.values():
+            plan = client.get_visual_plan_by_id("scene_1")
+            plan.props = plan.props[:1] + ["Lantern", "Rope"]
+            client.save_visual_plans([plan])
+        results.update(run("one plan edited"))
+    return results
+
+
+def benchmark_streaming(scenes: int = 120, shots_per_scene: int = 8) -> Dict[str, Dict[str, float]]:
+    """Compare peak Python memory of loading every shot spec against streaming them"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = QueryCountingDBClient(os.path.join(tmp, "storyboard.db"))
+        seed_benchmark_db(client, scenes, shots_per_scene)
+
+        def consume(specs) -> int:
+            return sum(len(spec.props) for spec in specs)
+
+        results = {}
+        for name, run in (
+            ("load_shot_image_specs", lambda: consume(client.load_shot_image_specs())),
+            ("iter_shot_image_specs", lambda: consume(client.iter_shot_image_specs())),
+            ("iter_shot_image_specs (batch 50)", lambda: consume(client.iter_shot_image_specs(batch_size=50))),
+        ):
+            client.query_count = 0
+            tracemalloc.start()
+            start = time.perf_counter()
+            run()
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[name] = {
+                "rows": scenes * shots_per_scene,
+                "queries": client.query_count,
+                "seconds": seconds,
+                "peak_kib": peak / 1024,
+            }
+    return results
+
+
+# Per-parent lookups that must be answered through an index, with sample parameters
+HOT_QUERIES = [
+    ("SELECT scene_id FROM scenes WHERE project_id = ?", ("default",)),
+    ("SELECT character_name FROM scene_characters WHERE project_id = ? AND scene_id = ?",
+     ("default", "scene_1")),
+    ("SELECT moment FROM key_moments WHERE project_id = ? AND scene_id = ?", ("default", "scene_1")),
+    ("SELECT * FROM shots WHERE project_id = ? AND scene_id = ?", ("default", "scene_1")),
+    ("SELECT prop FROM visual_plan_props WHERE project_id = ? AND scene_id = ?", ("default", "scene_1")),
+    ("SELECT effect FROM visual_plan_effects WHERE project_id = ? AND scene_id = ?", ("default", "scene_1")),
+    ("SELECT * FROM shot_image_specs WHERE project_id = ? AND scene_id = ?", ("default", "scene_1")),
+    ("SELECT prop FROM shot_spec_props WHERE project_id = ? AND shot_id = ?", ("default", "scene_1_shot_1")),
+    ("SELECT effect FROM shot_spec_effects WHERE project_id = ? AND shot_id = ?",
+     ("default", "scene_1_shot_1")),
+    ("SELECT character_name FROM shot_spec_characters WHERE project_id = ? AND shot_id = ?",
+     ("default", "scene_1_shot_1")),
+    ("SELECT shot_id, prop FROM shot_spec_props WHERE project_id = ? AND shot_id IN "
+     "(SELECT shot_id FROM shot_image_specs WHERE project_id = ? AND scene_id = ?) ORDER BY rowid",
+     ("default", "default", "scene_1")),
+    ("SELECT COUNT(DISTINCT shot_id) FROM rendered_assets "
+     "WHERE project_id = ? AND scene_id = ? AND kind = 'image'", ("default", "scene_1")),
+    ("SELECT * FROM script_characters WHERE project_id = ?", ("default",)),
+    ("SELECT * FROM script_characters WHERE project_id = ? AND normalized_name IN (?, ?)",
+     ("default", "character 1", "character 2")),
+    ("SELECT seq, table_name, key, operation FROM change_log WHERE project_id = ? AND seq > ? ORDER BY seq",
+     ("default", 0)),
+]
+
+
+def benchmark_fused_planning(scene_count: int = 5, max_concurrency: int = 8) -> Dict[str, Dict[str, float]]:
+    """Compare two-pass analysis + planning against the fused single call.
+
+    Unlike the other benchmarks this calls the OpenAI API (without the
+    response cache) for the first ``scene_count`` scenes of the active
+    storyboard. Nothing is saved.
+    """
+    import asyncio
+    from . import tools
+    from .llm_usage import LLMCall, acreate_with_usage
+
+    scenes = tools.get_storage().load_scenes()[:scene_count]
+    client = tools._instructor_client(async_client=True)
+
+    async def request(response_model, system: str, prompt: str) -> Tuple[Any, int]:
+        """One uncached call, with the tokens of the completion it was parsed from"""
+        call = LLMCall(model="gpt-4o-mini")
+        response = await acreate_with_usage(
+            client, call, model=call.model, response_model=response_model,
+            messages=[{"role": "system", "content": system}, {"role": "user", "content": prompt}],
+        )
+        return response, (call.prompt_tokens or 0) + (call.completion_tokens or 0)
+
+    async def two_pass() -> List[int]:
+        analyses = await tools._gather_bounded(
+            scenes,
+            lambda scene: request(SceneAnalysis, tools.ANALYSIS_SYSTEM_PROMPT, tools.scene_analysis_prompt(scene)),
+            max_concurrency
+        )
+        plans = await tools._gather_bounded(
+            analyses,
+            lambda result: request(VisualPlan, tools.VISUAL_PLAN_SYSTEM_PROMPT, tools.visual_plan_prompt(result[0])),
+            max_concurrency
+        )
+        return [tokens for _, tokens in analyses + plans]
+
+    async def fused() -> List[int]:
+        results = await tools._gather_bounded(
+            scenes,
+            lambda scene: request(
+                SceneAnalysisAndPlan, f"{tools.ANALYSIS_SYSTEM_PROMPT} {tools.VISUAL_PLAN_SYSTEM_PROMPT}",
+                tools._analysis_and_plan_prompt(scene)
+            ),
+            max_concurrency
+        )
+        return [tokens for _, tokens in results]
+
+    results = {}
+    for name, flow in (("two-pass analysis + planning", two_pass), ("fused analysis and planning", fused)):
+        start = time.perf_counter()
+        tokens = asyncio.run(flow())
+        results[name] = {
+            "scenes": len(scenes),
+            "calls": len(tokens),
+            "tokens": sum(tokens),
+            "seconds": time.perf_counter() - start,
+        }
+    return results
+
+
+def check_query_plans(client: StoryboardDBClient) -> Dict[str, str]:
+    """Return the EXPLAIN QUERY PLAN of every hot query that scans a table without an index"""
+    failures = {}
+    with client._get_connection() as conn:
+        for sql, params in HOT_QUERIES:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            if any(step.startswith("SCAN") and "INDEX" not in step for step in plan):
+                failures[sql] = "; ".join(plan)
+    return failures
+
+
+# Modules the control plane imports before it can serve anything
+CONTROL_PLANE_MODULES = ("control_plane",)
+# Cold-start budget for importing them, in milliseconds
+IMPORT_BUDGET_MS = 1500
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def profile_import_time(modules: Sequence[str] = CONTROL_PLANE_MODULES) -> Tuple[float, Dict[str, float]]:
+    """Import ``modules`` in a fresh interpreter under ``-X importtime``.
+
+    Returns the total cumulative import time in milliseconds and the
+    cumulative milliseconds of every top-level import, slowest first. Raises
+    RuntimeError if the import fails.
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    top_level = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # Nested imports are indented under the module that pulled them in
+        if cumulative.strip().isdigit() and not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative) / 1000
+    total = sum(top_level.values())
+    return total, dict(sorted(top_level.items(), key=lambda item: item[1], reverse=True))
+
+
+def print_results(title: str, results: Dict[str, Dict[str, float]]) -> None:
+    with_memory = all("peak_kib" in result for result in results.values())
+    print(f"\n{title}")
+    print(f"{'benchmark':<40} {'rows':>8} {'queries':>8} {'ms':>10}" + (f" {'peak KiB':>10}" if with_memory else ""))
+    for name, result in results.items():
+        line = f"{name:<40} {result['rows']:>8} {result['queries']:>8} {result['seconds'] * 1000:>10.2f}"
+        if with_memory:
+            line += f" {result['peak_kib']:>10.0f}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Storyboard database benchmarks")
+    parser.add_argument("--scenes", type=int, default=120)
+    parser.add_argument("--shots-per-scene", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS,
+                        help="fail if a cold import of the control plane takes longer (0 to skip)")
+    parser.add_argument("--llm-scenes", type=int, default=0,
+                        help="also compare two-pass and fused scene planning on this many "
+                             "scenes of the active storyboard (calls the OpenAI API)")
+    args = parser.parse_args()
+
+    if args.llm_scenes:
+        print(f"\n{'planning flow':<40} {'scenes':>8} {'calls':>8} {'tokens':>8} {'ms':>10}")
+        for name, result in benchmark_fused_planning(args.llm_scenes).items():
+            print(f"{name:<40} {result['scenes']:>8} {result['calls']:>8} "
+                  f"{result['tokens']:>8} {result['seconds'] * 1000:>10.2f}")
+
+    print_results(
+        f"Loaders ({args.scenes} scenes, {args.scenes * args.shots_per_scene} shots)",
+        benchmark_loaders(args.scenes, args.shots_per_scene, args.repeat)
+    )
+    print_results("Row hydration", benchmark_hydration(args.scenes, args.shots_per_scene, args.repeat))
+    print_results("Writes (rows = rows inserted + updated + deleted)",
+                  benchmark_writes(args.scenes, args.shots_per_scene))
+    print_results("Streaming", benchmark_streaming(args.scenes, args.shots_per_scene))
+    print_results("Shot spec generation (rows = rows inserted + updated + deleted)",
+                  benchmark_spec_generation(args.scenes, args.shots_per_scene))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = StoryboardDBClient(os.path.join(tmp, "storyboard.db"))
+        seed_benchmark_db(client, scenes=2, shots_per_scene=2)
+        failures = check_query_plans(client)
+    print(f"\nQuery plans: {len(HOT_QUERIES) - len(failures)}/{len(HOT_QUERIES)} hot queries use an index")
+    for sql, plan in failures.items():
+        print(f"  full scan: {sql}\n    {plan}")
+    over_budget = False
+    if args.import_budget_ms:
+        total_ms, imports = profile_import_time()
+        print(f"\nControl plane cold import: {total_ms:.0f} ms (budget {args.import_budget_ms:.0f} ms)")
+        for name, ms in list(imports.items())[:10]:
+            print(f"  {name:<38} {ms:>10.2f}")
+        over_budget = total_ms > args.import_budget_ms
+    if failures or over_budget:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+# Pragmas applied to every new connection. WAL lets the DOP, audio and
+# storyboarder agents read while another one writes; NORMAL synchronous is
+# durable in WAL mode except for the last transactions on power loss.
+# foreign_keys is off by default in SQLite and must be enabled per connection.
+CONNECTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,  # negative values are KiB, so ~16 MB of page cache
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+# Seconds a connection waits on a locked database before raising
+BUSY_TIMEOUT = 30.0
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection, immediate: bool = False):
+    """Run the block in one transaction on an autocommit connection.
+
+    Read blocks get a consistent snapshot; write blocks should pass
+    ``immediate=True`` so the write lock is taken up front instead of
+    failing half way through on a busy database. Nested blocks join the
+    outer transaction.
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+class SQLiteConnectionManager:
+    """Hands out one long-lived sqlite3 connection per thread for a database file"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._schema_ready = False
+        # Per-table count of writes committed through this process
+        self._write_counters: Dict[str, int] = {}
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None hands transaction control to transaction()
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row  # This enables column access by name
+        for pragma, value in CONNECTION_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        """Run the block in one transaction on the calling thread's connection"""
+        with transaction(self.connection(), immediate) as conn:
+            yield conn
+
+    def record_write(self, *tables: str) -> None:
+        """Note that a committed transaction changed ``tables``"""
+        with self._lock:
+            for table in tables:
+                self._write_counters[table] = self._write_counters.get(table, 0) + 1
+
+    def write_counter(self, table: str) -> int:
+        """Number of writes to ``table`` committed through this process"""
+        return self._write_counters.get(table, 0)
+
+    def data_version(self) -> int:
+        """PRAGMA data_version of the calling thread's connection.
+
+        It changes whenever another connection (in any process) commits to the
+        database, but not for commits made on this same connection.
+        """
+        return self.connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def ensure_schema(self, init_schema: Callable[[], None]) -> None:
+        """Run ``init_schema`` once per process for this database file"""
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                init_schema()
+                self._schema_ready = True
+
+    def close(self) -> None:
+        """Close every connection opened by this manager"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._schema_ready = False
+        self._local = threading.local()
+
+
+_managers: Dict[str, SQLiteConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path: str) -> SQLiteConnectionManager:
+    """Return the process-wide connection manager for a database file"""
+    key = os.path.abspath(db_path)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = SQLiteConnectionManager(key)
+            _managers[key] = manager
+        return manager
@@ -1,723 +1,1491 @@
+import hashlib
+import json
+import re
 import sqlite3
-from typing import Any, List, Optional, Dict, TYPE_CHECKING
+from typing import Any, Callable, Collection, Iterator, List, NamedTuple, Optional, Dict, Sequence, Tuple, Type, TypeVar, TYPE_CHECKING
 from contextlib import contextmanager
+from dataclasses import dataclass
 import os
+from .connection import get_connection_manager
+from .migrations import DEFAULT_PROJECT_ID, run_migrations, schema_version
+from . import workspace
+from pydantic import BaseModel
 from .models import ScriptScene, Shot, SceneAnalysis, VisualPlan, ShotImageSpec
 if TYPE_CHECKING:
     from .tools import SceneAnalysis, VisualPlan, ShotImageSpec, Shot
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Column lists read by the loaders, in the order the hydrators unpack them
+SCENE_COLUMNS = "scene_id, title, script_text, importance, description"
+ANALYSIS_COLUMNS = "scene_id, setting, mood, pacing, time_of_day"
+SHOT_COLUMNS = "scene_id, type, camera, description, duration, camera_movement, focus"
+PLAN_COLUMNS = "scene_id, lighting, atmosphere"
+SPEC_COLUMNS = (
+    "scene_id, shot_id, description, camera_type, camera_movement, camera_focus, "
+    "lighting, atmosphere, time_of_day"
+)
+
+# Upper bound on parameters per "IN (...)" lookup, below SQLite's variable limit
+IN_CLAUSE_CHUNK = 500
+
+# Parent rows fetched (with their children) per batch by the iter_* methods
+ITER_BATCH_SIZE = 200
+
+# Searchable kinds of row, with the FTS5 table and the columns search() returns:
+# {kind: (search table, key column, scene_id column, title column)}
+SEARCH_KINDS = {
+    "scene": ("scene_search", "scene_id", "scene_id", "title"),
+    "shot": ("shot_search", "shot_id", "scene_id", "description"),
+    "character": ("character_search", "normalized_name", "NULL", "name"),
+}
+
+# Script character fields stored per character, besides the name
+CHARACTER_FIELDS = ("description", "role", "traits")
+
+# Input fingerprint of a scene's shot specs: the hashes of its scene, analysis
+# and visual plan (NULL while none of them has one, see migration 7)
+SPEC_INPUT_HASH = (
+    "NULLIF(COALESCE(s.content_hash, '') || ':' || COALESCE(a.content_hash, '') || ':' "
+    "|| COALESCE(p.content_hash, ''), '::')"
+)
+
+# Per pipeline stage, the scenes it applies to with their current input hash
+# (selected as scene_id, input_hash) and the condition under which a scene's
+# stored output is stale: missing, or generated from different inputs
+STAGE_INPUTS = {
+    "scene_analyses": (
+        """
+        SELECT s.scene_id, s.content_hash FROM scenes s
+        LEFT JOIN scene_analyses a ON a.project_id = s.project_id AND a.scene_id = s.scene_id
+        WHERE s.project_id = ?
+        """,
+        "a.scene_id IS NULL OR a.input_hash IS NOT s.content_hash",
+    ),
+    "visual_plans": (
+        """
+        SELECT a.scene_id, a.content_hash FROM scene_analyses a
+        LEFT JOIN visual_plans p ON p.project_id = a.project_id AND p.scene_id = a.scene_id
+        WHERE a.project_id = ?
+        """,
+        "p.scene_id IS NULL OR p.input_hash IS NOT a.content_hash",
+    ),
+    "shot_image_specs": (
+        f"""
+        SELECT a.scene_id, {SPEC_INPUT_HASH} FROM scene_analyses a
+        JOIN scenes s ON s.project_id = a.project_id AND s.scene_id = a.scene_id
+        JOIN visual_plans p ON p.project_id = a.project_id AND p.scene_id = a.scene_id
+        WHERE a.project_id = ?
+        """,
+        f"""
+        (SELECT COUNT(*) FROM shots sh
+         WHERE sh.project_id = a.project_id AND sh.scene_id = a.scene_id)
+        != (SELECT COUNT(*) FROM shot_image_specs t
+            WHERE t.project_id = a.project_id AND t.scene_id = a.scene_id
+              AND t.input_hash IS {SPEC_INPUT_HASH})
+        """,
+    ),
+}
+
+# Characters a script may or may not write around or inside the same name
+_CHARACTER_NAME_PUNCTUATION = re.compile('["\u201c\u201d.]')
+
+
+def normalize_character_name(name: str) -> str:
+    """Key a script character is registered and looked up under.
+    
+    Case, runs of whitespace, periods and straight or curly double quotes
+    are ignored, so "Dr. Ada", “dr. ada” and "DR ADA" are the same character.
+    """
+    return " ".join(_CHARACTER_NAME_PUNCTUATION.sub("", name).lower().split())
+
+
+def content_hash(model: BaseModel) -> str:
+    """Fingerprint of a record's content, ignoring the scene_id it is stored under"""
+    encoded = json.dumps(model.model_dump(exclude={"scene_id"}), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class WriteStats:
+    """Number of rows a save call inserted, updated and deleted"""
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.deleted
+
+    def __add__(self, other: "WriteStats") -> "WriteStats":
+        return WriteStats(
+            self.inserted + other.inserted,
+            self.updated + other.updated,
+            self.deleted + other.deleted
+        )
+
+    def __str__(self) -> str:
+        return f"{self.inserted} inserted, {self.updated} updated, {self.deleted} deleted"
+
+
+def _construct(model: Type[ModelT], fields: Dict[str, Any]) -> ModelT:
+    """Same result as ``model.model_construct(**fields)`` when every field is given.
+    
+    ``model_construct`` resolves aliases and defaults field by field in Python,
+    which makes it slower than full validation; the loaders always pass every
+    field by name, so the instance state can be set directly.
+    """
+    if len(fields) != len(model.model_fields) or model.__pydantic_post_init__:
+        return model.model_construct(**fields)
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", fields)
+    object.__setattr__(instance, "__pydantic_fields_set__", set(fields))
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+    return instance
+
+
+class _ChildRows(NamedTuple):
+    """Desired rows of a child table, keyed by the parent id they belong to"""
+    table: str
+    columns: Tuple[str, ...]
+    rows: Dict[str, List[tuple]]
+    ordered: bool = True  # False for tables that behave as sets (unique per parent)
+
+
+class Change(NamedTuple):
+    """Net change to one tracked row since a change-log cursor"""
+    seq: int        # sequence number of the latest change-log entry for the row
+    table: str
+    key: str        # scene_id, or shot_id for shot_image_specs
+    operation: str  # "insert", "update" or "delete"
+
+
+def resume_cursor(changes: Sequence[Change], cursor: int, failed: Collection[str]) -> int:
+    """Cursor a consumer should save after handling ``changes``, read up to ``cursor``.
+
+    If the changes of any row in ``failed`` could not be handled, the cursor
+    stops just before the first of them, so they are read again next time.
+    """
+    failed_seqs = [change.seq for change in changes if change.key in failed]
+    return min(failed_seqs) - 1 if failed_seqs else cursor
+
+
+class SearchResult(NamedTuple):
+    """One full-text search hit, best matches first"""
+    kind: str              # "scene", "shot" or "character"
+    key: str               # scene_id, shot_id or normalized character name
+    scene_id: Optional[str]
+    title: str
+    snippet: str           # matching text with the hits in [brackets]
+    rank: float            # bm25 score; lower is a better match
+
+
 class StoryboardDBClient:
     """SQLite database client for storyboard pipeline data"""
     
-    def __init__(self, db_path: str = "data/storyboard/storyboard.db"):
-        """Initialize database client with path to SQLite database file"""
+    def __init__(self, db_path: Optional[str] = None,
+                 validate_rows: Optional[bool] = None, project_id: Optional[str] = None):
+        """Initialize database client with path to SQLite database file.
+        
+        Every read and write is scoped to ``project_id``, so several productions
+        can share one database; it defaults to the HITCHCOCK_PROJECT_ID
+        environment variable, then to the "default" project.
+        
+        ``validate_rows`` turns full pydantic validation of loaded rows back on
+        for debugging; it defaults to the HITCHCOCK_VALIDATE_DB_ROWS environment
+        variable and is off otherwise.
+
+        ``db_path`` defaults to the active run workspace's database.
+        """
+        if db_path is None:
+            db_path = os.path.join(workspace.storage_dir(), workspace.DB_FILENAME)
         self.db_path = db_path
+        self.project_id = project_id or os.getenv("HITCHCOCK_PROJECT_ID") or DEFAULT_PROJECT_ID
+        if validate_rows is None:
+            validate_rows = os.getenv("HITCHCOCK_VALIDATE_DB_ROWS", "").lower() in ("1", "true", "yes")
+        self.validate_rows = validate_rows
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self._init_db()
+        # Connections are shared by every client for the same file, and the
+        # schema is only checked the first time the file is opened in this process
+        self._connections = get_connection_manager(db_path)
+        self._connections.ensure_schema(self._init_db)
 
     @contextmanager
     def _get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # This enables column access by name
-        try:
+        """Context manager yielding this thread's connection inside a read transaction"""
+        with self._connections.transaction() as conn:
+            yield conn
+
+    @contextmanager
+    def _transaction(self):
+        """Context manager yielding this thread's connection inside a write transaction"""
+        with self._connections.transaction(immediate=True) as conn:
             yield conn
-        finally:
-            conn.close()
 
     def _init_db(self):
-        """Initialize database tables if they don't exist"""
+        """Initialize database tables if they don't exist and apply pending migrations"""
+        with self._transaction() as conn:
+            self._create_baseline_tables(conn.cursor())
+        run_migrations(self._connections.connection())
+
+    def schema_version(self) -> int:
+        """Return the schema version recorded in the database"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Create scenes table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS scenes (
-                    scene_id TEXT PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    script_text TEXT NOT NULL,
-                    importance TEXT NOT NULL,
-                    description TEXT NOT NULL
-                )
-            """)
-            
-            # Create scene_characters table (many-to-many relationship)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS scene_characters (
-                    scene_id TEXT,
-                    character_name TEXT,
-                    PRIMARY KEY (scene_id, character_name),
-                    FOREIGN KEY (scene_id) REFERENCES scenes(scene_id)
-                )
-            """)
-            
-            # Create scene_analyses table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS scene_analyses (
-                    scene_id TEXT PRIMARY KEY,
-                    setting TEXT NOT NULL,
-                    mood TEXT NOT NULL,
-                    pacing TEXT NOT NULL,
-                    time_of_day TEXT NOT NULL,
-                    FOREIGN KEY (scene_id) REFERENCES scenes(scene_id)
-                )
-            """)
-            
-            # Create key_moments table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS key_moments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    scene_id TEXT,
-                    moment TEXT NOT NULL,
-                    FOREIGN KEY (scene_id) REFERENCES scene_analyses(scene_id)
-                )
-            """)
-            
-            # Create shots table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS shots (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    scene_id TEXT,
-                    type TEXT NOT NULL,
-                    camera TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    duration TEXT NOT NULL,
-                    camera_movement TEXT,
-                    focus TEXT,
-                    FOREIGN KEY (scene_id) REFERENCES scene_analyses(scene_id)
-                )
-            """)
-            
-            # Create visual_plans table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS visual_plans (
-                    scene_id TEXT PRIMARY KEY,
-                    lighting TEXT NOT NULL,
-                    atmosphere TEXT NOT NULL,
-                    FOREIGN KEY (scene_id) REFERENCES scenes(scene_id)
-                )
-            """)
-            
-            # Create props table for visual plans
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS visual_plan_props (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    scene_id TEXT,
-                    prop TEXT NOT NULL,
-                    FOREIGN KEY (scene_id) REFERENCES visual_plans(scene_id)
-                )
-            """)
-            
-            # Create special effects table for visual plans
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS visual_plan_effects (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    scene_id TEXT,
-                    effect TEXT NOT NULL,
-                    FOREIGN KEY (scene_id) REFERENCES visual_plans(scene_id)
-                )
-            """)
-            
-            # Create shot_image_specs table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS shot_image_specs (
-                    scene_id TEXT,
-                    shot_id TEXT PRIMARY KEY,
-                    description TEXT NOT NULL,
-                    camera_type TEXT,
-                    camera_movement TEXT,
-                    camera_focus TEXT,
-                    lighting TEXT,
-                    atmosphere TEXT,
-                    time_of_day TEXT
-                )
-            """)
-            
-            # Create tables for shot image spec lists
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS shot_spec_props (
-                    shot_id TEXT,
-                    prop TEXT NOT NULL,
-                    FOREIGN KEY (shot_id) REFERENCES shot_image_specs(shot_id)
-                )
-            """)
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS shot_spec_effects (
-                    shot_id TEXT,
-                    effect TEXT NOT NULL,
-                    FOREIGN KEY (shot_id) REFERENCES shot_image_specs(shot_id)
-                )
-            """)
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS shot_spec_characters (
-                    shot_id TEXT,
-                    character_name TEXT NOT NULL,
-                    FOREIGN KEY (shot_id) REFERENCES shot_image_specs(shot_id)
-                )
-            """)
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS script_characters (
-                    character_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    traits TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            conn.commit()
+            return schema_version(conn)
+
+    @staticmethod
+    def _create_baseline_tables(cursor: sqlite3.Cursor) -> None:
+        """Create the original (version 0) tables; later changes live in migrations.py"""
+        # Create scenes table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scenes (
+                scene_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                script_text TEXT NOT NULL,
+                importance TEXT NOT NULL,
+                description TEXT NOT NULL
+            )
+        """)
+        
+        # Create scene_characters table (many-to-many relationship)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scene_characters (
+                scene_id TEXT,
+                character_name TEXT,
+                PRIMARY KEY (scene_id, character_name),
+                FOREIGN KEY (scene_id) REFERENCES scenes(scene_id)
+            )
+        """)
+        
+        # Create scene_analyses table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scene_analyses (
+                scene_id TEXT PRIMARY KEY,
+                setting TEXT NOT NULL,
+                mood TEXT NOT NULL,
+                pacing TEXT NOT NULL,
+                time_of_day TEXT NOT NULL,
+                FOREIGN KEY (scene_id) REFERENCES scenes(scene_id)
+            )
+        """)
+        
+        # Create key_moments table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS key_moments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scene_id TEXT,
+                moment TEXT NOT NULL,
+                FOREIGN KEY (scene_id) REFERENCES scene_analyses(scene_id)
+            )
+        """)
+        
+        # Create shots table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS shots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scene_id TEXT,
+                type TEXT NOT NULL,
+                camera TEXT NOT NULL,
+                description TEXT NOT NULL,
+                duration TEXT NOT NULL,
+                camera_movement TEXT,
+                focus TEXT,
+                FOREIGN KEY (scene_id) REFERENCES scene_analyses(scene_id)
+            )
+        """)
+        
+        # Create visual_plans table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS visual_plans (
+                scene_id TEXT PRIMARY KEY,
+                lighting TEXT NOT NULL,
+                atmosphere TEXT NOT NULL,
+                FOREIGN KEY (scene_id) REFERENCES scenes(scene_id)
+            )
+        """)
+        
+        # Create props table for visual plans
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS visual_plan_props (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scene_id TEXT,
+                prop TEXT NOT NULL,
+                FOREIGN KEY (scene_id) REFERENCES visual_plans(scene_id)
+            )
+        """)
+        
+        # Create special effects table for visual plans
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS visual_plan_effects (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scene_id TEXT,
+                effect TEXT NOT NULL,
+                FOREIGN KEY (scene_id) REFERENCES visual_plans(scene_id)
+            )
+        """)
+        
+        # Create shot_image_specs table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS shot_image_specs (
+                scene_id TEXT,
+                shot_id TEXT PRIMARY KEY,
+                description TEXT NOT NULL,
+                camera_type TEXT,
+                camera_movement TEXT,
+                camera_focus TEXT,
+                lighting TEXT,
+                atmosphere TEXT,
+                time_of_day TEXT
+            )
+        """)
+        
+        # Create tables for shot image spec lists
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS shot_spec_props (
+                shot_id TEXT,
+                prop TEXT NOT NULL,
+                FOREIGN KEY (shot_id) REFERENCES shot_image_specs(shot_id)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS shot_spec_effects (
+                shot_id TEXT,
+                effect TEXT NOT NULL,
+                FOREIGN KEY (shot_id) REFERENCES shot_image_specs(shot_id)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS shot_spec_characters (
+                shot_id TEXT,
+                character_name TEXT NOT NULL,
+                FOREIGN KEY (shot_id) REFERENCES shot_image_specs(shot_id)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS script_characters (
+                character_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                description TEXT NOT NULL,
+                role TEXT NOT NULL,
+                traits TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
 
-    def save_scenes(self, scenes: List["ScriptScene"]) -> None:
+    def save_scenes(self, scenes: List["ScriptScene"]) -> WriteStats:
         """Save scene data to database"""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            for scene in scenes:
-                # Insert scene data
-                cursor.execute("""
-                    INSERT OR REPLACE INTO scenes (scene_id, title, script_text, importance, description)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (scene.scene_id, scene.title, scene.script_text, scene.importance, scene.description))
-                
-                # Delete existing character associations
-                cursor.execute("DELETE FROM scene_characters WHERE scene_id = ?", (scene.scene_id,))
-                
-                # Insert character associations
-                for character in scene.characters:
-                    cursor.execute("""
-                        INSERT INTO scene_characters (scene_id, character_name)
-                        VALUES (?, ?)
-                    """, (scene.scene_id, character))
-            
-            conn.commit()
+        parents = {
+            scene.scene_id: (
+                scene.title, scene.script_text, scene.importance, scene.description,
+                # Characters are stored as a set, so their order is not content
+                content_hash(scene.model_copy(update={"characters": sorted(set(scene.characters))}))
+            )
+            for scene in scenes
+        }
+        characters = _ChildRows(
+            "scene_characters", ("character_name",),
+            {scene.scene_id: [(c,) for c in dict.fromkeys(scene.characters)] for scene in scenes},
+            ordered=False
+        )
+        with self._transaction() as conn:
+            stats = self._bulk_upsert(
+                conn.cursor(), "scenes", "scene_id",
+                ("title", "script_text", "importance", "description", "content_hash"),
+                parents, [characters]
+            )
+        return self._record_write(stats, "scenes")
 
     def load_scenes(self) -> List["ScriptScene"]:
         """Load scene data from database"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM scenes")
-            scenes = []
-            
-            for row in cursor.fetchall():
-                # Get characters for this scene
-                cursor.execute("""
-                    SELECT character_name FROM scene_characters 
-                    WHERE scene_id = ?
-                """, (row['scene_id'],))
-                characters = [r['character_name'] for r in cursor.fetchall()]
-                
-                scene = ScriptScene(
-                    scene_id=row['scene_id'],
-                    title=row['title'],
-                    script_text=row['script_text'],
-                    importance=row['importance'],
-                    characters=characters,
-                    description=row['description']
-                )
-                scenes.append(scene)
-            
-            return scenes
+            cursor = self._read_cursor(conn)
+            cursor.execute(f"SELECT {SCENE_COLUMNS} FROM scenes WHERE project_id = ?", (self.project_id,))
+            return self._hydrate_scenes(cursor, cursor.fetchall())
 
-    def save_scene_analyses(self, analyses: List["SceneAnalysis"]) -> None:
-        """Save scene analyses to database"""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            for analysis in analyses:
-                # Insert analysis data
-                cursor.execute("""
-                    INSERT OR REPLACE INTO scene_analyses 
-                    (scene_id, setting, mood, pacing, time_of_day)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (analysis.scene_id, analysis.setting, analysis.mood, 
-                     analysis.pacing, analysis.time_of_day))
-                
-                # Delete existing key moments
-                cursor.execute("DELETE FROM key_moments WHERE scene_id = ?", 
-                             (analysis.scene_id,))
-                
-                # Insert key moments
-                for moment in analysis.key_moments:
-                    cursor.execute("""
-                        INSERT INTO key_moments (scene_id, moment)
-                        VALUES (?, ?)
-                    """, (analysis.scene_id, moment))
-                
-                # Delete existing shots
-                cursor.execute("DELETE FROM shots WHERE scene_id = ?", 
-                             (analysis.scene_id,))
-                
-                # Insert shots
-                for shot in analysis.shots:
-                    cursor.execute("""
-                        INSERT INTO shots 
-                        (scene_id, type, camera, description, duration, 
-                         camera_movement, focus)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (analysis.scene_id, shot.type, shot.camera, 
-                         shot.description, shot.duration, shot.camera_movement,
-                         shot.focus))
-            
-            conn.commit()
+    def save_scene_analyses(self, analyses: List["SceneAnalysis"],
+                            input_hashes: Optional[Dict[str, Optional[str]]] = None) -> WriteStats:
+        """Save scene analyses to database.
+        
+        ``input_hashes`` maps scene ids to the content hash of the scene each
+        analysis was made from (see ``stage_inputs``); analyses saved without
+        one are treated as stale once their scene has a hash.
+        """
+        input_hashes = input_hashes or {}
+        parents = {
+            analysis.scene_id: (
+                analysis.setting, analysis.mood, analysis.pacing, analysis.time_of_day,
+                content_hash(analysis), input_hashes.get(analysis.scene_id)
+            )
+            for analysis in analyses
+        }
+        key_moments = _ChildRows(
+            "key_moments", ("moment",),
+            {analysis.scene_id: [(moment,) for moment in analysis.key_moments] for analysis in analyses}
+        )
+        shots = _ChildRows(
+            "shots", ("type", "camera", "description", "duration", "camera_movement", "focus"),
+            {
+                analysis.scene_id: [
+                    (shot.type, shot.camera, shot.description, shot.duration,
+                     shot.camera_movement, shot.focus)
+                    for shot in analysis.shots
+                ]
+                for analysis in analyses
+            }
+        )
+        with self._transaction() as conn:
+            stats = self._bulk_upsert(
+                conn.cursor(), "scene_analyses", "scene_id",
+                ("setting", "mood", "pacing", "time_of_day", "content_hash", "input_hash"),
+                parents, [key_moments, shots]
+            )
+        return self._record_write(stats, "scene_analyses")
 
     def load_scene_analyses(self) -> List["SceneAnalysis"]:
         """Load scene analyses from database"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM scene_analyses")
-            analyses = []
-            
-            for row in cursor.fetchall():
-                scene_id = row['scene_id']
-                
-                # Get key moments
-                cursor.execute("""
-                    SELECT moment FROM key_moments 
-                    WHERE scene_id = ?
-                """, (scene_id,))
-                key_moments = [r['moment'] for r in cursor.fetchall()]
-                
-                # Get shots
-                cursor.execute("""
-                    SELECT * FROM shots 
-                    WHERE scene_id = ?
-                """, (scene_id,))
-                shots = []
-                for shot_row in cursor.fetchall():
-                    shot = Shot(
-                        type=shot_row['type'],
-                        camera=shot_row['camera'],
-                        description=shot_row['description'],
-                        duration=shot_row['duration'],
-                        camera_movement=shot_row['camera_movement'],
-                        focus=shot_row['focus']
-                    )
-                    shots.append(shot)
-                
-                analysis = SceneAnalysis(
-                    scene_id=scene_id,
-                    key_moments=key_moments,
-                    shots=shots,
-                    setting=row['setting'],
-                    mood=row['mood'],
-                    pacing=row['pacing'],
-                    time_of_day=row['time_of_day']
-                )
-                analyses.append(analysis)
-            
-            return analyses
+            cursor = self._read_cursor(conn)
+            cursor.execute(f"SELECT {ANALYSIS_COLUMNS} FROM scene_analyses WHERE project_id = ?", (self.project_id,))
+            return self._hydrate_scene_analyses(cursor, cursor.fetchall())
 
-    def save_visual_plans(self, plans: List["VisualPlan"]) -> None:
-        """Save visual plans to database"""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            for plan in plans:
-                # Insert plan data
-                cursor.execute("""
-                    INSERT OR REPLACE INTO visual_plans 
-                    (scene_id, lighting, atmosphere)
-                    VALUES (?, ?, ?)
-                """, (plan.scene_id, plan.lighting, plan.atmosphere))
-                
-                # Delete existing props
-                cursor.execute("""
-                    DELETE FROM visual_plan_props 
-                    WHERE scene_id = ?
-                """, (plan.scene_id,))
-                
-                # Insert props
-                for prop in plan.props:
-                    cursor.execute("""
-                        INSERT INTO visual_plan_props (scene_id, prop)
-                        VALUES (?, ?)
-                    """, (plan.scene_id, prop))
-                
-                # Delete existing effects
-                cursor.execute("""
-                    DELETE FROM visual_plan_effects 
-                    WHERE scene_id = ?
-                """, (plan.scene_id,))
-                
-                # Insert effects
-                for effect in plan.special_effects:
-                    cursor.execute("""
-                        INSERT INTO visual_plan_effects (scene_id, effect)
-                        VALUES (?, ?)
-                    """, (plan.scene_id, effect))
-            
-            conn.commit()
+    def save_visual_plans(self, plans: List["VisualPlan"],
+                          input_hashes: Optional[Dict[str, Optional[str]]] = None) -> WriteStats:
+        """Save visual plans to database.
+        
+        ``input_hashes`` maps scene ids to the content hash of the analysis
+        each plan was made from, as for ``save_scene_analyses``.
+        """
+        input_hashes = input_hashes or {}
+        parents = {
+            plan.scene_id: (
+                plan.lighting, plan.atmosphere, content_hash(plan), input_hashes.get(plan.scene_id)
+            )
+            for plan in plans
+        }
+        props = _ChildRows(
+            "visual_plan_props", ("prop",),
+            {plan.scene_id: [(prop,) for prop in plan.props] for plan in plans}
+        )
+        effects = _ChildRows(
+            "visual_plan_effects", ("effect",),
+            {plan.scene_id: [(effect,) for effect in plan.special_effects] for plan in plans}
+        )
+        with self._transaction() as conn:
+            stats = self._bulk_upsert(
+                conn.cursor(), "visual_plans", "scene_id",
+                ("lighting", "atmosphere", "content_hash", "input_hash"),
+                parents, [props, effects]
+            )
+        return self._record_write(stats, "visual_plans")
+
+    def save_analyses_and_plans(self, analyses: List["SceneAnalysis"], plans: List["VisualPlan"],
+                                input_hashes: Optional[Dict[str, Optional[str]]] = None) -> WriteStats:
+        """Save scene analyses and the visual plans made with them in one transaction.
+        
+        ``input_hashes`` are the scene hashes for the analyses; each plan is
+        recorded as made from its scene's analysis in ``analyses``.
+        """
+        plan_inputs = {analysis.scene_id: content_hash(analysis) for analysis in analyses}
+        # The save calls join this transaction, so either both are written or neither
+        with self._transaction():
+            return (self.save_scene_analyses(analyses, input_hashes)
+                    + self.save_visual_plans(plans, plan_inputs))
 
     def load_visual_plans(self) -> List["VisualPlan"]:
         """Load visual plans from database"""
         with self._get_connection() as conn:
+            cursor = self._read_cursor(conn)
+            cursor.execute(f"SELECT {PLAN_COLUMNS} FROM visual_plans WHERE project_id = ?", (self.project_id,))
+            return self._hydrate_visual_plans(cursor, cursor.fetchall())
+
+    def save_shot_image_specs(self, specs: List["ShotImageSpec"]) -> WriteStats:
+        """Save shot image specifications to database"""
+        parents = {
+            spec.shot_id: (
+                spec.scene_id, spec.description,
+                spec.camera_specs.get('type'),
+                spec.camera_specs.get('movement'),
+                spec.camera_specs.get('focus'),
+                spec.visual_elements.get('lighting'),
+                spec.visual_elements.get('atmosphere'),
+                spec.visual_elements.get('time_of_day')
+            )
+            for spec in specs
+        }
+        props = _ChildRows(
+            "shot_spec_props", ("prop",),
+            {spec.shot_id: [(prop,) for prop in spec.props] for spec in specs}
+        )
+        effects = _ChildRows(
+            "shot_spec_effects", ("effect",),
+            {spec.shot_id: [(effect,) for effect in spec.special_effects] for spec in specs}
+        )
+        characters = _ChildRows(
+            "shot_spec_characters", ("character_name",),
+            {spec.shot_id: [(character,) for character in spec.characters] for spec in specs}
+        )
+        with self._transaction() as conn:
+            stats = self._bulk_upsert(
+                conn.cursor(), "shot_image_specs", "shot_id",
+                ("scene_id", "description", "camera_type", "camera_movement",
+                 "camera_focus", "lighting", "atmosphere", "time_of_day"),
+                parents, [props, effects, characters]
+            )
+        return self._record_write(stats, "shot_image_specs")
+
+    def derive_shot_image_specs(self, scene_ids: Optional[Sequence[str]] = None) -> WriteStats:
+        """Build and save a shot image spec for every analyzed shot, inside the database.
+
+        Same result as building the specs in Python from the loaded scenes,
+        analyses and visual plans and passing them to ``save_shot_image_specs``:
+        each scene with both an analysis and a visual plan gets one spec per
+        shot, ``<scene_id>_shot_<n>``, with the plan's props and effects and the
+        scene's characters. The join and the row diff run as a few set-based
+        statements in one transaction, so only changed rows are written.
+        
+        ``scene_ids`` limits the work to those scenes, e.g. the stale ones from
+        ``stage_inputs("shot_image_specs")``. Each spec records the hashes of
+        the records it was built from in ``input_hash``.
+        """
+        project = (self.project_id,)
+        if scene_ids is not None and not scene_ids:
+            return WriteStats()
+        with self._transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM visual_plans")
-            plans = []
-            
-            for row in cursor.fetchall():
-                scene_id = row['scene_id']
-                
-                # Get props
-                cursor.execute("""
-                    SELECT prop FROM visual_plan_props 
-                    WHERE scene_id = ?
-                """, (scene_id,))
-                props = [r['prop'] for r in cursor.fetchall()]
-                
-                # Get effects
-                cursor.execute("""
-                    SELECT effect FROM visual_plan_effects 
-                    WHERE scene_id = ?
-                """, (scene_id,))
-                effects = [r['effect'] for r in cursor.fetchall()]
-                
-                plan = VisualPlan(
-                    scene_id=scene_id,
-                    lighting=row['lighting'],
-                    props=props,
-                    atmosphere=row['atmosphere'],
-                    special_effects=effects
+            scene_filter = ""
+            if scene_ids is not None:
+                cursor.execute("DROP TABLE IF EXISTS temp.spec_scenes")
+                cursor.execute("CREATE TEMP TABLE spec_scenes (scene_id TEXT PRIMARY KEY)")
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO spec_scenes VALUES (?)", [(scene_id,) for scene_id in scene_ids]
                 )
-                plans.append(plan)
-            
-            return plans
+                scene_filter = "AND a.scene_id IN (SELECT scene_id FROM spec_scenes)"
+            cursor.execute("DROP TABLE IF EXISTS temp.spec_source")
+            cursor.execute("""
+                CREATE TEMP TABLE spec_source (
+                    shot_id TEXT PRIMARY KEY,
+                    scene_id TEXT, description TEXT, camera_type TEXT, camera_movement TEXT,
+                    camera_focus TEXT, lighting TEXT, atmosphere TEXT, time_of_day TEXT, input_hash TEXT
+                )
+            """)
+            cursor.execute(f"""
+                INSERT INTO spec_source
+                SELECT a.scene_id || '_shot_' || ROW_NUMBER() OVER (PARTITION BY a.scene_id ORDER BY sh.id),
+                       a.scene_id, 'Scene: ' || s.description || char(10) || 'Shot: ' || sh.description,
+                       sh.camera, sh.camera_movement, sh.focus, p.lighting, p.atmosphere, a.time_of_day,
+                       {SPEC_INPUT_HASH}
+                FROM scene_analyses a
+                JOIN scenes s ON s.project_id = a.project_id AND s.scene_id = a.scene_id
+                JOIN visual_plans p ON p.project_id = a.project_id AND p.scene_id = a.scene_id
+                JOIN shots sh ON sh.project_id = a.project_id AND sh.scene_id = a.scene_id
+                WHERE a.project_id = ? {scene_filter}
+                ORDER BY a.scene_id, sh.id
+            """, project)
 
-    def save_shot_image_specs(self, specs: List["ShotImageSpec"]) -> None:
-        """Save shot image specifications to database"""
+            stats = WriteStats()
+            columns = SPEC_COLUMNS.replace("shot_id, ", "").split(", ")
+            stats.updated += cursor.execute(f"""
+                UPDATE shot_image_specs
+                SET {', '.join(f'{c} = src.{c}' for c in columns + ['input_hash'])}
+                FROM spec_source AS src
+                WHERE shot_image_specs.project_id = ? AND shot_image_specs.shot_id = src.shot_id
+                  AND ({' OR '.join(f'shot_image_specs.{c} IS NOT src.{c}' for c in columns)})
+            """, project).rowcount
+            # Specs whose inputs changed but still come out the same only get
+            # their new input hash, which is bookkeeping rather than a change
+            cursor.execute("""
+                UPDATE shot_image_specs SET input_hash = src.input_hash
+                FROM spec_source AS src
+                WHERE shot_image_specs.project_id = ? AND shot_image_specs.shot_id = src.shot_id
+                  AND shot_image_specs.input_hash IS NOT src.input_hash
+            """, project)
+            stats.inserted += cursor.execute(f"""
+                INSERT INTO shot_image_specs (project_id, {SPEC_COLUMNS}, input_hash)
+                SELECT ?, {SPEC_COLUMNS}, input_hash FROM spec_source AS src
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM shot_image_specs
+                    WHERE project_id = ? AND shot_id = src.shot_id
+                )
+                ORDER BY src.rowid
+            """, project * 2).rowcount
+
+            for child, column, source, order in (
+                ("shot_spec_props", "prop", "visual_plan_props", "id"),
+                ("shot_spec_effects", "effect", "visual_plan_effects", "id"),
+                ("shot_spec_characters", "character_name", "scene_characters", "rowid"),
+            ):
+                stats += self._diff_spec_children(cursor, child, column, source, order)
+            cursor.execute("DROP TABLE temp.spec_source")
+            cursor.execute("DROP TABLE IF EXISTS temp.spec_scenes")
+        return self._record_write(stats, "shot_image_specs")
+
+    def _diff_spec_children(self, cursor: sqlite3.Cursor, child: str, column: str,
+                            source: str, order: str) -> WriteStats:
+        """Sync one shot spec child table with its scene-level source, position by position.
+
+        The set-based counterpart of ``_bulk_upsert``'s ordered child diff, for
+        the specs in ``temp.spec_source``: rows keep their rowid where the
+        value at their position is unchanged. Every shot of a scene gets the
+        same list, so the desired rows are numbered once per scene.
+        """
+        project = (self.project_id,)
+        cursor.execute("DROP TABLE IF EXISTS temp.child_desired")
+        cursor.execute("DROP TABLE IF EXISTS temp.child_current")
+        cursor.execute(
+            "CREATE TEMP TABLE child_desired (scene_id TEXT, position INTEGER, value TEXT, "
+            "PRIMARY KEY (scene_id, position))"
+        )
+        cursor.execute(
+            "CREATE TEMP TABLE child_current (child_rowid INTEGER, shot_id TEXT, scene_id TEXT, "
+            "position INTEGER, value TEXT, PRIMARY KEY (shot_id, position))"
+        )
+        cursor.execute(f"""
+            INSERT INTO child_desired
+            SELECT c.scene_id, ROW_NUMBER() OVER (PARTITION BY c.scene_id ORDER BY c.{order}), c.{column}
+            FROM {source} c
+            WHERE c.project_id = ? AND c.{column} IS NOT NULL
+              AND c.scene_id IN (SELECT scene_id FROM spec_source)
+        """, project)
+        cursor.execute(f"""
+            INSERT INTO child_current
+            SELECT c.rowid, c.shot_id, src.scene_id,
+                   ROW_NUMBER() OVER (PARTITION BY c.shot_id ORDER BY c.rowid), c.{column}
+            FROM spec_source AS src
+            JOIN {child} c ON c.project_id = ? AND c.shot_id = src.shot_id
+        """, project)
+
+        stats = WriteStats()
+        stats.deleted += cursor.execute(f"""
+            DELETE FROM {child} WHERE rowid IN (
+                SELECT cur.child_rowid FROM child_current cur
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM child_desired d
+                    WHERE d.scene_id = cur.scene_id AND d.position = cur.position
+                )
+            )
+        """).rowcount
+        stats.updated += cursor.execute(f"""
+            UPDATE {child} SET {column} = d.value
+            FROM child_current cur
+            JOIN child_desired d ON d.scene_id = cur.scene_id AND d.position = cur.position
+            WHERE {child}.rowid = cur.child_rowid AND cur.value IS NOT d.value
+        """).rowcount
+        stats.inserted += cursor.execute(f"""
+            INSERT INTO {child} (project_id, shot_id, {column})
+            SELECT ?, src.shot_id, d.value
+            FROM spec_source AS src
+            JOIN child_desired d ON d.scene_id = src.scene_id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM child_current cur
+                WHERE cur.shot_id = src.shot_id AND cur.position = d.position
+            )
+            ORDER BY src.shot_id, d.position
+        """, project).rowcount
+        cursor.execute("DROP TABLE temp.child_desired")
+        cursor.execute("DROP TABLE temp.child_current")
+        return stats
+
+    def stage_inputs(self, stage: str, only_stale: bool = True) -> Dict[str, Optional[str]]:
+        """Scenes a pipeline stage would (re)generate, with their current input hash.
+        
+        ``stage`` is the table the stage writes: "scene_analyses",
+        "visual_plans" or "shot_image_specs". A scene is stale when its
+        output is missing or was generated from inputs whose hash has since
+        changed; ``only_stale=False`` returns every scene the stage applies to.
+        Pass the hashes back to the save call so the next run can skip them.
+        """
+        if stage not in STAGE_INPUTS:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        sql, stale = STAGE_INPUTS[stage]
+        if only_stale:
+            sql += f" AND ({stale})"
         with self._get_connection() as conn:
+            rows = conn.execute(sql + " ORDER BY 1", (self.project_id,)).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def _record_write(self, stats: WriteStats, *tables: str) -> WriteStats:
+        """Bump the change counters of ``tables`` if a committed write touched any rows"""
+        if stats.total:
+            self._connections.record_write(*tables)
+        return stats
+
+    def change_token(self, table: str) -> Tuple[int, int, int]:
+        """Cheap token that differs whenever ``table`` may have changed.
+        
+        Combines this process's write counter for the table with the calling
+        thread's connection and its PRAGMA data_version, which catches commits
+        from other connections and processes.
+        """
+        conn = self._connections.connection()
+        return (self._connections.write_counter(table), id(conn), self._connections.data_version())
+
+    def delete_scenes(self, scene_ids: List[str]) -> WriteStats:
+        """Delete scenes and everything generated from them.
+        
+        Characters, analyses (with key moments and shots), visual plans (with
+        props and effects) and rendered assets go through ON DELETE CASCADE;
+        shot image specs are linked to scenes by value only, so they are
+        deleted explicitly and their child rows cascade.
+        """
+        with self._transaction() as conn:
             cursor = conn.cursor()
-            for spec in specs:
-                # Insert spec data
-                cursor.execute("""
-                    INSERT OR REPLACE INTO shot_image_specs
-                    (scene_id, shot_id, description, camera_type, camera_movement,
-                     camera_focus, lighting, atmosphere, time_of_day)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (spec.scene_id, spec.shot_id, spec.description,
-                     spec.camera_specs.get('type'), 
-                     spec.camera_specs.get('movement'),
-                     spec.camera_specs.get('focus'),
-                     spec.visual_elements.get('lighting'),
-                     spec.visual_elements.get('atmosphere'),
-                     spec.visual_elements.get('time_of_day')))
-                
-                # Handle props
-                cursor.execute("DELETE FROM shot_spec_props WHERE shot_id = ?", 
-                             (spec.shot_id,))
-                for prop in spec.props:
-                    cursor.execute("""
-                        INSERT INTO shot_spec_props (shot_id, prop)
-                        VALUES (?, ?)
-                    """, (spec.shot_id, prop))
-                
-                # Handle effects
-                cursor.execute("DELETE FROM shot_spec_effects WHERE shot_id = ?", 
-                             (spec.shot_id,))
-                for effect in spec.special_effects:
-                    cursor.execute("""
-                        INSERT INTO shot_spec_effects (shot_id, effect)
-                        VALUES (?, ?)
-                    """, (spec.shot_id, effect))
-                
-                # Handle characters
-                cursor.execute("""
-                    DELETE FROM shot_spec_characters 
-                    WHERE shot_id = ?
-                """, (spec.shot_id,))
-                for character in spec.characters:
-                    cursor.execute("""
-                        INSERT INTO shot_spec_characters 
-                        (shot_id, character_name)
-                        VALUES (?, ?)
-                    """, (spec.shot_id, character))
+            before = conn.total_changes
+            for table in ("shot_image_specs", "visual_plans", "scene_analyses", "scenes"):
+                for i in range(0, len(scene_ids), IN_CLAUSE_CHUNK):
+                    chunk = scene_ids[i:i + IN_CLAUSE_CHUNK]
+                    cursor.execute(
+                        f"DELETE FROM {table} "
+                        f"WHERE project_id = ? AND scene_id IN ({', '.join('?' * len(chunk))})",
+                        [self.project_id] + chunk
+                    )
+            stats = WriteStats(deleted=conn.total_changes - before)
+        return self._record_write(
+            stats, "shot_image_specs", "visual_plans", "scene_analyses", "scenes", "rendered_assets"
+        )
+
+    @staticmethod
+    def _select_in(cursor: sqlite3.Cursor, sql: str, keys: Sequence[str],
+                   params: tuple = ()) -> List[sqlite3.Row]:
+        """Run ``sql`` (containing one ``IN ({})`` placeholder) over ``keys`` in chunks.
+        
+        ``params`` are bound ahead of each chunk of keys.
+        """
+        rows: List[sqlite3.Row] = []
+        for i in range(0, len(keys), IN_CLAUSE_CHUNK):
+            chunk = keys[i:i + IN_CLAUSE_CHUNK]
+            cursor.execute(sql.format(", ".join("?" * len(chunk))), params + tuple(chunk))
+            rows.extend(cursor.fetchall())
+        return rows
+
+    def _bulk_upsert(self, cursor: sqlite3.Cursor, table: str, key_column: str,
+                     columns: Tuple[str, ...], parents: Dict[str, tuple],
+                     children: List[_ChildRows]) -> WriteStats:
+        """Write parent rows and their child lists, touching only rows that changed.
+        
+        Existing rows are read back once per table and diffed in Python; the
+        resulting inserts, updates and deletes are then applied with
+        ``executemany``. Ordered child lists are compared position by position
+        so that unchanged entries keep their rowid (and therefore their order).
+        Rows are written to this client's project. Must be called inside a
+        write transaction.
+        """
+        stats = WriteStats()
+        keys = list(parents)
+        if not keys:
+            return stats
+        project = (self.project_id,)
+        
+        # Parent rows
+        existing = {
+            row[0]: tuple(row[1:])
+            for row in self._select_in(
+                cursor,
+                f"SELECT {key_column}, {', '.join(columns)} FROM {table} "
+                f"WHERE project_id = ? AND {key_column} IN ({{}})",
+                keys, project
+            )
+        }
+        inserts = [project + (key,) + values for key, values in parents.items() if key not in existing]
+        updates = [
+            values + project + (key,) for key, values in parents.items()
+            if key in existing and existing[key] != values
+        ]
+        if inserts:
+            cursor.executemany(
+                f"INSERT INTO {table} (project_id, {key_column}, {', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * (len(columns) + 2))})",
+                inserts
+            )
+        if updates:
+            cursor.executemany(
+                f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in columns)} "
+                f"WHERE project_id = ? AND {key_column} = ?",
+                updates
+            )
+        stats.inserted += len(inserts)
+        stats.updated += len(updates)
+        
+        # Child rows
+        for child in children:
+            current: Dict[str, List[Tuple[int, tuple]]] = {}
+            for row in self._select_in(
+                cursor,
+                f"SELECT rowid, {key_column}, {', '.join(child.columns)} FROM {child.table} "
+                f"WHERE project_id = ? AND {key_column} IN ({{}}) ORDER BY rowid",
+                keys, project
+            ):
+                current.setdefault(row[1], []).append((row[0], tuple(row[2:])))
+            
+            child_inserts: List[tuple] = []
+            child_updates: List[tuple] = []
+            child_deletes: List[tuple] = []
+            for key in keys:
+                old = current.get(key, [])
+                new = child.rows.get(key, [])
+                if child.ordered:
+                    for i in range(max(len(old), len(new))):
+                        if i >= len(new):
+                            child_deletes.append((old[i][0],))
+                        elif i >= len(old):
+                            child_inserts.append(project + (key,) + new[i])
+                        elif old[i][1] != new[i]:
+                            child_updates.append(new[i] + (old[i][0],))
+                else:
+                    old_values = {values: rowid for rowid, values in old}
+                    new_values = set(new)
+                    child_deletes.extend(
+                        (rowid,) for values, rowid in old_values.items() if values not in new_values
+                    )
+                    child_inserts.extend(
+                        project + (key,) + values for values in new if values not in old_values
+                    )
             
-            conn.commit()
+            if child_deletes:
+                cursor.executemany(f"DELETE FROM {child.table} WHERE rowid = ?", child_deletes)
+            if child_updates:
+                cursor.executemany(
+                    f"UPDATE {child.table} SET {', '.join(f'{c} = ?' for c in child.columns)} "
+                    f"WHERE rowid = ?",
+                    child_updates
+                )
+            if child_inserts:
+                cursor.executemany(
+                    f"INSERT INTO {child.table} (project_id, {key_column}, {', '.join(child.columns)}) "
+                    f"VALUES ({', '.join('?' * (len(child.columns) + 2))})",
+                    child_inserts
+                )
+            stats.inserted += len(child_inserts)
+            stats.updated += len(child_updates)
+            stats.deleted += len(child_deletes)
+        
+        return stats
 
     def load_shot_image_specs(self) -> List["ShotImageSpec"]:
         """Load shot image specifications from database"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM shot_image_specs")
-            specs = []
-            
-            for row in cursor.fetchall():
-                shot_id = row['shot_id']
-                
-                # Get props
-                cursor.execute("""
-                    SELECT prop FROM shot_spec_props 
-                    WHERE shot_id = ?
-                """, (shot_id,))
-                props = [r['prop'] for r in cursor.fetchall()]
-                
-                # Get effects
-                cursor.execute("""
-                    SELECT effect FROM shot_spec_effects 
-                    WHERE shot_id = ?
-                """, (shot_id,))
-                effects = [r['effect'] for r in cursor.fetchall()]
-                
-                # Get characters
-                cursor.execute("""
-                    SELECT character_name FROM shot_spec_characters 
-                    WHERE shot_id = ?
-                """, (shot_id,))
-                characters = [r['character_name'] for r in cursor.fetchall()]
-                
-                spec = ShotImageSpec(
-                    scene_id=row['scene_id'],
-                    shot_id=shot_id,
-                    description=row['description'],
-                    camera_specs={
-                        'type': row['camera_type'],
-                        'movement': row['camera_movement'],
-                        'focus': row['camera_focus']
-                    },
-                    visual_elements={
-                        'lighting': row['lighting'],
-                        'atmosphere': row['atmosphere'],
-                        'time_of_day': row['time_of_day']
-                    },
-                    props=props,
-                    special_effects=effects,
-                    characters=characters
+            cursor = self._read_cursor(conn)
+            cursor.execute(f"SELECT {SPEC_COLUMNS} FROM shot_image_specs WHERE project_id = ?", (self.project_id,))
+            return self._hydrate_shot_image_specs(cursor, cursor.fetchall())
+
+    def iter_scenes(self, batch_size: int = ITER_BATCH_SIZE) -> Iterator["ScriptScene"]:
+        """Stream the project's scenes in scene ID order (see ``_iter_batches``)"""
+        return self._iter_batches("scenes", SCENE_COLUMNS, "scene_id", 0, self._hydrate_scenes, batch_size)
+
+    def iter_scene_analyses(self, batch_size: int = ITER_BATCH_SIZE) -> Iterator["SceneAnalysis"]:
+        """Stream the project's scene analyses in scene ID order (see ``_iter_batches``)"""
+        return self._iter_batches(
+            "scene_analyses", ANALYSIS_COLUMNS, "scene_id", 0, self._hydrate_scene_analyses, batch_size
+        )
+
+    def iter_visual_plans(self, batch_size: int = ITER_BATCH_SIZE) -> Iterator["VisualPlan"]:
+        """Stream the project's visual plans in scene ID order (see ``_iter_batches``)"""
+        return self._iter_batches(
+            "visual_plans", PLAN_COLUMNS, "scene_id", 0, self._hydrate_visual_plans, batch_size
+        )
+
+    def iter_shot_image_specs(self, batch_size: int = ITER_BATCH_SIZE) -> Iterator["ShotImageSpec"]:
+        """Stream the project's shot image specifications in shot ID order (see ``_iter_batches``)"""
+        return self._iter_batches(
+            "shot_image_specs", SPEC_COLUMNS, "shot_id", 1, self._hydrate_shot_image_specs, batch_size
+        )
+
+    def _iter_batches(self, table: str, columns: str, key_column: str, key_index: int,
+                      hydrate: Callable[..., List[ModelT]], batch_size: int) -> Iterator[ModelT]:
+        """Yield models from ``table`` ``batch_size`` parents at a time, in key order.
+        
+        Each batch is read in its own short transaction, resuming after the
+        last key of the previous one, and only that batch (with its child
+        rows, selected by key range) is held in memory. Memory therefore stays
+        flat however large the project is, and no transaction stays open while
+        the caller processes models. Rows written while iterating are picked
+        up if their key sorts after the current position.
+        """
+        last = None
+        while True:
+            condition = "" if last is None else f"AND {key_column} > ?"
+            params: tuple = () if last is None else (last,)
+            with self._get_connection() as conn:
+                cursor = self._read_cursor(conn)
+                cursor.execute(f"""
+                    SELECT {columns} FROM {table}
+                    WHERE project_id = ? {condition}
+                    ORDER BY {key_column}
+                    LIMIT ?
+                """, (self.project_id,) + params + (batch_size,))
+                rows = cursor.fetchall()
+                if not rows:
+                    return
+                first, last = rows[0][key_index], rows[-1][key_index]
+                models = hydrate(
+                    cursor, rows, f"{key_column} BETWEEN ? AND ?", (first, last)
                 )
-                specs.append(spec)
-            
-            return specs 
+            yield from models
+
+    @staticmethod
+    def _read_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+        """Cursor returning plain tuples, which are cheaper to build than sqlite3.Row"""
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        return cursor
+
+    @staticmethod
+    def _group_pairs(rows: List[tuple]) -> Dict[str, List[Any]]:
+        """Group (parent id, value) rows into lists of values keyed by parent id"""
+        grouped: Dict[str, List[Any]] = {}
+        for key, value in rows:
+            grouped.setdefault(key, []).append(value)
+        return grouped
+
+    def _scope(self, condition: str = "", params: tuple = ()) -> Tuple[str, tuple]:
+        """WHERE clause (and its parameters) limiting a query to this project"""
+        where = "WHERE project_id = ?"
+        if condition:
+            where += f" AND {condition}"
+        return where, (self.project_id,) + params
+
+    def _build(self, model: Type[ModelT], **fields: Any) -> ModelT:
+        """Create a model from database values.
+        
+        Rows written by this client were validated on the way in, so by
+        default they are trusted and built without pydantic validation. Set
+        ``validate_rows`` (or the HITCHCOCK_VALIDATE_DB_ROWS environment
+        variable) to validate them again.
+        """
+        if self.validate_rows:
+            return model(**fields)
+        return _construct(model, fields)
+
+    def _hydrate_scenes(self, cursor: sqlite3.Cursor, rows: List[tuple],
+                        condition: str = "", params: tuple = ()) -> List["ScriptScene"]:
+        """Build ScriptScene models from SCENE_COLUMNS rows.
+        
+        Characters are fetched with a single query over this project (further
+        narrowed by ``condition``/``params``) and matched up in Python, so the
+        query count does not grow with the number of scenes.
+        """
+        if not rows:
+            return []
+        where, params = self._scope(condition, params)
+        
+        cursor.execute(f"""
+            SELECT scene_id, character_name FROM scene_characters {where}
+            ORDER BY rowid
+        """, params)
+        characters = self._group_pairs(cursor.fetchall())
+        
+        build = self._build
+        return [
+            build(
+                ScriptScene,
+                scene_id=scene_id,
+                title=title,
+                script_text=script_text,
+                importance=importance,
+                characters=characters.get(scene_id, []),
+                description=description
+            )
+            for scene_id, title, script_text, importance, description in rows
+        ]
+
+    def _hydrate_scene_analyses(self, cursor: sqlite3.Cursor, rows: List[tuple],
+                                condition: str = "", params: tuple = ()) -> List["SceneAnalysis"]:
+        """Build SceneAnalysis models from ANALYSIS_COLUMNS rows.
+        
+        Key moments and shots are fetched with a single query per child table
+        over this project (further narrowed by ``condition``/``params``) and
+        matched up in Python, so the query count does not grow with the number
+        of scenes.
+        """
+        if not rows:
+            return []
+        where, params = self._scope(condition, params)
+        build = self._build
+        
+        cursor.execute(f"SELECT scene_id, moment FROM key_moments {where} ORDER BY id", params)
+        key_moments = self._group_pairs(cursor.fetchall())
+        
+        cursor.execute(f"SELECT {SHOT_COLUMNS} FROM shots {where} ORDER BY id", params)
+        shots: Dict[str, List[Shot]] = {}
+        for shot_scene_id, type_, camera, description, duration, camera_movement, focus in cursor.fetchall():
+            shots.setdefault(shot_scene_id, []).append(build(
+                Shot,
+                type=type_,
+                camera=camera,
+                description=description,
+                duration=duration,
+                camera_movement=camera_movement,
+                focus=focus
+            ))
+        
+        return [
+            build(
+                SceneAnalysis,
+                scene_id=scene_id,
+                key_moments=key_moments.get(scene_id, []),
+                shots=shots.get(scene_id, []),
+                setting=setting,
+                mood=mood,
+                pacing=pacing,
+                time_of_day=time_of_day
+            )
+            for scene_id, setting, mood, pacing, time_of_day in rows
+        ]
+
+    def _hydrate_visual_plans(self, cursor: sqlite3.Cursor, rows: List[tuple],
+                              condition: str = "", params: tuple = ()) -> List["VisualPlan"]:
+        """Build VisualPlan models from PLAN_COLUMNS rows.
+        
+        Props and effects are fetched with a single query per child table over
+        this project (further narrowed by ``condition``/``params``) and matched
+        up in Python.
+        """
+        if not rows:
+            return []
+        where, params = self._scope(condition, params)
+        
+        cursor.execute(f"SELECT scene_id, prop FROM visual_plan_props {where} ORDER BY id", params)
+        props = self._group_pairs(cursor.fetchall())
+        cursor.execute(f"SELECT scene_id, effect FROM visual_plan_effects {where} ORDER BY id", params)
+        effects = self._group_pairs(cursor.fetchall())
+        
+        build = self._build
+        return [
+            build(
+                VisualPlan,
+                scene_id=scene_id,
+                lighting=lighting,
+                props=props.get(scene_id, []),
+                atmosphere=atmosphere,
+                special_effects=effects.get(scene_id, [])
+            )
+            for scene_id, lighting, atmosphere in rows
+        ]
+
+    def _hydrate_shot_image_specs(self, cursor: sqlite3.Cursor, rows: List[tuple],
+                                  condition: str = "", params: tuple = ()) -> List["ShotImageSpec"]:
+        """Build ShotImageSpec models from SPEC_COLUMNS rows.
+        
+        Props, effects and characters are fetched with a single query per child
+        table over this project (further narrowed by ``condition``/``params``)
+        and matched up in Python, so the query count does not grow with the
+        number of shots.
+        """
+        if not rows:
+            return []
+        where, params = self._scope(condition, params)
+        
+        cursor.execute(f"SELECT shot_id, prop FROM shot_spec_props {where} ORDER BY rowid", params)
+        props = self._group_pairs(cursor.fetchall())
+        
+        cursor.execute(f"SELECT shot_id, effect FROM shot_spec_effects {where} ORDER BY rowid", params)
+        effects = self._group_pairs(cursor.fetchall())
+        
+        cursor.execute(f"""
+            SELECT shot_id, character_name FROM shot_spec_characters {where}
+            ORDER BY rowid
+        """, params)
+        characters = self._group_pairs(cursor.fetchall())
+        
+        build = self._build
+        return [
+            build(
+                ShotImageSpec,
+                scene_id=scene_id,
+                shot_id=shot_id,
+                description=description,
+                camera_specs={
+                    'type': camera_type,
+                    'movement': camera_movement,
+                    'focus': camera_focus
+                },
+                visual_elements={
+                    'lighting': lighting,
+                    'atmosphere': atmosphere,
+                    'time_of_day': time_of_day
+                },
+                props=props.get(shot_id, []),
+                special_effects=effects.get(shot_id, []),
+                characters=characters.get(shot_id, [])
+            )
+            for (scene_id, shot_id, description, camera_type, camera_movement, camera_focus,
+                 lighting, atmosphere, time_of_day) in rows
+        ]
+
+    def list_projects(self) -> List[str]:
+        """Get the IDs of every project with scenes or characters in the database"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT project_id FROM scenes
+                UNION
+                SELECT project_id FROM script_characters
+                ORDER BY project_id
+            """)
+            return [row['project_id'] for row in cursor.fetchall()]
 
     def get_all_scene_ids(self) -> List[str]:
-        """Get a list of all scene IDs in the database"""
+        """Get a list of all scene IDs in the project"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT scene_id FROM scenes ORDER BY scene_id")
+            cursor.execute(
+                "SELECT scene_id FROM scenes WHERE project_id = ? ORDER BY scene_id", (self.project_id,)
+            )
             return [row['scene_id'] for row in cursor.fetchall()]
 
     def get_scene_by_id(self, scene_id: str) -> Optional["ScriptScene"]:
         """Get a specific scene by ID"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get scene data
-            cursor.execute("SELECT * FROM scenes WHERE scene_id = ?", (scene_id,))
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
-                
-            # Get characters for this scene
-            cursor.execute("""
-                SELECT character_name FROM scene_characters 
-                WHERE scene_id = ?
-            """, (scene_id,))
-            characters = [r['character_name'] for r in cursor.fetchall()]
-            
-            return ScriptScene(
-                scene_id=row['scene_id'],
-                title=row['title'],
-                script_text=row['script_text'],
-                importance=row['importance'],
-                characters=characters,
-                description=row['description']
+            cursor = self._read_cursor(conn)
+            cursor.execute(
+                f"SELECT {SCENE_COLUMNS} FROM scenes WHERE project_id = ? AND scene_id = ?",
+                (self.project_id, scene_id)
             )
+            scenes = self._hydrate_scenes(cursor, cursor.fetchall(), "scene_id = ?", (scene_id,))
+            return scenes[0] if scenes else None
 
     def get_script_text_by_scene_id(self, scene_id: str) -> Optional[str]:
         """Get just the script text for a specific scene"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT script_text FROM scenes WHERE scene_id = ?", (scene_id,))
+            cursor.execute(
+                "SELECT script_text FROM scenes WHERE project_id = ? AND scene_id = ?",
+                (self.project_id, scene_id)
+            )
             row = cursor.fetchone()
             return row['script_text'] if row else None
 
     def get_scene_analysis_by_id(self, scene_id: str) -> Optional["SceneAnalysis"]:
         """Get the analysis for a specific scene"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get analysis data
-            cursor.execute("SELECT * FROM scene_analyses WHERE scene_id = ?", (scene_id,))
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
-                
-            # Get key moments
-            cursor.execute("""
-                SELECT moment FROM key_moments 
-                WHERE scene_id = ?
-            """, (scene_id,))
-            key_moments = [r['moment'] for r in cursor.fetchall()]
-            
-            # Get shots
-            cursor.execute("""
-                SELECT * FROM shots 
-                WHERE scene_id = ?
-            """, (scene_id,))
-            shots = []
-            for shot_row in cursor.fetchall():
-                shot = Shot(
-                    type=shot_row['type'],
-                    camera=shot_row['camera'],
-                    description=shot_row['description'],
-                    duration=shot_row['duration'],
-                    camera_movement=shot_row['camera_movement'],
-                    focus=shot_row['focus']
-                )
-                shots.append(shot)
-            
-            return SceneAnalysis(
-                scene_id=scene_id,
-                key_moments=key_moments,
-                shots=shots,
-                setting=row['setting'],
-                mood=row['mood'],
-                pacing=row['pacing'],
-                time_of_day=row['time_of_day']
+            cursor = self._read_cursor(conn)
+            cursor.execute(
+                f"SELECT {ANALYSIS_COLUMNS} FROM scene_analyses WHERE project_id = ? AND scene_id = ?",
+                (self.project_id, scene_id)
             )
+            analyses = self._hydrate_scene_analyses(cursor, cursor.fetchall(), "scene_id = ?", (scene_id,))
+            return analyses[0] if analyses else None
 
     def get_visual_plan_by_id(self, scene_id: str) -> Optional["VisualPlan"]:
         """Get the visual plan for a specific scene"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get plan data
-            cursor.execute("SELECT * FROM visual_plans WHERE scene_id = ?", (scene_id,))
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
-            
-            # Get props
-            cursor.execute("""
-                SELECT prop FROM visual_plan_props 
-                WHERE scene_id = ?
-            """, (scene_id,))
-            props = [r['prop'] for r in cursor.fetchall()]
-            
-            # Get effects
-            cursor.execute("""
-                SELECT effect FROM visual_plan_effects 
-                WHERE scene_id = ?
-            """, (scene_id,))
-            effects = [r['effect'] for r in cursor.fetchall()]
-            
-            return VisualPlan(
-                scene_id=scene_id,
-                lighting=row['lighting'],
-                props=props,
-                atmosphere=row['atmosphere'],
-                special_effects=effects
+            cursor = self._read_cursor(conn)
+            cursor.execute(
+                f"SELECT {PLAN_COLUMNS} FROM visual_plans WHERE project_id = ? AND scene_id = ?",
+                (self.project_id, scene_id)
             )
+            plans = self._hydrate_visual_plans(cursor, cursor.fetchall(), "scene_id = ?", (scene_id,))
+            return plans[0] if plans else None
 
     def get_shot_specs_by_scene_id(self, scene_id: str) -> List["ShotImageSpec"]:
         """Get all shot specifications for a specific scene"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM shot_image_specs WHERE scene_id = ?", (scene_id,))
-            specs = []
-            
-            for row in cursor.fetchall():
-                shot_id = row['shot_id']
-                
-                # Get props
-                cursor.execute("""
-                    SELECT prop FROM shot_spec_props 
-                    WHERE shot_id = ?
-                """, (shot_id,))
-                props = [r['prop'] for r in cursor.fetchall()]
-                
-                # Get effects
-                cursor.execute("""
-                    SELECT effect FROM shot_spec_effects 
-                    WHERE shot_id = ?
-                """, (shot_id,))
-                effects = [r['effect'] for r in cursor.fetchall()]
-                
-                # Get characters
-                cursor.execute("""
-                    SELECT character_name FROM shot_spec_characters 
-                    WHERE shot_id = ?
-                """, (shot_id,))
-                characters = [r['character_name'] for r in cursor.fetchall()]
-                
-                spec = ShotImageSpec(
-                    scene_id=row['scene_id'],
-                    shot_id=shot_id,
-                    description=row['description'],
-                    camera_specs={
-                        'type': row['camera_type'],
-                        'movement': row['camera_movement'],
-                        'focus': row['camera_focus']
-                    },
-                    visual_elements={
-                        'lighting': row['lighting'],
-                        'atmosphere': row['atmosphere'],
-                        'time_of_day': row['time_of_day']
-                    },
-                    props=props,
-                    special_effects=effects,
-                    characters=characters
-                )
-                specs.append(spec)
-            
-            return specs
+            cursor = self._read_cursor(conn)
+            cursor.execute(
+                f"SELECT {SPEC_COLUMNS} FROM shot_image_specs WHERE project_id = ? AND scene_id = ?",
+                (self.project_id, scene_id)
+            )
+            return self._hydrate_shot_image_specs(
+                cursor, cursor.fetchall(),
+                "shot_id IN (SELECT shot_id FROM shot_image_specs WHERE project_id = ? AND scene_id = ?)",
+                (self.project_id, scene_id)
+            )
 
     def get_scene_metadata(self, scene_id: str) -> Optional[Dict]:
         """Get a summary of metadata for a scene including title, importance, and character count"""
+        status = self.get_scene_status(scene_id)
+        if status is None:
+            return None
+        return {
+            'scene_id': scene_id,
+            'title': status['title'],
+            'importance': status['importance'],
+            'description': status['description'],
+            'character_count': status['character_count'],
+            'has_analysis': status['has_analysis'],
+            'has_visual_plan': status['has_visual_plan'],
+            'shot_spec_count': status['shot_spec_count']
+        }
+
+    def get_scene_status(self, scene_id: str) -> Optional[Dict]:
+        """Get the pipeline progress of one scene (see ``get_all_scene_statuses``)"""
+        statuses = self._scene_statuses("AND s.scene_id = ?", (scene_id,))
+        return statuses[0] if statuses else None
+
+    def get_all_scene_statuses(self) -> List[Dict]:
+        """Get the pipeline progress of every scene in the project, ordered by scene ID.
+        
+        Each entry has the scene's title, importance, description and
+        character count, whether it has an analysis and a visual plan, its
+        number of shot specs, how many of those shots have a rendered image,
+        and whether its audio has been rendered. Everything comes from one
+        aggregate query answered from indexes, so it is cheap to poll.
+        """
+        return self._scene_statuses()
+
+    def _scene_statuses(self, condition: str = "", params: tuple = ()) -> List[Dict]:
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get basic scene data
-            cursor.execute("""
-                SELECT title, importance, description,
-                       (SELECT COUNT(*) FROM scene_characters WHERE scene_id = scenes.scene_id) as character_count
-                FROM scenes 
-                WHERE scene_id = ?
-            """, (scene_id,))
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
-                
-            return {
-                'scene_id': scene_id,
-                'title': row['title'],
-                'importance': row['importance'],
-                'description': row['description'],
-                'character_count': row['character_count'],
-                'has_analysis': self.get_scene_analysis_by_id(scene_id) is not None,
-                'has_visual_plan': self.get_visual_plan_by_id(scene_id) is not None,
-                'shot_spec_count': len(self.get_shot_specs_by_scene_id(scene_id))
-            } 
-
-    def save_script_characters(self, characters: List[Dict[str, str]]) -> None:
-        """Save character information to database"""
+            cursor = self._read_cursor(conn)
+            cursor.execute(f"""
+                SELECT s.scene_id, s.title, s.importance, s.description,
+                       (SELECT COUNT(*) FROM scene_characters c
+                        WHERE c.project_id = s.project_id AND c.scene_id = s.scene_id),
+                       EXISTS (SELECT 1 FROM scene_analyses a
+                               WHERE a.project_id = s.project_id AND a.scene_id = s.scene_id),
+                       EXISTS (SELECT 1 FROM visual_plans p
+                               WHERE p.project_id = s.project_id AND p.scene_id = s.scene_id),
+                       (SELECT COUNT(*) FROM shot_image_specs i
+                        WHERE i.project_id = s.project_id AND i.scene_id = s.scene_id),
+                       (SELECT COUNT(DISTINCT r.shot_id) FROM rendered_assets r
+                        WHERE r.project_id = s.project_id AND r.scene_id = s.scene_id
+                          AND r.kind = 'image'),
+                       EXISTS (SELECT 1 FROM rendered_assets r
+                               WHERE r.project_id = s.project_id AND r.scene_id = s.scene_id
+                                 AND r.kind = 'audio')
+                FROM scenes s
+                WHERE s.project_id = ? {condition}
+                ORDER BY s.scene_id
+            """, (self.project_id,) + params)
+            return [
+                {
+                    'scene_id': scene_id,
+                    'title': title,
+                    'importance': importance,
+                    'description': description,
+                    'character_count': character_count,
+                    'has_analysis': bool(has_analysis),
+                    'has_visual_plan': bool(has_visual_plan),
+                    'shot_spec_count': shot_spec_count,
+                    'images_rendered': images_rendered,
+                    'has_audio': bool(has_audio)
+                }
+                for (scene_id, title, importance, description, character_count, has_analysis,
+                     has_visual_plan, shot_spec_count, images_rendered, has_audio) in cursor.fetchall()
+            ]
+
+    def record_rendered_asset(self, scene_id: str, kind: str, path: str,
+                              shot_id: Optional[str] = None) -> None:
+        """Record that an image (per shot) or audio track (per scene) was written to ``path``"""
+        with self._transaction() as conn:
+            conn.execute("""
+                INSERT INTO rendered_assets (project_id, scene_id, shot_id, kind, path)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (project_id, kind, path) DO UPDATE SET
+                    scene_id = excluded.scene_id,
+                    shot_id = excluded.shot_id,
+                    created_at = CURRENT_TIMESTAMP
+            """, (self.project_id, scene_id, shot_id, kind, path))
+        self._connections.record_write("rendered_assets")
+
+    def changes_since(self, cursor: int = 0,
+                      tables: Optional[Sequence[str]] = None) -> Tuple[List[Change], int]:
+        """Get the project's rows that changed after change-log position ``cursor``.
+        
+        Scenes, scene analyses, visual plans and shot image specs are tracked by
+        database triggers, including changes to their child rows. Entries for
+        the same row are merged: a row deleted last is reported as "delete", a
+        row created after ``cursor`` as "insert", anything else as "update".
+        Returns the changes in log order and the cursor to pass next time.
+        """
+        sql = "SELECT seq, table_name, key, operation FROM change_log WHERE project_id = ? AND seq > ?"
+        params: tuple = (self.project_id, cursor)
+        if tables:
+            sql += f" AND table_name IN ({', '.join('?' * len(tables))})"
+            params += tuple(tables)
+        with self._get_connection() as conn:
+            db_cursor = self._read_cursor(conn)
+            db_cursor.execute(sql + " ORDER BY seq", params)
+            rows = db_cursor.fetchall()
+        
+        changes: Dict[Tuple[str, str], Change] = {}
+        for seq, table, key, operation in rows:
+            previous = changes.pop((table, key), None)
+            if operation == "update" and previous is not None and previous.operation == "insert":
+                operation = "insert"
+            changes[(table, key)] = Change(seq, table, key, operation)
+        return list(changes.values()), rows[-1][0] if rows else cursor
+
+    def get_consumer_cursor(self, consumer: str) -> Optional[int]:
+        """Change-log position ``consumer`` has processed up to in this project.
+
+        None if it never saved one: the consumer has processed nothing yet,
+        and rows written before the change log existed are not in it, so it
+        should do a full run rather than read the log from the start.
+        """
         with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT seq FROM consumer_cursors WHERE project_id = ? AND consumer = ?",
+                (self.project_id, consumer)
+            ).fetchone()
+            return row['seq'] if row else None
+
+    def save_consumer_cursor(self, consumer: str, cursor: int) -> None:
+        """Record that ``consumer`` has processed every change up to ``cursor``"""
+        with self._transaction() as conn:
+            conn.execute("""
+                INSERT INTO consumer_cursors (project_id, consumer, seq) VALUES (?, ?, ?)
+                ON CONFLICT (project_id, consumer) DO UPDATE SET
+                    seq = excluded.seq,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (self.project_id, consumer, cursor))
+
+    def prune_change_log(self) -> int:
+        """Delete the project's change-log entries every saved consumer cursor has passed.
+
+        Consumers without a saved cursor do a full run instead of reading the
+        log, so they do not hold entries back.
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute("""
+                DELETE FROM change_log
+                WHERE project_id = ?
+                  AND seq <= (SELECT MIN(seq) FROM consumer_cursors WHERE project_id = ?)
+            """, (self.project_id, self.project_id))
+            return cursor.rowcount
+
+    def search(self, query: str, kinds: Optional[Sequence[str]] = None,
+               limit: int = 20) -> List[SearchResult]:
+        """Full-text search over the project's scenes, shots and characters.
+        
+        Scenes are indexed by title, script text and description; shots by
+        description, characters and visual elements; characters by name,
+        description, role and traits. Plain text matches any of its words, with
+        rows matching more (and rarer) words ranked first; queries using FTS5
+        syntax (quotes, AND/OR/NOT, prefix*) are passed through as written,
+        and searched as plain words if they are not valid FTS5.
+        """
+        kinds = list(kinds or SEARCH_KINDS)
+        unknown = set(kinds) - set(SEARCH_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown search kinds: {', '.join(sorted(unknown))}")
+        match = self._match_expression(query)
+        if not match:
+            return []
+        try:
+            return self._search(match, kinds, limit)
+        except sqlite3.OperationalError:
+            # e.g. an unbalanced quote, a stray AND, or "INT: kitchen" read as a column filter
+            words = self._match_expression(query, syntax=False)
+            if not words or words == match:
+                raise
+            return self._search(words, kinds, limit)
+
+    def _search(self, match: str, kinds: List[str], limit: int) -> List[SearchResult]:
+        """Run one MATCH expression against the search tables of ``kinds``"""
+        results: List[SearchResult] = []
+        with self._get_connection() as conn:
+            cursor = self._read_cursor(conn)
+            for kind in kinds:
+                table, key_column, scene_column, title_column = SEARCH_KINDS[kind]
+                cursor.execute(f"""
+                    SELECT '{kind}', {key_column}, {scene_column}, {title_column},
+                           snippet({table}, -1, '[', ']', '...', 12), rank
+                    FROM {table}
+                    WHERE {table} MATCH ? AND project_id = ?
+                    ORDER BY rank
+                    LIMIT ?
+                """, (match, self.project_id, limit))
+                results.extend(SearchResult(*row) for row in cursor.fetchall())
+        results.sort(key=lambda result: result.rank)
+        return results[:limit]
+
+    @staticmethod
+    def _match_expression(query: str, syntax: bool = True) -> str:
+        """Turn a search box query into an FTS5 MATCH expression.
+        
+        With ``syntax`` off, FTS5 operators are ignored and every word is
+        matched literally.
+        """
+        if syntax and re.search(r'["*():^]|\b(AND|OR|NOT|NEAR)\b', query):
+            return query
+        return " OR ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+    def save_script_characters(self, characters: List[Dict[str, str]]) -> WriteStats:
+        """Register characters, updating any already saved under the same normalized name.
+        
+        Saving the same characters again leaves the table unchanged, and when a
+        list names one character twice the last entry wins.
+        """
+        registry = {
+            normalize_character_name(character['name']): (
+                character['name'], *(character[field] for field in CHARACTER_FIELDS)
+            )
+            for character in characters
+        }
+        stats = WriteStats()
+        with self._transaction() as conn:
             cursor = conn.cursor()
-            for character in characters:
-                cursor.execute("""
-                    INSERT INTO script_characters (name, description, role, traits)
-                    VALUES (?, ?, ?, ?)
-                """, (character['name'], character['description'], 
-                     character['role'], character['traits']))
-            conn.commit()
+            existing = {
+                row[0]: tuple(row[1:])
+                for row in self._select_in(
+                    cursor,
+                    f"SELECT normalized_name, name, {', '.join(CHARACTER_FIELDS)} FROM script_characters "
+                    f"WHERE project_id = ? AND normalized_name IN ({{}})",
+                    list(registry), (self.project_id,)
+                )
+            }
+            inserts = [
+                (self.project_id, key) + values for key, values in registry.items() if key not in existing
+            ]
+            updates = [
+                values + (self.project_id, key) for key, values in registry.items()
+                if key in existing and existing[key] != values
+            ]
+            if inserts:
+                cursor.executemany(f"""
+                    INSERT INTO script_characters
+                        (project_id, normalized_name, name, {', '.join(CHARACTER_FIELDS)})
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, inserts)
+            if updates:
+                cursor.executemany(f"""
+                    UPDATE script_characters
+                    SET name = ?, {', '.join(f'{field} = ?' for field in CHARACTER_FIELDS)}
+                    WHERE project_id = ? AND normalized_name = ?
+                """, updates)
+            stats.inserted += len(inserts)
+            stats.updated += len(updates)
+        return self._record_write(stats, "script_characters")
 
     def load_script_characters(self) -> List[Dict[str, str]]:
-        """Load all character information from database"""
+        """Load all character information for the project from database"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM script_characters")
-            characters = []
-            for row in cursor.fetchall():
-                characters.append({
-                    'name': row['name'],
-                    'description': row['description'],
-                    'role': row['role'],
-                    'traits': row['traits']
-                })
-            return characters 
+            cursor = self._read_cursor(conn)
+            cursor.execute(f"""
+                SELECT normalized_name, name, {', '.join(CHARACTER_FIELDS)} FROM script_characters
+                WHERE project_id = ?
+                ORDER BY character_id
+            """, (self.project_id,))
+            return [self._character_dict(row) for row in cursor.fetchall()]
+
+    def get_script_characters(self, names: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        """Look up characters by name (in any case or quoting), keyed by normalized name.
+        
+        Names that are not registered are left out of the result.
+        """
+        keys = list(dict.fromkeys(normalize_character_name(name) for name in names))
+        with self._get_connection() as conn:
+            rows = self._select_in(
+                self._read_cursor(conn),
+                f"SELECT normalized_name, name, {', '.join(CHARACTER_FIELDS)} FROM script_characters "
+                f"WHERE project_id = ? AND normalized_name IN ({{}})",
+                keys, (self.project_id,)
+            )
+        return {row[0]: self._character_dict(row) for row in rows}
+
+    @staticmethod
+    def _character_dict(row: tuple) -> Dict[str, str]:
+        normalized_name, name, description, role, traits = row
+        return {
+            'name': name,
+            'normalized_name': normalized_name,
+            'description': description,
+            'role': role,
+            'traits': traits
+        }
 
     def get_script_by_id(self, scene_id: str) -> Optional[Dict[str, Any]]:
         """Get the complete script information for a specific scene ID.
@@ -740,8 +1508,8 @@ class StoryboardDBClient:
             cursor.execute("""
                 SELECT script_text, title, description 
                 FROM scenes 
-                WHERE scene_id = ?
-            """, (scene_id,))
+                WHERE project_id = ? AND scene_id = ?
+            """, (self.project_id, scene_id))
             row = cursor.fetchone()
             
             if not row:
@@ -751,8 +1519,8 @@ class StoryboardDBClient:
             cursor.execute("""
                 SELECT character_name 
                 FROM scene_characters 
-                WHERE scene_id = ?
-            """, (scene_id,))
+                WHERE project_id = ? AND scene_id = ?
+            """, (self.project_id, scene_id))
             characters = [r['character_name'] for r in cursor.fetchall()]
             
             return {
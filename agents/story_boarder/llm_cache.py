@@ -0,0 +1,241 @@
+"""Content-addressed on-disk cache for structured (instructor) LLM responses.
+
+A response is keyed by a hash of the model, the messages, the JSON schema of
+the ``response_model`` and any other request arguments, so re-running a stage
+on unchanged input is served from disk without calling the API:
+
+    scenes = cached_create(client, model="gpt-4o-mini",
+                           response_model=List[ScriptScene], messages=messages)
+
+Entries live in ``data/llm_cache/responses.db`` (HITCHCOCK_LLM_CACHE_DIR),
+expire after HITCHCOCK_LLM_CACHE_TTL seconds and are evicted least recently
+used first once they exceed HITCHCOCK_LLM_CACHE_MAX_MB. Set
+HITCHCOCK_LLM_CACHE_BYPASS=1, or pass ``bypass=True``, to always call the
+API; fresh responses are still written back.
+
+Run ``python -m agents.story_boarder.llm_cache [stats|clear|prune]`` to
+inspect or empty the cache.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from pydantic import TypeAdapter
+
+from .connection import get_connection_manager
+from .llm_usage import acreate_with_usage, create_with_usage, track_llm_call
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "data/llm_cache"
+DEFAULT_TTL = 30 * 24 * 3600  # seconds
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], response_model: Any,
+              **kwargs: Any) -> str:
+    """SHA-256 of everything that determines a structured response"""
+    payload = {
+        "model": model,
+        "messages": messages,
+        "schema": TypeAdapter(response_model).json_schema(),
+        "kwargs": kwargs,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed store of validated structured responses, keyed by content hash"""
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: Optional[float] = None,
+                 max_bytes: Optional[int] = None, bypass: Optional[bool] = None):
+        cache_dir = cache_dir or os.getenv("HITCHCOCK_LLM_CACHE_DIR") or DEFAULT_CACHE_DIR
+        if ttl is None:
+            ttl = float(os.getenv("HITCHCOCK_LLM_CACHE_TTL", DEFAULT_TTL))
+        if max_bytes is None:
+            max_mb = os.getenv("HITCHCOCK_LLM_CACHE_MAX_MB")
+            max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+        if bypass is None:
+            bypass = _env_flag("HITCHCOCK_LLM_CACHE_BYPASS")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "responses.db")
+        self._connections = get_connection_manager(self.db_path)
+        self._connections.ensure_schema(self._init_db)
+        self.hits = 0
+        self.misses = 0
+
+    def _init_db(self) -> None:
+        with self._connections.transaction(immediate=True) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+
+    def get(self, key: str, response_model: Any) -> Optional[Any]:
+        """Validated response stored under ``key``, or None if missing or expired"""
+        with self._connections.transaction(immediate=True) as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            if now - row["created_at"] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        # A fresh copy per hit, so callers may modify what they get back
+        return TypeAdapter(response_model).validate_json(row["value"])
+
+    def put(self, key: str, model: str, response_model: Any, value: Any) -> None:
+        """Store a validated response and evict old entries beyond the size limit"""
+        encoded = TypeAdapter(response_model).dump_json(value).decode("utf-8")
+        now = time.time()
+        with self._connections.transaction(immediate=True) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, value, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, encoded, len(encoded), now, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn) -> None:
+        """Delete least recently used entries until the cache fits in ``max_bytes``"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for row in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((row["key"],))
+            total -= row["size"]
+        conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def prune(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        with self._connections.transaction(immediate=True) as conn:
+            return conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+
+    def clear(self) -> int:
+        """Delete every entry and return how many were removed"""
+        with self._connections.transaction(immediate=True) as conn:
+            return conn.execute("DELETE FROM responses").rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and size, plus this process's hits and misses"""
+        with self._connections.transaction() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide cache configured from the environment"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
+
+
+def _store(cache: ResponseCache, key: str, model: str, response_model: Any, response: Any) -> None:
+    """Cache a response the API has already been paid for; failing to is only logged"""
+    try:
+        cache.put(key, model, response_model, response)
+    except (sqlite3.Error, OSError) as error:
+        logger.warning("Could not cache %s response: %s", model, error)
+
+
+def cached_create(client, *, model: str, response_model: Any, messages: List[Dict[str, Any]],
+                  bypass: bool = False, cache: Optional[ResponseCache] = None, **kwargs: Any) -> Any:
+    """``client.chat.completions.create`` for an instructor client, through the cache.
+
+    The call, or cache hit, is recorded in the LLM usage log (see ``llm_usage``).
+    """
+    cache = cache or get_response_cache()
+    key = cache_key(model, messages, response_model, **kwargs)
+    with track_llm_call(model) as call:
+        if not (bypass or cache.bypass):
+            cached = cache.get(key, response_model)
+            if cached is not None:
+                call.cache_hit = True
+                return cached
+        response = create_with_usage(
+            client, call, model=model, response_model=response_model, messages=messages, **kwargs
+        )
+    _store(cache, key, model, response_model, response)
+    return response
+
+
+async def acached_create(client, *, model: str, response_model: Any, messages: List[Dict[str, Any]],
+                         bypass: bool = False, cache: Optional[ResponseCache] = None,
+                         **kwargs: Any) -> Any:
+    """``cached_create`` for an async instructor client.
+
+    Cache reads and writes are blocking SQLite transactions, so they run in a
+    worker thread instead of on the event loop.
+    """
+    cache = cache or get_response_cache()
+    key = cache_key(model, messages, response_model, **kwargs)
+    with track_llm_call(model) as call:
+        if not (bypass or cache.bypass):
+            cached = await asyncio.to_thread(cache.get, key, response_model)
+            if cached is not None:
+                call.cache_hit = True
+                return cached
+        response = await acreate_with_usage(
+            client, call, model=model, response_model=response_model, messages=messages, **kwargs
+        )
+    await asyncio.to_thread(_store, cache, key, model, response_model, response)
+    return response
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect or empty the LLM response cache")
+    parser.add_argument("command", nargs="?", choices=("stats", "clear", "prune"), default="stats")
+    args = parser.parse_args()
+
+    cache = get_response_cache()
+    if args.command == "clear":
+        print(f"Removed {cache.clear()} cached responses")
+    elif args.command == "prune":
+        print(f"Removed {cache.prune()} expired responses")
+    else:
+        stats = cache.stats()
+        print(f"{cache.db_path}: {stats['entries']} responses, {stats['bytes'] / 1024 / 1024:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""Token and latency accounting for every LLM call the pipeline makes.
+
+Wrap a model call in ``track_llm_call`` and hand it the response; the model,
+prompt and completion tokens, latency, retries, cache hit and any error are
+written to ``data/llm_usage/usage.db`` (HITCHCOCK_LLM_USAGE_DIR), tagged with
+the agent, tool, scene and shot set by the enclosing ``usage_tags`` blocks:
+
+    @usage_tags(agent="story_boarder", tool="plan_visual_elements")
+    def plan_visual_elements(): ...
+
+    with usage_tags(scene_id=scene.scene_id), track_llm_call("gpt-4o-mini") as call:
+        response = client.chat.completions.create(...)
+        call.add_usage(response)
+
+Tags are context variables, so they follow asyncio tasks and
+``asyncio.to_thread``. Calls made on an event loop are buffered and written
+by a worker thread, so accounting never blocks the loop. Calls are grouped
+by pipeline run: HITCHCOCK_RUN_ID, which activating a workspace sets to its
+name, or else one id per process. Set HITCHCOCK_LLM_USAGE=0 to record nothing.
+
+Run ``python -m agents.story_boarder.llm_usage [report|runs] [--run RUN]`` for
+a per-run summary by agent, tool and model.
+"""
+import argparse
+import asyncio
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .connection import get_connection_manager
+from .rate_limit import get_limiter
+
+DEFAULT_USAGE_DIR = "data/llm_usage"
+TAG_NAMES = ("agent", "tool", "scene_id", "shot_id")
+
+_tags: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("llm_usage_tags", default={})
+_current_call: contextvars.ContextVar[Optional["LLMCall"]] = contextvars.ContextVar(
+    "llm_usage_call", default=None
+)
+_process_run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+def current_run_id() -> str:
+    """Pipeline run that calls are recorded under"""
+    return os.getenv("HITCHCOCK_RUN_ID") or _process_run_id
+
+
+@contextmanager
+def usage_tags(**tags: Optional[str]) -> Iterator[Dict[str, str]]:
+    """Tag the LLM calls made inside the block; also usable as a decorator on sync functions"""
+    unknown = set(tags) - set(TAG_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown usage tags: {', '.join(sorted(unknown))}")
+    merged = {**_tags.get(), **{name: value for name, value in tags.items() if value is not None}}
+    token = _tags.set(merged)
+    try:
+        yield merged
+    finally:
+        _tags.reset(token)
+
+
+def current_call() -> Optional["LLMCall"]:
+    """The call being tracked in this context, for code that retries it"""
+    return _current_call.get()
+
+
+def response_usage(response: Any) -> Tuple[Optional[int], Optional[int]]:
+    """Prompt and completion tokens reported with an OpenAI, litellm or smolagents response"""
+    for attribute in ("usage", "token_usage"):
+        usage = (response.get(attribute) if isinstance(response, dict)
+                 else getattr(response, attribute, None))
+        if usage is None:
+            continue
+        if not isinstance(usage, dict):
+            usage = {name: getattr(usage, name, None) for name in
+                     ("prompt_tokens", "completion_tokens", "input_tokens", "output_tokens")}
+        prompt = usage.get("prompt_tokens", usage.get("input_tokens"))
+        completion = usage.get("completion_tokens", usage.get("output_tokens"))
+        if prompt is not None or completion is not None:
+            return prompt, completion
+    # Instructor keeps the completion its model was parsed from here
+    raw = getattr(response, "_raw_response", None) or getattr(response, "raw", None)
+    if raw is not None and raw is not response:
+        return response_usage(raw)
+    return None, None
+
+
+@dataclass
+class LLMCall:
+    """One model call, filled in while it runs"""
+
+    model: str
+    tags: Dict[str, str] = field(default_factory=dict)
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    retries: int = 0
+    cache_hit: bool = False
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    latency: float = 0.0
+
+    def add_usage(self, response: Any) -> None:
+        """Add the token counts reported with ``response``, if any"""
+        prompt, completion = response_usage(response)
+        if prompt is not None:
+            self.prompt_tokens = (self.prompt_tokens or 0) + prompt
+        if completion is not None:
+            self.completion_tokens = (self.completion_tokens or 0) + completion
+
+    def add_retry(self) -> None:
+        self.retries += 1
+
+
+class UsageLog:
+    """SQLite sink for tracked LLM calls"""
+
+    def __init__(self, usage_dir: Optional[str] = None):
+        usage_dir = usage_dir or os.getenv("HITCHCOCK_LLM_USAGE_DIR") or DEFAULT_USAGE_DIR
+        os.makedirs(usage_dir, exist_ok=True)
+        self.db_path = os.path.join(usage_dir, "usage.db")
+        self._connections = get_connection_manager(self.db_path)
+        self._connections.ensure_schema(self._init_db)
+        self._pending: List[Tuple[Any, ...]] = []
+        self._flush_scheduled = False
+        self._lock = threading.Lock()
+
+    def _init_db(self) -> None:
+        with self._connections.transaction(immediate=True) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_calls (
+                    id INTEGER PRIMARY KEY,
+                    run_id TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    agent TEXT,
+                    tool TEXT,
+                    scene_id TEXT,
+                    shot_id TEXT,
+                    model TEXT NOT NULL,
+                    prompt_tokens INTEGER,
+                    completion_tokens INTEGER,
+                    latency REAL NOT NULL,
+                    retries INTEGER NOT NULL DEFAULT 0,
+                    cache_hit INTEGER NOT NULL DEFAULT 0,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_run ON llm_calls (run_id, started_at)")
+
+    def record(self, call: LLMCall, run_id: Optional[str] = None) -> None:
+        """Buffer a finished call for writing.
+
+        On an event loop the buffer is written by a worker thread, so the loop
+        never waits on the usage database; elsewhere it is written at once.
+        """
+        row = (run_id or current_run_id(), call.started_at,
+               *(call.tags.get(name) for name in TAG_NAMES), call.model,
+               call.prompt_tokens, call.completion_tokens, call.latency,
+               call.retries, int(call.cache_hit), call.error)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            self._pending.append(row)
+            if loop is not None:
+                if self._flush_scheduled:
+                    return
+                self._flush_scheduled = True
+        if loop is None:
+            self.flush()
+        else:
+            loop.run_in_executor(None, self._scheduled_flush)
+
+    def _scheduled_flush(self) -> None:
+        with self._lock:
+            self._flush_scheduled = False
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            print(f"Could not record LLM usage: {e}")
+
+    def flush(self) -> None:
+        """Write every buffered call"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return
+        with self._connections.transaction(immediate=True) as conn:
+            conn.executemany(
+                "INSERT INTO llm_calls (run_id, started_at, agent, tool, scene_id, shot_id, model, "
+                "prompt_tokens, completion_tokens, latency, retries, cache_hit, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Recorded runs with their call counts, most recent first"""
+        self.flush()
+        with self._connections.transaction() as conn:
+            rows = conn.execute("""
+                SELECT run_id, MIN(started_at) AS started_at, COUNT(*) AS calls
+                FROM llm_calls GROUP BY run_id ORDER BY MAX(started_at) DESC
+            """).fetchall()
+        return [dict(row) for row in rows]
+
+    def summary(self, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Calls, tokens and latency of a run per agent, tool and model, slowest first"""
+        self.flush()
+        with self._connections.transaction() as conn:
+            rows = conn.execute("""
+                SELECT agent, tool, model, COUNT(*) AS calls,
+                       SUM(cache_hit) AS cache_hits, SUM(retries) AS retries,
+                       COUNT(error) AS errors,
+                       COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+                       COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+                       SUM(latency) AS latency, MAX(latency) AS max_latency
+                FROM llm_calls WHERE run_id = ?
+                GROUP BY agent, tool, model ORDER BY SUM(latency) DESC
+            """, (run_id or current_run_id(),)).fetchall()
+        return [dict(row) for row in rows]
+
+
+_default_log: Optional[UsageLog] = None
+_default_log_lock = threading.Lock()
+
+
+def get_usage_log() -> UsageLog:
+    """Process-wide usage log configured from the environment"""
+    global _default_log
+    with _default_log_lock:
+        if _default_log is None:
+            _default_log = UsageLog()
+        return _default_log
+
+
+def _enabled() -> bool:
+    return os.getenv("HITCHCOCK_LLM_USAGE", "").lower() not in ("0", "false", "no", "off")
+
+
+def record_call(call: LLMCall) -> None:
+    """Add a finished call to the usage log, unless accounting is disabled"""
+    if not _enabled():
+        return
+    try:
+        get_usage_log().record(call)
+    except sqlite3.Error as e:
+        # Accounting must never fail the call it measures
+        print(f"Could not record LLM usage: {e}")
+
+
+@contextmanager
+def track_llm_call(model: str, **tags: Optional[str]) -> Iterator[LLMCall]:
+    """Time the model call made in the block and record it with the current tags"""
+    with usage_tags(**tags) as merged:
+        call = LLMCall(model=model, tags=merged)
+        token = _current_call.set(call)
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException as e:
+            call.error = f"{type(e).__name__}: {e}"[:500]
+            raise
+        finally:
+            call.latency = time.perf_counter() - start
+            _current_call.reset(token)
+            record_call(call)
+
+
+def instructor_client(async_client: bool = False):
+    """Instructor OpenAI client whose validation retries count towards the tracked call.
+
+    The client doesn't retry rate limited requests itself: ``create_with_usage``
+    retries them through the shared OpenAI limiter (see ``rate_limit``).
+    openai and instructor are imported on first call.
+    """
+    import instructor
+    from openai import AsyncOpenAI, OpenAI
+
+    client = instructor.from_openai(AsyncOpenAI(max_retries=0) if async_client else OpenAI(max_retries=0))
+    if hasattr(client, "on"):
+        def count_retry(*args, **kwargs) -> None:
+            call = current_call()
+            if call is not None:
+                call.add_retry()
+        client.on("parse:error", count_retry)
+    return client
+
+
+def create_with_usage(client, call: LLMCall, **kwargs: Any) -> Any:
+    """``client.chat.completions.create`` for an instructor client, adding its tokens to ``call``.
+
+    The request goes through the shared OpenAI rate limiter; its retries are counted on ``call``.
+    """
+    completions = client.chat.completions
+    limiter = get_limiter("openai")
+    if hasattr(completions, "create_with_completion"):
+        response, completion = limiter.call(completions.create_with_completion, on_retry=call.add_retry, **kwargs)
+        call.add_usage(completion)
+    else:
+        response = limiter.call(completions.create, on_retry=call.add_retry, **kwargs)
+        call.add_usage(response)
+    return response
+
+
+async def acreate_with_usage(client, call: LLMCall, **kwargs: Any) -> Any:
+    """``create_with_usage`` for an async instructor client"""
+    completions = client.chat.completions
+    limiter = get_limiter("openai")
+    if hasattr(completions, "create_with_completion"):
+        response, completion = await limiter.acall(
+            completions.create_with_completion, on_retry=call.add_retry, **kwargs
+        )
+        call.add_usage(completion)
+    else:
+        response = await limiter.acall(completions.create, on_retry=call.add_retry, **kwargs)
+        call.add_usage(response)
+    return response
+
+
+def print_report(run_id: str, rows: List[Dict[str, Any]]) -> None:
+    print(f"LLM usage for run {run_id}")
+    print(f"{'agent':<16} {'tool':<30} {'model':<20} {'calls':>6} {'cached':>6} {'retries':>7} "
+          f"{'errors':>6} {'prompt':>9} {'completion':>10} {'s total':>8} {'s max':>7}")
+    for row in rows:
+        print(f"{row['agent'] or '-':<16} {row['tool'] or '-':<30} {row['model']:<20} {row['calls']:>6} "
+              f"{row['cache_hits']:>6} {row['retries']:>7} {row['errors']:>6} {row['prompt_tokens']:>9} "
+              f"{row['completion_tokens']:>10} {row['latency']:>8.1f} {row['max_latency']:>7.1f}")
+    if rows:
+        print(f"{'total':<68} {sum(row['calls'] for row in rows):>6} "
+              f"{sum(row['cache_hits'] for row in rows):>6} {sum(row['retries'] for row in rows):>7} "
+              f"{sum(row['errors'] for row in rows):>6} {sum(row['prompt_tokens'] for row in rows):>9} "
+              f"{sum(row['completion_tokens'] for row in rows):>10} "
+              f"{sum(row['latency'] for row in rows):>8.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report LLM token and latency usage per pipeline run")
+    parser.add_argument("command", nargs="?", choices=("report", "runs"), default="report")
+    parser.add_argument("--run", help="run id to report on (default: the most recent run)")
+    args = parser.parse_args()
+
+    log = get_usage_log()
+    runs = log.runs()
+    if args.command == "runs":
+        for run in runs:
+            started = datetime.fromtimestamp(run["started_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"{run['run_id']}: {run['calls']} calls since {started}")
+        return
+    run_id = args.run or (runs[0]["run_id"] if runs else None)
+    if run_id is None:
+        print(f"No LLM calls recorded in {log.db_path}")
+        return
+    print_report(run_id, log.summary(run_id))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,655 @@
+"""Versioned schema migrations for storyboard.db.
+
+The baseline tables are created by ``StoryboardDBClient._init_db``; every
+later layout change is a ``Migration`` appended to ``MIGRATIONS``. The
+database's ``PRAGMA user_version`` records the last version applied, and
+the ``schema_migrations`` table records finished steps so an interrupted
+migration resumes where it stopped instead of starting over.
+
+Steps must be idempotent. Table rebuilds copy rows in short batched
+transactions, so agents can keep using a large database while it is
+migrated, and only the final swap holds the write lock.
+
+Run ``python -m agents.story_boarder.migrations [db_path]`` to migrate a
+database ahead of time.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence
+
+from .connection import get_connection_manager, transaction
+from . import workspace
+
+logger = logging.getLogger(__name__)
+
+# Rows copied per transaction when rebuilding a table
+DEFAULT_BATCH_SIZE = 5000
+
+# Project that rows written before project partitioning (version 3) belong to
+DEFAULT_PROJECT_ID = "default"
+
+
+@dataclass
+class MigrationStep:
+    """One idempotent unit of work within a migration"""
+    name: str
+    run: Callable[[sqlite3.Connection, int], None]
+
+
+@dataclass
+class Migration:
+    """Ordered set of steps that takes the schema to ``version``"""
+    version: int
+    description: str
+    steps: List[MigrationStep] = field(default_factory=list)
+
+
+def sql_step(name: str, *statements: str) -> MigrationStep:
+    """Step that runs DDL statements in one transaction"""
+    def run(conn: sqlite3.Connection, batch_size: int) -> None:
+        with transaction(conn, immediate=True):
+            for statement in statements:
+                conn.execute(statement)
+    return MigrationStep(name, run)
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def rebuild_table(conn: sqlite3.Connection, table: str, definition: str,
+                  where: str = "", copy_columns: Optional[Sequence[str]] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    """Replace ``table`` with a new table built from ``definition``.
+
+    Rows are copied (keeping their rowid) in batches of ``batch_size``, each
+    in its own transaction. The final transaction reconciles rows written by
+    other connections during the copy, then drops the old table and renames
+    the new one into place. ``where`` filters the rows worth keeping and
+    ``copy_columns`` defaults to every column of the old table.
+    """
+    new_table = f"{table}_new"
+    columns = ", ".join(copy_columns or table_columns(conn, table))
+    condition = f"AND ({where})" if where else ""
+
+    with transaction(conn, immediate=True):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {new_table} ({definition})")
+
+    # Resume after the last row a previous, interrupted run copied
+    last = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {new_table}").fetchone()[0]
+    while True:
+        with transaction(conn, immediate=True):
+            upper = conn.execute(f"""
+                SELECT MAX(rowid) FROM (
+                    SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?
+                )
+            """, (last, batch_size)).fetchone()[0]
+            if upper is None:
+                break
+            conn.execute(f"""
+                INSERT OR REPLACE INTO {new_table} (rowid, {columns})
+                SELECT rowid, {columns} FROM {table}
+                WHERE rowid > ? AND rowid <= ? {condition}
+            """, (last, upper))
+        last = upper
+
+    with transaction(conn, immediate=True):
+        conn.execute(f"""
+            DELETE FROM {new_table}
+            WHERE rowid NOT IN (SELECT rowid FROM {table} WHERE 1 {condition})
+        """)
+        conn.execute(f"""
+            INSERT OR REPLACE INTO {new_table} (rowid, {columns})
+            SELECT rowid, {columns} FROM {table} WHERE 1 {condition}
+            EXCEPT
+            SELECT rowid, {columns} FROM {new_table}
+        """)
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+
+
+def rebuild_step(table: str, definition: str, where: str = "",
+                 copy_columns: Optional[Sequence[str]] = None) -> MigrationStep:
+    """Step that rebuilds ``table`` with ``rebuild_table``"""
+    def run(conn: sqlite3.Connection, batch_size: int) -> None:
+        rebuild_table(conn, table, definition, where, copy_columns, batch_size)
+    return MigrationStep(f"rebuild {table}", run)
+
+
+def add_column_step(table: str, column: str, definition: str) -> MigrationStep:
+    """Step that adds a column to ``table`` unless it already has it"""
+    def run(conn: sqlite3.Connection, batch_size: int) -> None:
+        with transaction(conn, immediate=True):
+            if column not in table_columns(conn, table):
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return MigrationStep(f"add {table}.{column}", run)
+
+
+def _cascade_child(table: str, parent: str, key_column: str, columns: str) -> MigrationStep:
+    """Rebuild a child table with an ON DELETE CASCADE foreign key, dropping orphans"""
+    return rebuild_step(
+        table,
+        f"""{columns},
+        FOREIGN KEY ({key_column}) REFERENCES {parent}({key_column}) ON DELETE CASCADE""",
+        where=f"{key_column} IN (SELECT {key_column} FROM {parent})"
+    )
+
+
+def _partitioned(table: str, columns: str, primary_key: str = "",
+                 parent: str = "", key_column: str = "") -> MigrationStep:
+    """Rebuild a table with a leading project_id column.
+
+    ``primary_key`` and the foreign key to ``parent`` become composite keys
+    with project_id in front. Existing rows move to the default project and
+    rows whose parent is missing are dropped.
+    """
+    definition = f"project_id TEXT NOT NULL DEFAULT '{DEFAULT_PROJECT_ID}',{columns}"
+    if primary_key:
+        definition += f""",
+        PRIMARY KEY (project_id, {primary_key})"""
+    where = ""
+    if parent:
+        definition += f""",
+        FOREIGN KEY (project_id, {key_column}) REFERENCES {parent}(project_id, {key_column}) ON DELETE CASCADE"""
+        where = f"{key_column} IN (SELECT {key_column} FROM {parent})"
+    return rebuild_step(table, definition, where)
+
+
+# Tables whose rows downstream agents regenerate from, with their key column,
+# their content columns and the child tables whose rows belong to each of them.
+# Bookkeeping columns such as content_hash and input_hash are not content.
+CHANGE_TRACKED_TABLES = {
+    "scenes": ("scene_id", ["title", "script_text", "importance", "description"],
+               ["scene_characters"]),
+    "scene_analyses": ("scene_id", ["setting", "mood", "pacing", "time_of_day"],
+                       ["key_moments", "shots"]),
+    "visual_plans": ("scene_id", ["lighting", "atmosphere"],
+                     ["visual_plan_props", "visual_plan_effects"]),
+    "shot_image_specs": ("shot_id", ["scene_id", "description", "camera_type", "camera_movement",
+                                     "camera_focus", "lighting", "atmosphere", "time_of_day"],
+                         ["shot_spec_props", "shot_spec_effects", "shot_spec_characters"]),
+}
+
+
+def _change_triggers() -> List[str]:
+    """Triggers appending every write to a tracked table (or its children) to change_log.
+
+    A child row change is logged as an update of its parent, and a parent
+    update only when one of its content columns changed, so refreshing a
+    row's hashes alone is not a change. Children removed by a cascading
+    parent delete are not logged, since the parent's own delete already is.
+    Triggers belong to their table, so a migration that rebuilds one of
+    these tables must create its triggers again.
+    """
+    statements = []
+    for table, (key_column, columns, children) in CHANGE_TRACKED_TABLES.items():
+        changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)
+        for event, row, operation, when in (("INSERT", "NEW", "insert", ""),
+                                            ("UPDATE", "NEW", "update", f"WHEN {changed}"),
+                                            ("DELETE", "OLD", "delete", "")):
+            statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{operation} AFTER {event} ON {table}
+            {when}
+            BEGIN
+                INSERT INTO change_log (project_id, table_name, key, operation)
+                VALUES ({row}.project_id, '{table}', {row}.{key_column}, '{operation}');
+            END
+            """)
+        for child in children:
+            for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+                statements.append(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{child}_{event.lower()} AFTER {event} ON {child}
+                WHEN EXISTS (
+                    SELECT 1 FROM {table}
+                    WHERE project_id = {row}.project_id AND {key_column} = {row}.{key_column}
+                )
+                BEGIN
+                    INSERT INTO change_log (project_id, table_name, key, operation)
+                    VALUES ({row}.project_id, '{table}', {row}.{key_column}, 'update');
+                END
+                """)
+    return statements
+
+
+def _normalize_script_characters(conn: sqlite3.Connection, batch_size: int) -> None:
+    """Fill script_characters.normalized_name in batches, then drop duplicate characters.
+
+    The newest row of each (project, normalized name) is kept, since it comes
+    from the latest character extraction.
+    """
+    from .db_client import normalize_character_name
+    conn.create_function("normalize_character_name", 1, normalize_character_name, deterministic=True)
+    if "normalized_name" not in table_columns(conn, "script_characters"):
+        with transaction(conn, immediate=True):
+            if "normalized_name" not in table_columns(conn, "script_characters"):
+                conn.execute("ALTER TABLE script_characters ADD COLUMN normalized_name TEXT")
+    while True:
+        with transaction(conn, immediate=True):
+            updated = conn.execute("""
+                UPDATE script_characters SET normalized_name = normalize_character_name(name)
+                WHERE rowid IN (
+                    SELECT rowid FROM script_characters WHERE normalized_name IS NULL LIMIT ?
+                )
+            """, (batch_size,)).rowcount
+        if not updated:
+            break
+    with transaction(conn, immediate=True):
+        conn.execute("""
+            DELETE FROM script_characters
+            WHERE character_id NOT IN (
+                SELECT MAX(character_id) FROM script_characters GROUP BY project_id, normalized_name
+            )
+        """)
+
+
+# Text indexed for each shot besides its description
+_SHOT_CHARACTERS = """(
+    SELECT group_concat(character_name, ', ') FROM shot_spec_characters c
+    WHERE c.project_id = {row}.project_id AND c.shot_id = {row}.shot_id
+)"""
+_SHOT_VISUALS = "trim(coalesce({row}.lighting, '') || ' ' || coalesce({row}.atmosphere, '') " \
+                "|| ' ' || coalesce({row}.time_of_day, ''))"
+
+# Full-text tables, each mirroring one source table row for row (same rowid):
+# {search table: (source table, FTS5 columns, source expressions for NEW/OLD rows)}
+SEARCH_TABLES = {
+    "scene_search": (
+        "scenes",
+        "project_id UNINDEXED, scene_id UNINDEXED, title, script_text, description",
+        "{row}.project_id, {row}.scene_id, {row}.title, {row}.script_text, {row}.description",
+    ),
+    "shot_search": (
+        "shot_image_specs",
+        "project_id UNINDEXED, shot_id UNINDEXED, scene_id UNINDEXED, description, characters, visuals",
+        "{row}.project_id, {row}.shot_id, {row}.scene_id, {row}.description, "
+        f"{_SHOT_CHARACTERS}, {_SHOT_VISUALS}",
+    ),
+    "character_search": (
+        "script_characters",
+        "project_id UNINDEXED, normalized_name UNINDEXED, name, description, role, traits",
+        "{row}.project_id, {row}.normalized_name, {row}.name, {row}.description, {row}.role, {row}.traits",
+    ),
+}
+
+
+def _search_index_statements() -> List[str]:
+    """Create, fill and sync the full-text search tables.
+
+    Triggers keep each search row in step with its source row, and a shot's
+    row is refreshed whenever its character list changes. Like the change
+    triggers, these must be recreated by any migration that rebuilds a
+    source table.
+    """
+    statements = []
+    for search, (source, columns, values) in SEARCH_TABLES.items():
+        insert = f"INSERT INTO {search} (rowid, {_fts_columns(columns)}) " \
+                 f"SELECT {{row}}.rowid, {values}"
+        statements += [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {search} USING fts5({columns}, tokenize = 'porter unicode61')",
+            f"DELETE FROM {search}",
+            insert.format(row=source) + f" FROM {source}",
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{search}_insert AFTER INSERT ON {source}
+            BEGIN
+                {insert.format(row="NEW")};
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{search}_update AFTER UPDATE ON {source}
+            BEGIN
+                DELETE FROM {search} WHERE rowid = OLD.rowid;
+                {insert.format(row="NEW")};
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{search}_delete AFTER DELETE ON {source}
+            BEGIN
+                DELETE FROM {search} WHERE rowid = OLD.rowid;
+            END
+            """,
+        ]
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        statements.append(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_shot_search_characters_{event.lower()}
+        AFTER {event} ON shot_spec_characters
+        BEGIN
+            UPDATE shot_search SET characters = {_SHOT_CHARACTERS.format(row=row)}
+            WHERE rowid = (
+                SELECT rowid FROM shot_image_specs
+                WHERE project_id = {row}.project_id AND shot_id = {row}.shot_id
+            );
+        END
+        """)
+    return statements
+
+
+def _fts_columns(columns: str) -> str:
+    return ", ".join(column.split()[0] for column in columns.split(","))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "cascading foreign keys and lookup indexes on child tables", [
+        _cascade_child("scene_characters", "scenes", "scene_id", """
+        scene_id TEXT NOT NULL,
+        character_name TEXT,
+        PRIMARY KEY (scene_id, character_name)"""),
+        _cascade_child("key_moments", "scene_analyses", "scene_id", """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scene_id TEXT NOT NULL,
+        moment TEXT NOT NULL"""),
+        _cascade_child("shots", "scene_analyses", "scene_id", """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scene_id TEXT NOT NULL,
+        type TEXT NOT NULL,
+        camera TEXT NOT NULL,
+        description TEXT NOT NULL,
+        duration TEXT NOT NULL,
+        camera_movement TEXT,
+        focus TEXT"""),
+        _cascade_child("visual_plan_props", "visual_plans", "scene_id", """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scene_id TEXT NOT NULL,
+        prop TEXT NOT NULL"""),
+        _cascade_child("visual_plan_effects", "visual_plans", "scene_id", """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scene_id TEXT NOT NULL,
+        effect TEXT NOT NULL"""),
+        _cascade_child("shot_spec_props", "shot_image_specs", "shot_id", """
+        shot_id TEXT NOT NULL,
+        prop TEXT NOT NULL"""),
+        _cascade_child("shot_spec_effects", "shot_image_specs", "shot_id", """
+        shot_id TEXT NOT NULL,
+        effect TEXT NOT NULL"""),
+        _cascade_child("shot_spec_characters", "shot_image_specs", "shot_id", """
+        shot_id TEXT NOT NULL,
+        character_name TEXT NOT NULL"""),
+        # Child indexes include the value column so per-parent lookups are
+        # answered from the index alone
+        sql_step(
+            "lookup indexes",
+            "CREATE INDEX IF NOT EXISTS idx_key_moments_scene ON key_moments (scene_id, moment)",
+            "CREATE INDEX IF NOT EXISTS idx_shots_scene ON shots (scene_id)",
+            "CREATE INDEX IF NOT EXISTS idx_visual_plan_props_scene ON visual_plan_props (scene_id, prop)",
+            "CREATE INDEX IF NOT EXISTS idx_visual_plan_effects_scene ON visual_plan_effects (scene_id, effect)",
+            "CREATE INDEX IF NOT EXISTS idx_shot_image_specs_scene ON shot_image_specs (scene_id)",
+            "CREATE INDEX IF NOT EXISTS idx_shot_spec_props_shot ON shot_spec_props (shot_id, prop)",
+            "CREATE INDEX IF NOT EXISTS idx_shot_spec_effects_shot ON shot_spec_effects (shot_id, effect)",
+            "CREATE INDEX IF NOT EXISTS idx_shot_spec_characters_shot "
+            "ON shot_spec_characters (shot_id, character_name)",
+        ),
+    ]),
+    Migration(2, "rendered asset log for scene status", [
+        sql_step(
+            "rendered_assets",
+            """
+            CREATE TABLE IF NOT EXISTS rendered_assets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scene_id TEXT NOT NULL,
+                shot_id TEXT,
+                kind TEXT NOT NULL CHECK (kind IN ('image', 'audio')),
+                path TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (kind, path),
+                FOREIGN KEY (scene_id) REFERENCES scenes(scene_id) ON DELETE CASCADE
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_rendered_assets_scene ON rendered_assets (scene_id, kind, shot_id)",
+        ),
+    ]),
+    # Parents are rebuilt before their children so orphan filters see the new rows
+    Migration(3, "partition every table by project", [
+        _partitioned("scenes", """
+        scene_id TEXT NOT NULL,
+        title TEXT NOT NULL,
+        script_text TEXT NOT NULL,
+        importance TEXT NOT NULL,
+        description TEXT NOT NULL""", primary_key="scene_id"),
+        _partitioned("scene_characters", """
+        scene_id TEXT NOT NULL,
+        character_name TEXT""", primary_key="scene_id, character_name",
+                     parent="scenes", key_column="scene_id"),
+        _partitioned("scene_analyses", """
+        scene_id TEXT NOT NULL,
+        setting TEXT NOT NULL,
+        mood TEXT NOT NULL,
+        pacing TEXT NOT NULL,
+        time_of_day TEXT NOT NULL""", primary_key="scene_id",
+                     parent="scenes", key_column="scene_id"),
+        _partitioned("key_moments", """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scene_id TEXT NOT NULL,
+        moment TEXT NOT NULL""", parent="scene_analyses", key_column="scene_id"),
+        _partitioned("shots", """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scene_id TEXT NOT NULL,
+        type TEXT NOT NULL,
+        camera TEXT NOT NULL,
+        description TEXT NOT NULL,
+        duration TEXT NOT NULL,
+        camera_movement TEXT,
+        focus TEXT""", parent="scene_analyses", key_column="scene_id"),
+        _partitioned("visual_plans", """
+        scene_id TEXT NOT NULL,
+        lighting TEXT NOT NULL,
+        atmosphere TEXT NOT NULL""", primary_key="scene_id",
+                     parent="scenes", key_column="scene_id"),
+        _partitioned("visual_plan_props", """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scene_id TEXT NOT NULL,
+        prop TEXT NOT NULL""", parent="visual_plans", key_column="scene_id"),
+        _partitioned("visual_plan_effects", """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scene_id TEXT NOT NULL,
+        effect TEXT NOT NULL""", parent="visual_plans", key_column="scene_id"),
+        _partitioned("shot_image_specs", """
+        scene_id TEXT,
+        shot_id TEXT NOT NULL,
+        description TEXT NOT NULL,
+        camera_type TEXT,
+        camera_movement TEXT,
+        camera_focus TEXT,
+        lighting TEXT,
+        atmosphere TEXT,
+        time_of_day TEXT""", primary_key="shot_id"),
+        _partitioned("shot_spec_props", """
+        shot_id TEXT NOT NULL,
+        prop TEXT NOT NULL""", parent="shot_image_specs", key_column="shot_id"),
+        _partitioned("shot_spec_effects", """
+        shot_id TEXT NOT NULL,
+        effect TEXT NOT NULL""", parent="shot_image_specs", key_column="shot_id"),
+        _partitioned("shot_spec_characters", """
+        shot_id TEXT NOT NULL,
+        character_name TEXT NOT NULL""", parent="shot_image_specs", key_column="shot_id"),
+        _partitioned("script_characters", """
+        character_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT NOT NULL,
+        role TEXT NOT NULL,
+        traits TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"""),
+        _partitioned("rendered_assets", """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scene_id TEXT NOT NULL,
+        shot_id TEXT,
+        kind TEXT NOT NULL CHECK (kind IN ('image', 'audio')),
+        path TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (project_id, kind, path)""", parent="scenes", key_column="scene_id"),
+        # The rebuilds dropped the version 1 and 2 indexes along with the old
+        # tables; every lookup is now per project
+        sql_step(
+            "project indexes",
+            "CREATE INDEX IF NOT EXISTS idx_key_moments_scene ON key_moments (project_id, scene_id, moment)",
+            "CREATE INDEX IF NOT EXISTS idx_shots_scene ON shots (project_id, scene_id)",
+            "CREATE INDEX IF NOT EXISTS idx_visual_plan_props_scene "
+            "ON visual_plan_props (project_id, scene_id, prop)",
+            "CREATE INDEX IF NOT EXISTS idx_visual_plan_effects_scene "
+            "ON visual_plan_effects (project_id, scene_id, effect)",
+            "CREATE INDEX IF NOT EXISTS idx_shot_image_specs_scene ON shot_image_specs (project_id, scene_id)",
+            "CREATE INDEX IF NOT EXISTS idx_shot_spec_props_shot ON shot_spec_props (project_id, shot_id, prop)",
+            "CREATE INDEX IF NOT EXISTS idx_shot_spec_effects_shot "
+            "ON shot_spec_effects (project_id, shot_id, effect)",
+            "CREATE INDEX IF NOT EXISTS idx_shot_spec_characters_shot "
+            "ON shot_spec_characters (project_id, shot_id, character_name)",
+            "CREATE INDEX IF NOT EXISTS idx_script_characters_project ON script_characters (project_id, name)",
+            "CREATE INDEX IF NOT EXISTS idx_rendered_assets_scene "
+            "ON rendered_assets (project_id, scene_id, kind, shot_id)",
+        ),
+    ]),
+    Migration(4, "change log for incremental downstream processing", [
+        sql_step(
+            "change_log",
+            # AUTOINCREMENT keeps sequence numbers increasing even after the
+            # newest entries are pruned
+            """
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                key TEXT NOT NULL,
+                operation TEXT NOT NULL CHECK (operation IN ('insert', 'update', 'delete')),
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_change_log_project ON change_log (project_id, seq)",
+            """
+            CREATE TABLE IF NOT EXISTS consumer_cursors (
+                project_id TEXT NOT NULL,
+                consumer TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (project_id, consumer)
+            )
+            """,
+        ),
+        sql_step("change triggers", *_change_triggers()),
+    ]),
+    Migration(5, "unique script character registry", [
+        MigrationStep("normalize script character names", _normalize_script_characters),
+        sql_step(
+            "script character name index",
+            "DROP INDEX IF EXISTS idx_script_characters_project",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_script_characters_name "
+            "ON script_characters (project_id, normalized_name)",
+        ),
+    ]),
+    Migration(6, "full-text search over scenes, shots and characters", [
+        sql_step("search index", *_search_index_statements()),
+    ]),
+    # content_hash fingerprints a record; input_hash is the fingerprint of the
+    # upstream record(s) it was generated from. Rows written before this
+    # version have neither, and count as up to date until an input changes.
+    Migration(7, "content hashes for incremental re-storyboarding", [
+        add_column_step("scenes", "content_hash", "TEXT"),
+        add_column_step("scene_analyses", "content_hash", "TEXT"),
+        add_column_step("scene_analyses", "input_hash", "TEXT"),
+        add_column_step("visual_plans", "content_hash", "TEXT"),
+        add_column_step("visual_plans", "input_hash", "TEXT"),
+        add_column_step("shot_image_specs", "input_hash", "TEXT"),
+    ]),
+    # Version 4 logged every update, including ones that only refreshed hashes
+    Migration(8, "log parent updates only when their content changes", [
+        sql_step(
+            "content update triggers",
+            *[f"DROP TRIGGER IF EXISTS trg_{table}_update" for table in CHANGE_TRACKED_TABLES],
+            *_change_triggers(),
+        ),
+    ]),
+]
+
+# Current layout of storyboard.db, stored in PRAGMA user_version
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS,
+                   batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Apply every migration newer than the database's user_version, in order.
+
+    ``conn`` must be in autocommit mode (isolation_level=None) and outside a
+    transaction, since steps manage their own transactions. Returns the
+    resulting schema version.
+    """
+    with transaction(conn, immediate=True):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER NOT NULL,
+                step TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (version, step)
+            )
+        """)
+
+    current = schema_version(conn)
+    pending = [m for m in sorted(migrations, key=lambda m: m.version) if m.version > current]
+    if not pending:
+        return current
+
+    # Dropping a rebuilt parent table would otherwise cascade-delete its
+    # children, so foreign keys stay off until every migration has run
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for migration in pending:
+            _apply(conn, migration, batch_size)
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            raise sqlite3.IntegrityError(
+                f"Migration left {len(violations)} rows with a missing parent, "
+                f"first in table {violations[0][0]}"
+            )
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+
+    return schema_version(conn)
+
+
+def _apply(conn: sqlite3.Connection, migration: Migration, batch_size: int) -> None:
+    """Run the steps of ``migration`` that have not finished yet, then bump user_version"""
+    if migration.version <= schema_version(conn):
+        return
+    logger.info("Migrating storyboard database to version %d: %s",
+                migration.version, migration.description)
+    done = {
+        row[0] for row in conn.execute(
+            "SELECT step FROM schema_migrations WHERE version = ?", (migration.version,)
+        )
+    }
+    for step in migration.steps:
+        if step.name in done:
+            continue
+        step.run(conn, batch_size)
+        with transaction(conn, immediate=True):
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_migrations (version, step) VALUES (?, ?)",
+                (migration.version, step.name)
+            )
+    with transaction(conn, immediate=True):
+        # Another process may have finished this migration meanwhile
+        if schema_version(conn) < migration.version:
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrate a storyboard database")
+    parser.add_argument("db_path", nargs="?",
+                        default=os.path.join(workspace.storage_dir(), workspace.DB_FILENAME))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from .db_client import StoryboardDBClient
+    conn = get_connection_manager(args.db_path).connection()
+    with transaction(conn, immediate=True):
+        StoryboardDBClient._create_baseline_tables(conn.cursor())
+    version = run_migrations(conn, batch_size=args.batch_size)
+    print(f"{args.db_path} is at schema version {version}")
+
+if __name__ == "__main__":
+    main()
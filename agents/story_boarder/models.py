@@ -37,6 +37,11 @@ class SceneAnalysis(BaseModel):
     pacing: str  # slow, medium, fast
     time_of_day: str
 
+class SceneAnalysisAndPlan(BaseModel):
+    """Analysis and visual plan of a scene, produced together in one call"""
+    analysis: SceneAnalysis
+    visual_plan: VisualPlan
+
 class ShotImageSpec(BaseModel):
     """Specification for generating an image for a shot"""
     scene_id: str
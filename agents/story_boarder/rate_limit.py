@@ -0,0 +1,309 @@
+"""Process-wide rate limiting and adaptive concurrency per API provider.
+
+Every call to a provider goes through the provider's shared limiter, which
+spaces requests with a token bucket and caps requests in flight with an
+AIMD (additive increase, multiplicative decrease) limit:
+
+    result = get_limiter("fal").call(fal_client.subscribe, application, arguments=...)
+    handler = await get_limiter("fal").acall(fal_client.submit_async, application, arguments=...)
+
+Each success raises the concurrency limit by about one per window of calls,
+up to the provider's ``concurrency``. A 429 or 5xx halves it and pauses the provider for
+its ``Retry-After`` (or an exponential backoff with jitter), then the call
+is retried up to ``max_retries`` times. Throttles reported by the calls
+already in flight count as one, so a burst of 429s doesn't collapse the limit.
+Connection errors, timeouts and 408/409 responses are retried as well, after
+a backoff of their own, without touching the limit: clients are created with
+their own retries off, so the limiter is the only place requests are retried.
+
+Limits are configured per provider with HITCHCOCK_RATE_LIMIT_<PROVIDER>,
+e.g. ``HITCHCOCK_RATE_LIMIT_OPENAI="rate=10,burst=20,concurrency=32"``.
+"""
+import asyncio
+import email.utils
+import itertools
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+R = TypeVar("R")
+
+# Status codes that mean "slow down and try again"
+THROTTLE_STATUSES = frozenset({429, 500, 502, 503, 504, 529})
+# Status codes worth retrying that say nothing about load (request timeout, conflict)
+TRANSIENT_STATUSES = frozenset({408, 409})
+# Connection and timeout errors of OpenAI, httpx, requests and aiohttp, matched by
+# class name (anywhere in the class hierarchy) so none of them has to be imported
+TRANSIENT_ERRORS = frozenset({
+    "APIConnectionError", "ConnectionError", "Timeout", "TimeoutError",
+    "TimeoutException", "NetworkError", "ClientConnectionError",
+})
+
+# Seconds between checks while waiting for a free slot from async code
+ASYNC_POLL_INTERVAL = 0.05
+MAX_BACKOFF = 60.0
+
+
+@dataclass(frozen=True)
+class Limits:
+    """Rate and concurrency limits of one provider"""
+
+    rate: float = 5.0  # requests per second, sustained
+    burst: int = 10  # requests that may start back to back
+    concurrency: int = 8  # upper bound of the adaptive limit on requests in flight
+    max_retries: int = 5
+    backoff: float = 1.0  # first backoff in seconds without a Retry-After, doubled per retry
+
+
+DEFAULT_LIMITS: Dict[str, Limits] = {
+    "openai": Limits(rate=8.0, burst=16, concurrency=16),
+    "fal": Limits(rate=2.0, burst=4, concurrency=4),
+    "elevenlabs": Limits(rate=2.0, burst=2, concurrency=2),
+}
+
+
+def limits_from_env(provider: str) -> Limits:
+    """Default limits of ``provider`` with any overrides from the environment"""
+    limits = DEFAULT_LIMITS.get(provider, Limits())
+    spec = os.getenv(f"HITCHCOCK_RATE_LIMIT_{provider.upper()}", "")
+    overrides = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        if name not in Limits.__dataclass_fields__:
+            raise ValueError(f"Unknown rate limit setting {name!r} for {provider}")
+        overrides[name] = type(getattr(limits, name))(value)
+    return replace(limits, **overrides)
+
+
+def _retry_after(headers: Any) -> Optional[float]:
+    """Seconds to wait according to Retry-After (or OpenAI's retry-after-ms) headers"""
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def throttle_status(error: BaseException) -> Optional[Tuple[int, Optional[float]]]:
+    """Status code and Retry-After of a 429/5xx error from OpenAI, httpx or requests.
+
+    Wrapped errors (e.g. instructor's) are followed through their causes.
+    Returns None for any other error.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        if status in THROTTLE_STATUSES:
+            return status, _retry_after(getattr(response, "headers", None))
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether ``error`` (or an error it wraps) is a connection error, timeout, 408 or 409"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        if status in TRANSIENT_STATUSES:
+            return True
+        if any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _response_throttle(result: Any) -> Optional[Tuple[int, Optional[float]]]:
+    """Status and Retry-After of an HTTP response that signals throttling, for clients that don't raise"""
+    status = getattr(result, "status_code", None)
+    if status in THROTTLE_STATUSES and hasattr(result, "headers"):
+        return status, _retry_after(result.headers)
+    return None
+
+
+class AdaptiveLimiter:
+    """Token bucket plus AIMD concurrency limit for one provider, shared across threads and event loops"""
+
+    def __init__(self, provider: str, limits: Optional[Limits] = None):
+        self.provider = provider
+        self.limits = limits or limits_from_env(provider)
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._tokens = float(self.limits.burst)
+        self._refilled_at = time.monotonic()
+        # Start half way up and let successes find the provider's real limit
+        self._limit = max(1.0, self.limits.concurrency / 2)
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._next_decrease = 0.0
+        self.throttled = 0
+
+    @property
+    def concurrency(self) -> int:
+        """Requests currently allowed in flight"""
+        return int(self._limit)
+
+    def _try_acquire(self) -> float:
+        """Take a slot and a token and return 0, or return how long to wait (caller holds the lock)"""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= int(self._limit):
+            return ASYNC_POLL_INTERVAL
+        self._tokens = min(self.limits.burst, self._tokens + (now - self._refilled_at) * self.limits.rate)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.limits.rate
+        self._tokens -= 1
+        self._in_flight += 1
+        return 0.0
+
+    def acquire(self) -> None:
+        """Block until a request may start"""
+        with self._lock:
+            while True:
+                wait = self._try_acquire()
+                if not wait:
+                    return
+                self._released.wait(wait)
+
+    async def aacquire(self) -> None:
+        """Wait without blocking the event loop until a request may start"""
+        while True:
+            with self._lock:
+                wait = self._try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, throttle: Optional[Tuple[int, Optional[float]]] = None, attempt: int = 0,
+                succeeded: bool = True) -> float:
+        """Finish a request; on a throttle, back off and return the seconds to wait before retrying.
+
+        Only successes raise the concurrency limit; other errors leave it alone.
+        """
+        with self._lock:
+            self._in_flight -= 1
+            self._released.notify_all()
+            if throttle is None:
+                if succeeded:
+                    self._limit = min(float(self.limits.concurrency), self._limit + 1 / self._limit)
+                return 0.0
+            self.throttled += 1
+            _, retry_after = throttle
+            if retry_after is None:
+                retry_after = self.backoff(attempt)
+            now = time.monotonic()
+            # Calls in flight when the provider pushed back share one decrease
+            if now >= self._next_decrease:
+                self._limit = max(1.0, self._limit / 2)
+                self._next_decrease = now + max(retry_after, 1.0)
+            self._paused_until = max(self._paused_until, now + retry_after)
+            return retry_after
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait before retry number ``attempt`` + 1 when the provider gave no Retry-After"""
+        # Full jitter keeps the callers that failed together from retrying together
+        return random.uniform(0, min(MAX_BACKOFF, self.limits.backoff * 2 ** attempt))
+
+    def _finish(self, attempt: int, error: Optional[Exception] = None, result: Any = None) -> Optional[float]:
+        """Release a finished attempt; return the seconds to sleep before retrying, or None to stop.
+
+        Throttles pause the whole provider (see ``release``), so their retry
+        only has to wait for a slot; transient errors back off on their own.
+        """
+        if error is None:
+            throttle = _response_throttle(result)
+            status = getattr(result, "status_code", None) if hasattr(result, "headers") else None
+            transient = throttle is None and status in TRANSIENT_STATUSES
+            self.release(throttle, attempt, succeeded=throttle is None and not transient)
+        else:
+            throttle = throttle_status(error)
+            transient = throttle is None and is_transient(error)
+            self.release(throttle, attempt, succeeded=False)
+        if attempt == self.limits.max_retries or not (throttle or transient):
+            return None
+        return self.backoff(attempt) if transient else 0.0
+
+    def call(self, fn: Callable[..., R], *args: Any,
+             on_retry: Optional[Callable[[], None]] = None, **kwargs: Any) -> R:
+        """Call ``fn`` within the limits, retrying on 429/5xx and transient errors.
+
+        ``on_retry`` is called before every retry. HTTP responses returned
+        with a throttling or transient status (e.g. by ``requests``) are
+        retried too; the last one is returned as is for the caller to handle.
+        """
+        for attempt in itertools.count():
+            self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                wait = self._finish(attempt, error=e)
+                if wait is None:
+                    raise
+            except BaseException:
+                self.release(succeeded=False)
+                raise
+            else:
+                wait = self._finish(attempt, result=result)
+                if wait is None:
+                    return result
+            if on_retry:
+                on_retry()
+            time.sleep(wait)
+
+    async def acall(self, fn: Callable[..., Awaitable[R]], *args: Any,
+                    on_retry: Optional[Callable[[], None]] = None, **kwargs: Any) -> R:
+        """``call`` for a coroutine function"""
+        for attempt in itertools.count():
+            await self.aacquire()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                wait = self._finish(attempt, error=e)
+                if wait is None:
+                    raise
+            except BaseException:
+                # Cancelled while in flight
+                self.release(succeeded=False)
+                raise
+            else:
+                wait = self._finish(attempt, result=result)
+                if wait is None:
+                    return result
+            if on_retry:
+                on_retry()
+            await asyncio.sleep(wait)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> AdaptiveLimiter:
+    """The process-wide limiter of ``provider``, created from the environment on first use"""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = _limiters[provider] = AdaptiveLimiter(provider)
+        return limiter
@@ -1,46 +1,158 @@
 import os
-from typing import List, TYPE_CHECKING
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
 # TYPE CHECKING
 if TYPE_CHECKING:
     from .models import ScriptScene, SceneAnalysis, VisualPlan, ShotImageSpec
-from .db_client import StoryboardDBClient
+from .db_client import ITER_BATCH_SIZE, Change, SearchResult, StoryboardDBClient, WriteStats
+from . import workspace
+
+# Loaded model lists per database file, project and table, shared by every
+# StoryboardStorage in the process: {(db_path, project_id): {table: (change_token, models)}}
+_read_caches: Dict[Tuple[str, str], Dict[str, Tuple[Tuple[int, int, int], List[Any]]]] = {}
 
 class StoryboardStorage:
-    """Handles persistent storage for storyboard pipeline data"""
-    
-    def __init__(self, storage_dir: str = "data/storyboard"):
+    """Handles persistent storage for storyboard pipeline data.
+
+    ``load_*`` calls are served from an in-process cache until the table is
+    written, here or by any other connection or process. Cached models are
+    shared between callers, so treat them as read-only and save changes back
+    through ``save_*``; pass ``use_cache=False`` to always reload. ``iter_*``
+    calls bypass the cache and stream from the database in bounded batches,
+    for projects too large to hold in memory.
+
+    All data belongs to ``project_id`` (see ``StoryboardDBClient``).
+    ``storage_dir`` defaults to the active run workspace (see ``workspace``).
+    """
+
+    def __init__(self, storage_dir: Optional[str] = None, use_cache: bool = True,
+                 project_id: Optional[str] = None):
+        storage_dir = storage_dir or workspace.storage_dir()
         self.storage_dir = storage_dir
         os.makedirs(storage_dir, exist_ok=True)
-        self.db = StoryboardDBClient(os.path.join(storage_dir, "storyboard.db"))
-    
-    def save_scenes(self, scenes: List["ScriptScene"]) -> None:
+        self.db = StoryboardDBClient(os.path.join(storage_dir, workspace.DB_FILENAME), project_id=project_id)
+        self.project_id = self.db.project_id
+        self._cache = (
+            _read_caches.setdefault((os.path.abspath(self.db.db_path), self.project_id), {})
+            if use_cache else None
+        )
+
+    def _cached(self, table: str, loader: Callable[[], List[Any]]) -> List[Any]:
+        """Return the cached models for ``table``, reloading them if it changed"""
+        if self._cache is None:
+            return loader()
+        # Take the token before loading so a concurrent write invalidates this entry
+        token = self.db.change_token(table)
+        entry = self._cache.get(table)
+        if entry is None or entry[0] != token:
+            entry = (token, loader())
+            self._cache[table] = entry
+        return list(entry[1])
+
+    def save_scenes(self, scenes: List["ScriptScene"]) -> WriteStats:
         """Save scene data to database"""
-        self.db.save_scenes(scenes)
-            
+        return self.db.save_scenes(scenes)
+
     def load_scenes(self) -> List["ScriptScene"]:
         """Load scene data from database"""
-        return self.db.load_scenes()
-            
-    def save_scene_analyses(self, analyses: List["SceneAnalysis"]) -> None:
-        """Save scene analyses to database"""
-        self.db.save_scene_analyses(analyses)
-            
+        return self._cached("scenes", self.db.load_scenes)
+
+    def iter_scenes(self, batch_size: int = ITER_BATCH_SIZE) -> Iterator["ScriptScene"]:
+        """Stream scenes from database, ``batch_size`` at a time"""
+        return self.db.iter_scenes(batch_size)
+
+    def save_scene_analyses(self, analyses: List["SceneAnalysis"],
+                            input_hashes: Optional[Dict[str, Optional[str]]] = None) -> WriteStats:
+        """Save scene analyses, with the hashes of the scenes they were made from"""
+        return self.db.save_scene_analyses(analyses, input_hashes)
+
     def load_scene_analyses(self) -> List["SceneAnalysis"]:
         """Load scene analyses from database"""
-        return self.db.load_scene_analyses()
-            
-    def save_visual_plans(self, plans: List["VisualPlan"]) -> None:
-        """Save visual plans to database"""
-        self.db.save_visual_plans(plans)
-            
+        return self._cached("scene_analyses", self.db.load_scene_analyses)
+
+    def iter_scene_analyses(self, batch_size: int = ITER_BATCH_SIZE) -> Iterator["SceneAnalysis"]:
+        """Stream scene analyses from database, ``batch_size`` at a time"""
+        return self.db.iter_scene_analyses(batch_size)
+
+    def save_visual_plans(self, plans: List["VisualPlan"],
+                          input_hashes: Optional[Dict[str, Optional[str]]] = None) -> WriteStats:
+        """Save visual plans, with the hashes of the analyses they were made from"""
+        return self.db.save_visual_plans(plans, input_hashes)
+
+    def save_analyses_and_plans(self, analyses: List["SceneAnalysis"], plans: List["VisualPlan"],
+                                input_hashes: Optional[Dict[str, Optional[str]]] = None) -> WriteStats:
+        """Save scene analyses together with the visual plans made from them, atomically"""
+        return self.db.save_analyses_and_plans(analyses, plans, input_hashes)
+
     def load_visual_plans(self) -> List["VisualPlan"]:
         """Load visual plans from database"""
-        return self.db.load_visual_plans()
+        return self._cached("visual_plans", self.db.load_visual_plans)
+
+    def iter_visual_plans(self, batch_size: int = ITER_BATCH_SIZE) -> Iterator["VisualPlan"]:
+        """Stream visual plans from database, ``batch_size`` at a time"""
+        return self.db.iter_visual_plans(batch_size)
 
-    def save_shot_image_specs(self, specs: List["ShotImageSpec"]) -> None:
+    def save_shot_image_specs(self, specs: List["ShotImageSpec"]) -> WriteStats:
         """Save shot image specifications to database"""
-        self.db.save_shot_image_specs(specs)
-            
+        return self.db.save_shot_image_specs(specs)
+
+    def derive_shot_image_specs(self, scene_ids: Optional[Sequence[str]] = None) -> WriteStats:
+        """Build and save the shot image specs of analyzed, planned scenes in the database"""
+        return self.db.derive_shot_image_specs(scene_ids)
+
+    def stage_inputs(self, stage: str, only_stale: bool = True) -> Dict[str, Optional[str]]:
+        """Scenes a pipeline stage would regenerate, read fresh, with their input hashes"""
+        return self.db.stage_inputs(stage, only_stale)
+
     def load_shot_image_specs(self) -> List["ShotImageSpec"]:
         """Load shot image specifications from database"""
-        return self.db.load_shot_image_specs() 
\ No newline at end of file
+        return self._cached("shot_image_specs", self.db.load_shot_image_specs)
+
+    def iter_shot_image_specs(self, batch_size: int = ITER_BATCH_SIZE) -> Iterator["ShotImageSpec"]:
+        """Stream shot image specs from database, ``batch_size`` at a time"""
+        return self.db.iter_shot_image_specs(batch_size)
+
+    def save_script_characters(self, characters: List[Dict[str, str]]) -> WriteStats:
+        """Register characters, updating those already saved under the same name"""
+        return self.db.save_script_characters(characters)
+
+    def load_script_characters(self) -> List[Dict[str, str]]:
+        """Load all character information from database"""
+        return self._cached("script_characters", self.db.load_script_characters)
+
+    def get_script_characters(self, names: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        """Look up characters by name, keyed by normalized name"""
+        return self.db.get_script_characters(names)
+
+    def get_all_scene_statuses(self) -> List[Dict[str, Any]]:
+        """Per-scene pipeline progress, read fresh from the database on every call"""
+        return self.db.get_all_scene_statuses()
+
+    def record_rendered_asset(self, scene_id: str, kind: str, path: str,
+                              shot_id: Optional[str] = None) -> None:
+        """Record a rendered ``"image"`` (per shot) or ``"audio"`` (per scene) file"""
+        self.db.record_rendered_asset(scene_id, kind, path, shot_id)
+
+    def changes_since(self, cursor: int = 0,
+                      tables: Optional[Sequence[str]] = None) -> Tuple[List[Change], int]:
+        """Rows changed after change-log position ``cursor``, and the next cursor"""
+        return self.db.changes_since(cursor, tables)
+
+    def get_consumer_cursor(self, consumer: str) -> Optional[int]:
+        """Change-log position ``consumer`` last saved, None if it never saved one"""
+        return self.db.get_consumer_cursor(consumer)
+
+    def save_consumer_cursor(self, consumer: str, cursor: int) -> None:
+        """Record that ``consumer`` has processed every change up to ``cursor``"""
+        self.db.save_consumer_cursor(consumer, cursor)
+
+    def prune_change_log(self) -> int:
+        """Delete the change-log entries every saved consumer cursor has passed"""
+        return self.db.prune_change_log()
+
+    def search(self, query: str, kinds: Optional[Sequence[str]] = None,
+               limit: int = 20) -> List[SearchResult]:
+        """Ranked full-text search over scenes, shots and characters.
+
+        ``kinds`` narrows the search to any of "scene", "shot" and "character".
+        """
+        return self.db.search(query, kinds, limit)
@@ -1,27 +1,96 @@
-from typing import Dict, List
-import instructor
-from openai import OpenAI
+import asyncio
+import contextvars
+import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple, TypeVar
+import threading
 from agents.story_boarder.storage import StoryboardStorage
+from agents.story_boarder.db_client import WriteStats
+from agents.story_boarder.llm_cache import acached_create, cached_create
+from agents.story_boarder.llm_usage import instructor_client, usage_tags
 from pathlib import Path
-from .models import ScriptScene, Shot, SceneAnalysis, VisualPlan, ShotImageSpec
+from .models import ScriptScene, Shot, SceneAnalysis, SceneAnalysisAndPlan, VisualPlan, ShotImageSpec
 
-# Initialize storage
-storage = StoryboardStorage()
+T = TypeVar("T")
+R = TypeVar("R")
 
-def plan_storyboard_scenes() -> str:
+# LLM calls a stage runs at once, one per scene
+DEFAULT_CONCURRENCY = 8
+
+# Created on first use, so importing the tools opens no database
+_storage: Optional[StoryboardStorage] = None
+_storage_lock = threading.Lock()
+
+def get_storage() -> StoryboardStorage:
+    """Storage shared by the tools, opened on first use in the active workspace"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = StoryboardStorage()
+        return _storage
+
+def _instructor_client(async_client: bool = False):
+    """Instructor OpenAI client; openai and instructor are imported on first call"""
+    return instructor_client(async_client)
+
+async def _gather_bounded(items: List[T], worker: Callable[[T], Awaitable[R]],
+                          max_concurrency: int) -> List[R]:
+    """Run ``worker`` over ``items`` with at most ``max_concurrency`` running at once.
+
+    Results are returned in the order of ``items``, whatever order they finish in.
     """
-    Break down script into scenes and identify important ones to storyboard.
-    Saves scenes to storage instead of returning them.
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def bounded(item: T) -> R:
+        async with semaphore:
+            return await worker(item)
+
+    return await asyncio.gather(*(bounded(item) for item in items))
+
+def _run_async(coroutine: Awaitable[R]) -> R:
+    """Run a coroutine to completion from synchronous tool code.
+
+    Tools are called synchronously, possibly from inside the agent's running
+    event loop, so in that case the coroutine gets its own loop on a worker thread,
+    carrying over the caller's context (e.g. its LLM usage tags).
     """
-    # get script text from file
-    with open("data/script_writer/script.txt", "r") as f:
-        script_text = f.read()
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
 
-    # Initialize OpenAI client with instructor
-    client = instructor.patch(OpenAI())
-    
-    # Create the prompt for scene breakdown
-    prompt = f"""
+SCENE_BREAKDOWN_SYSTEM_PROMPT = "You are a professional script analyst breaking down scripts into structured scene information."
+
+# Scripts longer than this many characters are broken down in chunks
+DEFAULT_CHUNK_CHARS = 12000
+
+# Scene blocks of the previous chunk repeated at the start of the next one
+CHUNK_OVERLAP_BLOCKS = 1
+
+# Screenplay sluglines ("INT. KITCHEN - NIGHT", "EXT.", "INT/EXT", "SCENE 12")
+SLUGLINE = re.compile(r"^[ \t]*(?:INT\.|EXT\.|INT\./EXT\.|INT/EXT|I/E\.?|SCENE\s+\d+)", re.MULTILINE)
+
+class ScriptChunk(NamedTuple):
+    """Part of a script broken down in one call"""
+    index: int
+    text: str     # scene blocks to break down
+    context: str  # end of the previous chunk, for continuity only
+
+def _scene_breakdown_prompt(script_text: str, context: str = "") -> str:
+    """Prompt asking for the scene breakdown of a script, or of one part of it"""
+    if context:
+        script_text = f"""
+    The script is split into parts. For continuity, this part follows:
+    {context}
+
+    Only break down the part below, starting from its first line:
+    {script_text}
+    """
+    return f"""
     Analyze this script and break it down into scenes. For each scene, identify:
     - A unique scene ID
     - A descriptive title
@@ -33,53 +102,173 @@ def plan_storyboard_scenes() -> str:
     Script to analyze:
     {script_text}
     """
+
+def _fallback_scenes(script_text: str) -> List[ScriptScene]:
+    """Minimal scene list saved when the breakdown fails"""
+    return [
+        ScriptScene(
+            scene_id="error_001",
+            title="Error Processing Scene",
+            script_text=script_text[:100] + "...",  # First 100 chars
+            importance="medium",
+            characters=["Unknown"],
+            description="Error occurred during scene analysis"
+        )
+    ]
+
+def _scene_blocks(script_text: str) -> List[str]:
+    """Split a script on sluglines, or on blank lines if it has none"""
+    starts = [match.start() for match in SLUGLINE.finditer(script_text)]
+    if starts:
+        if starts[0] > 0:
+            starts.insert(0, 0)
+        bounds = starts + [len(script_text)]
+        blocks = [script_text[a:b] for a, b in zip(bounds, bounds[1:])]
+    else:
+        blocks = re.split(r"\n\s*\n", script_text)
+    return [block.strip() for block in blocks if block.strip()]
+
+def split_script(script_text: str, max_chars: int = DEFAULT_CHUNK_CHARS,
+                 overlap: int = CHUNK_OVERLAP_BLOCKS) -> List[ScriptChunk]:
+    """Pack whole scene blocks into chunks of about ``max_chars`` characters.
+
+    A block longer than ``max_chars`` gets a chunk to itself. Each chunk
+    after the first carries the last ``overlap`` blocks before it as context.
+    """
+    groups: List[List[str]] = []
+    size = 0
+    for block in _scene_blocks(script_text):
+        if groups and size + len(block) <= max_chars:
+            groups[-1].append(block)
+            size += len(block) + 2
+        else:
+            groups.append([block])
+            size = len(block)
+    chunks = []
+    previous: List[str] = []
+    for index, group in enumerate(groups):
+        context = "\n\n".join(previous[-overlap:]) if overlap else ""
+        chunks.append(ScriptChunk(index, "\n\n".join(group), context))
+        previous = group
+    return chunks
+
+def _normalized_text(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+def _scene_heading(scene: ScriptScene) -> str:
+    """A scene's slugline, or its title if its script text does not start with one"""
+    first_line = scene.script_text.strip().split("\n", 1)[0]
+    return first_line if SLUGLINE.match(first_line) else scene.title
+
+def assign_scene_ids(scenes: List[ScriptScene]) -> None:
+    """Give scenes ids made from their heading, e.g. scene_int-kitchen-night.
+
+    A heading used again later in the script gets its occurrence number
+    (scene_int-kitchen-night--2). Ids only depend on the scene's own heading
+    and on the scenes before it with the same heading, so inserting or
+    removing another scene leaves them, and the hashes stored under them, alone.
+    """
+    occurrences: Dict[str, int] = {}
+    for scene in scenes:
+        slug = "-".join(re.findall(r"[a-z0-9]+", _scene_heading(scene).lower()))[:48].strip("-") or "untitled"
+        occurrences[slug] = occurrences.get(slug, 0) + 1
+        count = occurrences[slug]
+        # Words are joined by single hyphens, so "--" never clashes with a heading
+        scene.scene_id = f"scene_{slug}" if count == 1 else f"scene_{slug}--{count}"
+
+def merge_chunk_scenes(chunks: List[ScriptChunk], chunk_scenes: List[List[ScriptScene]]) -> List[ScriptScene]:
+    """Concatenate per-chunk scene lists in chunk order and give them stable ids.
+
+    A scene is dropped when its script text equals (ignoring case and
+    whitespace) that of a previous-chunk scene from the overlap, i.e. one
+    whose text is part of the chunk's context. The result depends only on
+    the chunk results, not on the order the chunks finished in.
+    """
+    merged: List[ScriptScene] = []
+    previous: List[ScriptScene] = []
+    for chunk, scenes in zip(chunks, chunk_scenes):
+        context = _normalized_text(chunk.context)
+        overlap = set()
+        if context:
+            overlap = {
+                text for text in (_normalized_text(scene.script_text) for scene in previous)
+                if text and text in context
+            }
+        merged.extend(scene for scene in scenes if _normalized_text(scene.script_text) not in overlap)
+        previous = scenes
+    assign_scene_ids(merged)
+    return merged
+
+async def _break_down_chunks(chunks: List[ScriptChunk], max_concurrency: int) -> List[List[ScriptScene]]:
+    """Break down script chunks concurrently, one scene list per chunk"""
+    client = _instructor_client(async_client=True)
+
+    async def break_down(chunk: ScriptChunk) -> List[ScriptScene]:
+        try:
+            return await acached_create(
+                client,
+                model="gpt-4o-mini",
+                response_model=List[ScriptScene],
+                messages=[
+                    {"role": "system", "content": SCENE_BREAKDOWN_SYSTEM_PROMPT},
+                    {"role": "user", "content": _scene_breakdown_prompt(chunk.text, chunk.context)}
+                ]
+            )
+        except Exception as e:
+            print(f"Error analyzing script part {chunk.index + 1}: {e}")
+            return _fallback_scenes(chunk.text)
+
+    return await _gather_bounded(chunks, break_down, max_concurrency)
+
+@usage_tags(agent="story_boarder", tool="plan_storyboard_scenes")
+def plan_storyboard_scenes(chunked: Optional[bool] = None, max_chunk_chars: int = DEFAULT_CHUNK_CHARS,
+                           max_concurrency: int = DEFAULT_CONCURRENCY) -> str:
+    """
+    Break down script into scenes and identify important ones to storyboard.
+    Saves scenes to storage instead of returning them.
+    In chunked mode (the default for scripts over max_chunk_chars) the script
+    is split on scene boundaries, the chunks are broken down concurrently and
+    the scenes are merged in script order, with ids made from their headings
+    (see assign_scene_ids) so they stay put when the script is edited.
+    """
+    # get script text from file
+    with open("data/script_writer/script.txt", "r") as f:
+        script_text = f.read()
+
+    if chunked is None:
+        chunked = len(script_text) > max_chunk_chars
+    if chunked:
+        chunks = split_script(script_text, max_chunk_chars)
+        scenes = merge_chunk_scenes(chunks, _run_async(_break_down_chunks(chunks, max_concurrency)))
+        stats = get_storage().save_scenes(scenes)
+        return f"I have saved {len(scenes)} scenes from {len(chunks)} script parts to the database ({stats})"
+
+    # Initialize OpenAI client with instructor
+    client = _instructor_client()
     
     try:
         # Use OpenAI to generate scene breakdowns
-        response = client.chat.completions.create(
+        scenes = cached_create(
+            client,
             model="gpt-4o-mini",
             response_model=List[ScriptScene],
             messages=[
-                {"role": "system", "content": "You are a professional script analyst breaking down scripts into structured scene information."},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": SCENE_BREAKDOWN_SYSTEM_PROMPT},
+                {"role": "user", "content": _scene_breakdown_prompt(script_text)}
             ]
         )
-        # Save scenes to storage
-        storage.save_scenes(response)
-        
     except Exception as e:
         print(f"Error analyzing script: {e}")
         # Save minimal scene list as fallback
-        fallback_scenes = [
-            ScriptScene(
-                scene_id="error_001",
-                title="Error Processing Scene",
-                script_text=script_text[:100] + "...",  # First 100 chars
-                importance="medium",
-                characters=["Unknown"],
-                description="Error occurred during scene analysis"
-            )
-        ]
-        storage.save_scenes(fallback_scenes)
+        scenes = _fallback_scenes(script_text)
+    # Save scenes to storage
+    get_storage().save_scenes(scenes)
 
-    return f"I have saved {len(response)} scenes to the database"
+    return f"I have saved {len(scenes)} scenes to the database"
 
-def analyze_script_scenes() -> str:
-    """
-    Analyze scenes to identify key moments and plan shots.
-    Loads scenes from storage and saves analyses back to storage.
-    """
-    client = instructor.patch(OpenAI())
-    analyses = []
-    
-    # Load scenes from storage
-    scenes = storage.load_scenes()
-
-    for scene in scenes:
-        # if scene.importance in ["critical", "high"]:  # Only analyze important scenes
-        if True:
-            # Create prompt for scene analysis
-            prompt = f"""
+def scene_analysis_prompt(scene: ScriptScene) -> str:
+    """Prompt asking for the key moments and shot sequence of one scene"""
+    return f"""
             Analyze this scene and break it down into key moments and shots. The scene information is:
             
             Title: {scene.title}
@@ -102,66 +291,41 @@ def analyze_script_scenes() -> str:
             Ensure the shots flow together logically and capture the scene's emotional impact.
             """
 
-            try:
-                # Get scene analysis from OpenAI
-                analysis = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    response_model=SceneAnalysis,
-                    messages=[
-                        {"role": "system", "content": "You are a professional storyboard artist and cinematographer breaking down scenes into detailed shot sequences."},
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                analyses.append(analysis)
-            except Exception as e:
-                print(f"Error analyzing scene {scene.scene_id}: {e}")
-                # Create a basic fallback analysis
-                fallback = SceneAnalysis(
-                    scene_id=scene.scene_id,
-                    key_moments=["Scene start", "Main action", "Scene end"],
-                    shots=[
-                        Shot(
-                            type="establishing",
-                            camera="wide shot",
-                            description=f"Establish the scene: {scene.description}",
-                            duration="3-4 seconds",
-                            camera_movement="static",
-                            focus="Overall setting"
-                        ),
-                        Shot(
-                            type="medium",
-                            camera="medium shot",
-                            description="Focus on main character action",
-                            duration="4-5 seconds",
-                            camera_movement="static",
-                            focus="Main character"
-                        )
-                    ],
-                    setting=scene.description,
-                    mood="neutral",
-                    pacing="medium",
-                    time_of_day="day"
-                )
-                analyses.append(fallback)
-
-    # Save analyses to storage
-    storage.save_scene_analyses(analyses)
-
-    return f"I have saved {len(analyses)} scene analyses to the database"
-
-def plan_visual_elements() -> str:
-    """
-    Plan visual elements for each scene based on their analysis.
-    Loads scene analyses from storage and saves visual plans back to storage.
-    """
-    client = instructor.patch(OpenAI())
-    visual_plans = []
-    
-    # Load scene analyses from storage
-    scene_analyses = storage.load_scene_analyses()
+def _fallback_scene_analysis(scene: ScriptScene) -> SceneAnalysis:
+    """Basic two-shot analysis saved when a scene cannot be analyzed"""
+    return SceneAnalysis(
+        scene_id=scene.scene_id,
+        key_moments=["Scene start", "Main action", "Scene end"],
+        shots=[
+            Shot(
+                type="establishing",
+                camera="wide shot",
+                description=f"Establish the scene: {scene.description}",
+                duration="3-4 seconds",
+                camera_movement="static",
+                focus="Overall setting"
+            ),
+            Shot(
+                type="medium",
+                camera="medium shot",
+                description="Focus on main character action",
+                duration="4-5 seconds",
+                camera_movement="static",
+                focus="Main character"
+            )
+        ],
+        setting=scene.description,
+        mood="neutral",
+        pacing="medium",
+        time_of_day="day"
+    )
 
-    for analysis in scene_analyses:
-        prompt = f"""
+ANALYSIS_SYSTEM_PROMPT = "You are a professional storyboard artist and cinematographer breaking down scenes into detailed shot sequences."
+VISUAL_PLAN_SYSTEM_PROMPT = "You are a cinematographer planning visual elements for film scenes."
+
+def visual_plan_prompt(analysis: SceneAnalysis) -> str:
+    """Prompt asking for the lighting, props, atmosphere and effects of one scene"""
+    return f"""
         Plan the visual elements for this scene:
         Setting: {analysis.setting}
         Mood: {analysis.mood}
@@ -175,89 +339,245 @@ def plan_visual_elements() -> str:
         4. Any special effects needed
         """
 
+def _analysis_and_plan_prompt(scene: ScriptScene) -> str:
+    """Prompt asking for a scene's analysis and visual plan in one response"""
+    return scene_analysis_prompt(scene) + """
+            Then, as the scene's cinematographer, plan its visual elements to suit
+            the shots you designed:
+            1. Lighting setup appropriate for the setting and mood
+            2. Key props needed for the scene
+            3. Overall atmosphere description
+            4. Any special effects needed
+            """
+
+def _fallback_visual_plan(analysis: SceneAnalysis) -> VisualPlan:
+    """Generic plan saved when a scene's visuals cannot be planned"""
+    return VisualPlan(
+        scene_id=analysis.scene_id,
+        lighting=f"Standard {analysis.time_of_day} lighting",
+        props=["Basic set dressing"],
+        atmosphere=analysis.mood,
+        special_effects=[]
+    )
+
+async def _request_analysis(client, scene: ScriptScene, bypass_cache: bool = False) -> SceneAnalysis:
+    """One scene analysis call"""
+    with usage_tags(scene_id=scene.scene_id):
+        analysis = await acached_create(
+            client,
+            model="gpt-4o-mini",
+            response_model=SceneAnalysis,
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": scene_analysis_prompt(scene)}
+            ],
+            bypass=bypass_cache
+        )
+    # Key the analysis by the scene we asked about so it always
+    # satisfies the scene_analyses -> scenes foreign key
+    analysis.scene_id = scene.scene_id
+    return analysis
+
+async def _request_visual_plan(client, analysis: SceneAnalysis, bypass_cache: bool = False) -> VisualPlan:
+    """One visual planning call, from the scene's analysis"""
+    with usage_tags(scene_id=analysis.scene_id):
+        plan = await acached_create(
+            client,
+            model="gpt-4o-mini",
+            response_model=VisualPlan,
+            messages=[
+                {"role": "system", "content": VISUAL_PLAN_SYSTEM_PROMPT},
+                {"role": "user", "content": visual_plan_prompt(analysis)}
+            ],
+            bypass=bypass_cache
+        )
+    plan.scene_id = analysis.scene_id
+    return plan
+
+async def _request_analysis_and_plan(client, scene: ScriptScene,
+                                     bypass_cache: bool = False) -> SceneAnalysisAndPlan:
+    """One fused call returning a scene's analysis and visual plan"""
+    with usage_tags(scene_id=scene.scene_id):
+        result = await acached_create(
+            client,
+            model="gpt-4o-mini",
+            response_model=SceneAnalysisAndPlan,
+            messages=[
+                {"role": "system", "content": f"{ANALYSIS_SYSTEM_PROMPT} {VISUAL_PLAN_SYSTEM_PROMPT}"},
+                {"role": "user", "content": _analysis_and_plan_prompt(scene)}
+            ],
+            bypass=bypass_cache
+        )
+    result.analysis.scene_id = scene.scene_id
+    result.visual_plan.scene_id = scene.scene_id
+    return result
+
+async def _analyze_scenes(scenes: List[ScriptScene], input_hashes: Dict[str, Optional[str]],
+                          max_concurrency: int) -> Tuple[List[SceneAnalysis], WriteStats]:
+    """Analyze scenes concurrently, saving each analysis as soon as it is ready"""
+    client = _instructor_client(async_client=True)
+    stats = WriteStats()
+
+    async def analyze(scene: ScriptScene) -> SceneAnalysis:
+        nonlocal stats
+        hashes = input_hashes
         try:
-            plan = client.chat.completions.create(
-                model="gpt-4o-mini",
-                response_model=VisualPlan,
-                messages=[
-                    {"role": "system", "content": "You are a cinematographer planning visual elements for film scenes."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            visual_plans.append(plan)
+            # Get scene analysis from OpenAI
+            analysis = await _request_analysis(client, scene)
+        except Exception as e:
+            print(f"Error analyzing scene {scene.scene_id}: {e}")
+            analysis = _fallback_scene_analysis(scene)
+            # Saved without an input hash, a placeholder stays stale until a real analysis replaces it
+            hashes = {}
+        # Save right away so finished scenes survive a crash later in the stage; the
+        # write runs in a worker thread so waiting on the database lock never stalls other calls
+        saved = await asyncio.to_thread(get_storage().save_scene_analyses, [analysis], hashes)
+        stats += saved
+        return analysis
+
+    analyses = await _gather_bounded(scenes, analyze, max_concurrency)
+    return analyses, stats
+
+async def _analyze_and_plan_scenes(scenes: List[ScriptScene], input_hashes: Dict[str, Optional[str]],
+                                   max_concurrency: int) -> Tuple[List[SceneAnalysis], WriteStats]:
+    """Analyze and plan scenes with one call each, saving both results of a scene together"""
+    client = _instructor_client(async_client=True)
+    stats = WriteStats()
+
+    async def analyze_and_plan(scene: ScriptScene) -> SceneAnalysis:
+        nonlocal stats
+        hashes = input_hashes
+        try:
+            result = await _request_analysis_and_plan(client, scene)
+            analysis, plan = result.analysis, result.visual_plan
+        except Exception as e:
+            print(f"Error analyzing scene {scene.scene_id}: {e}")
+            analysis = _fallback_scene_analysis(scene)
+            plan = _fallback_visual_plan(analysis)
+            hashes = {}
+        # Written in a worker thread so waiting on the database lock never stalls other calls
+        saved = await asyncio.to_thread(get_storage().save_analyses_and_plans, [analysis], [plan], hashes)
+        stats += saved
+        return analysis
+
+    analyses = await _gather_bounded(scenes, analyze_and_plan, max_concurrency)
+    return analyses, stats
+
+def _dry_run_report(action: str, stale: List[str], total: int) -> str:
+    """Message listing the scenes a stage would regenerate"""
+    listed = f": {', '.join(stale)}" if stale else ""
+    return f"Dry run: would {action} {len(stale)} of {total} scenes{listed}"
+
+@usage_tags(agent="story_boarder", tool="analyze_script_scenes")
+def analyze_script_scenes(max_concurrency: int = DEFAULT_CONCURRENCY, regenerate_all: bool = False,
+                          dry_run: bool = False, fused: bool = False) -> str:
+    """
+    Analyze scenes to identify key moments and plan shots.
+    Loads scenes from storage and saves analyses back to storage.
+    Only scenes that are new or changed since their last analysis are
+    analyzed, unless regenerate_all is set; dry_run only reports them.
+    Up to max_concurrency scenes are analyzed at once; each analysis is saved
+    as soon as it completes, and the results keep the scenes' order.
+    With fused set, each scene's visual plan comes from the same call and is
+    saved with its analysis, so plan_visual_elements has nothing left to do.
+    """
+    input_hashes = get_storage().stage_inputs("scene_analyses", only_stale=not regenerate_all)
+    # Load scenes from storage
+    scenes = get_storage().load_scenes()
+    stale = [scene for scene in scenes if scene.scene_id in input_hashes]
+    if dry_run:
+        return _dry_run_report("reanalyze", [scene.scene_id for scene in stale], len(scenes))
+
+    if fused:
+        analyses, stats = _run_async(_analyze_and_plan_scenes(stale, input_hashes, max_concurrency))
+        return f"I have saved {len(analyses)} scene analyses with their visual plans to the database ({stats})"
+    analyses, stats = _run_async(_analyze_scenes(stale, input_hashes, max_concurrency))
+
+    return f"I have saved {len(analyses)} scene analyses to the database ({stats})"
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of ``values``"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def _timing_summary(stage: str, durations: List[float], total: float) -> str:
+    """One-line latency report for a stage's LLM calls"""
+    return (
+        f"{stage}: {len(durations)} calls, p50 {_percentile(durations, 50):.2f}s, "
+        f"p95 {_percentile(durations, 95):.2f}s, total {total:.2f}s"
+    )
+
+async def _plan_visuals(analyses: List[SceneAnalysis], input_hashes: Dict[str, Optional[str]],
+                        max_concurrency: int) -> Tuple[List[VisualPlan], WriteStats, List[float]]:
+    """Plan scenes concurrently, saving each plan as soon as it is ready"""
+    client = _instructor_client(async_client=True)
+    stats = WriteStats()
+    durations: List[float] = []
+
+    async def plan_scene(analysis: SceneAnalysis) -> VisualPlan:
+        nonlocal stats
+        start = time.perf_counter()
+        hashes = input_hashes
+        try:
+            plan = await _request_visual_plan(client, analysis)
         except Exception as e:
             print(f"Error planning visuals for scene {analysis.scene_id}: {e}")
-            fallback = VisualPlan(
-                scene_id=analysis.scene_id,
-                lighting=f"Standard {analysis.time_of_day} lighting",
-                props=["Basic set dressing"],
-                atmosphere=analysis.mood,
-                special_effects=[]
-            )
-            visual_plans.append(fallback)
+            plan = _fallback_visual_plan(analysis)
+            # Saved without an input hash, a placeholder stays stale until a real plan replaces it
+            hashes = {}
+        finally:
+            durations.append(time.perf_counter() - start)
+        # Save right away so one slow or failing scene never costs the finished ones,
+        # in a worker thread so a write waiting on the database lock never stalls other calls
+        saved = await asyncio.to_thread(get_storage().save_visual_plans, [plan], hashes)
+        stats += saved
+        return plan
 
-    # Save visual plans to storage
-    storage.save_visual_plans(visual_plans)
+    plans = await _gather_bounded(analyses, plan_scene, max_concurrency)
+    return plans, stats, durations
 
-    return f"I have saved {len(visual_plans)} visual plans to the database"
+@usage_tags(agent="story_boarder", tool="plan_visual_elements")
+def plan_visual_elements(max_concurrency: int = DEFAULT_CONCURRENCY, regenerate_all: bool = False,
+                         dry_run: bool = False) -> str:
+    """
+    Plan visual elements for each scene based on their analysis.
+    Loads scene analyses from storage and saves visual plans back to storage.
+    Only scenes whose analysis is new or changed since their last plan are
+    planned, unless regenerate_all is set; dry_run only reports them.
+    Up to max_concurrency scenes are planned at once and each plan is saved as
+    soon as it completes; call latency (p50/p95) and stage time are printed.
+    """
+    input_hashes = get_storage().stage_inputs("visual_plans", only_stale=not regenerate_all)
+    # Load scene analyses from storage
+    scene_analyses = get_storage().load_scene_analyses()
+    stale = [analysis for analysis in scene_analyses if analysis.scene_id in input_hashes]
+    if dry_run:
+        return _dry_run_report("replan", [analysis.scene_id for analysis in stale], len(scene_analyses))
+
+    start = time.perf_counter()
+    visual_plans, stats, durations = _run_async(_plan_visuals(stale, input_hashes, max_concurrency))
+    print(_timing_summary("Visual planning", durations, time.perf_counter() - start))
 
-def create_shot_image_specs() -> str:
+    return f"I have saved {len(visual_plans)} visual plans to the database ({stats})"
+
+def create_shot_image_specs(regenerate_all: bool = False, dry_run: bool = False) -> str:
     """
     Creates and saves comprehensive specifications for image generation for each shot.
     Combines scene, analysis, and visual plan information to generate detailed shot specs.
-    Saves the specs to storage for use by the image generation agent.
+    The join runs inside the database, so only new or changed specs are written;
+    benchmarks.legacy_create_shot_image_specs keeps the Python version as a reference.
+    Only scenes whose scene, analysis or plan changed since their specs were
+    made are respecified, unless regenerate_all is set; dry_run only reports them.
     """
-    # Load all necessary data
-    scenes = storage.load_scenes()
-    analyses = storage.load_scene_analyses()
-    visual_plans = storage.load_visual_plans()
-    
-    # Create a lookup dictionary for scenes and visual plans
-    scene_dict = {scene.scene_id: scene for scene in scenes}
-    visual_plan_dict = {plan.scene_id: plan for plan in visual_plans}
-    
-    shot_specs = []
-    
-    # Process each scene analysis
-    for analysis in analyses:
-        scene = scene_dict.get(analysis.scene_id)
-        visual_plan = visual_plan_dict.get(analysis.scene_id)
-        
-        if not scene or not visual_plan:
-            continue
-            
-        # Process each shot in the scene
-        for i, shot in enumerate(analysis.shots):
-            # Create a unique shot ID
-            shot_id = f"{analysis.scene_id}_shot_{i+1}"
-            
-            # Combine descriptions for more context
-            combined_description = f"Scene: {scene.description}\nShot: {shot.description}"
-            
-            # Create the shot specification
-            spec = ShotImageSpec(
-                scene_id=analysis.scene_id,
-                shot_id=shot_id,
-                description=combined_description,
-                camera_specs={
-                    "type": shot.camera,
-                    "movement": shot.camera_movement,
-                    "focus": shot.focus
-                },
-                visual_elements={
-                    "lighting": visual_plan.lighting,
-                    "atmosphere": visual_plan.atmosphere,
-                    "time_of_day": analysis.time_of_day
-                },
-                props=visual_plan.props,
-                special_effects=visual_plan.special_effects,
-                characters=scene.characters
-            )
-            shot_specs.append(spec)
-    
-    # Save the shot specs to storage
-    storage.save_shot_image_specs(shot_specs)
-    return f"I have saved {len(shot_specs)} shot image specifications to the database"
+    stale = list(get_storage().stage_inputs("shot_image_specs", only_stale=not regenerate_all))
+    if dry_run:
+        total = len(get_storage().stage_inputs("shot_image_specs", only_stale=False))
+        return _dry_run_report("respecify", stale, total)
+    stats = get_storage().derive_shot_image_specs(stale)
+    return f"I have saved the shot image specifications of {len(stale)} scenes to the database ({stats})"
 
 def critique_generated_images() -> str:
     """
@@ -282,7 +602,20 @@ tools = [
                 "description": "Break down script into scenes and identify important ones",
                 "parameters": {
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "chunked": {
+                            "type": "boolean",
+                            "description": "Break the script down in concurrent chunks; defaults to on for long scripts"
+                        },
+                        "max_chunk_chars": {
+                            "type": "integer",
+                            "description": "Approximate size of each script chunk in characters"
+                        },
+                        "max_concurrency": {
+                            "type": "integer",
+                            "description": "Maximum number of chunks broken down at the same time"
+                        }
+                    },
                     "required": []
                 }
             }
@@ -297,7 +630,24 @@ tools = [
                 "description": "Analyze scenes and plan shot sequences",
                 "parameters": {
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "max_concurrency": {
+                            "type": "integer",
+                            "description": "Maximum number of scenes analyzed at the same time"
+                        },
+                        "regenerate_all": {
+                            "type": "boolean",
+                            "description": "Regenerate every scene, not only new or changed ones"
+                        },
+                        "dry_run": {
+                            "type": "boolean",
+                            "description": "Only report which scenes would be regenerated"
+                        },
+                        "fused": {
+                            "type": "boolean",
+                            "description": "Analyze and plan the visuals of each scene in one call"
+                        }
+                    },
                     "required": []
                 }
             }
@@ -312,7 +662,20 @@ tools = [
                 "description": "Plan visual elements for scenes",
                 "parameters": {
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "max_concurrency": {
+                            "type": "integer",
+                            "description": "Maximum number of scenes planned at the same time"
+                        },
+                        "regenerate_all": {
+                            "type": "boolean",
+                            "description": "Regenerate every scene, not only new or changed ones"
+                        },
+                        "dry_run": {
+                            "type": "boolean",
+                            "description": "Only report which scenes would be regenerated"
+                        }
+                    },
                     "required": []
                 }
             }
@@ -327,7 +690,16 @@ tools = [
                 "description": "Create and save comprehensive specifications for generating images for each shot",
                 "parameters": {
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "regenerate_all": {
+                            "type": "boolean",
+                            "description": "Regenerate every scene, not only new or changed ones"
+                        },
+                        "dry_run": {
+                            "type": "boolean",
+                            "description": "Only report which scenes would be regenerated"
+                        }
+                    },
                     "required": []
                 }
             }
@@ -0,0 +1,228 @@
+"""Per-run workspaces: an isolated storyboard database and output root per run.
+
+A workspace lives under ``runs/<name>/`` with its own ``storyboard/storyboard.db``
+and ``output/`` tree. Activating one points every agent in the process at it
+through the HITCHCOCK_STORAGE_DIR and HITCHCOCK_OUTPUT_DIR environment
+variables, which child processes inherit as well:
+
+    python -m agents.story_boarder.workspace create take-1
+    python -m agents.story_boarder.workspace snapshot take-1 --label planned
+    python -m agents.story_boarder.workspace branch take-1 take-2 --snapshot planned
+    HITCHCOCK_STORAGE_DIR=runs/take-2/storyboard HITCHCOCK_OUTPUT_DIR=runs/take-2/output \\
+        python control_plane.py
+
+Snapshots are taken with the online sqlite3 backup API a few pages at a time,
+so agents can keep reading and writing the run's database meanwhile.
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from .connection import BUSY_TIMEOUT
+
+DEFAULT_STORAGE_DIR = "data/storyboard"
+DEFAULT_OUTPUT_DIR = "output"
+DEFAULT_RUNS_DIR = "runs"
+
+# Pages copied per backup step; the source is only locked while a step runs
+DEFAULT_PAGES_PER_STEP = 1024
+
+DB_FILENAME = "storyboard.db"
+OUTPUT_SUBDIRS = ("images", "metadata", "audio", "videos")
+
+
+def storage_dir() -> str:
+    """Storyboard storage directory of the active workspace"""
+    return os.getenv("HITCHCOCK_STORAGE_DIR") or DEFAULT_STORAGE_DIR
+
+
+def output_dir() -> str:
+    """Root directory for rendered images, audio and video of the active workspace"""
+    return os.getenv("HITCHCOCK_OUTPUT_DIR") or DEFAULT_OUTPUT_DIR
+
+
+def backup_database(src_path: str, dst_path: str,
+                    pages_per_step: int = DEFAULT_PAGES_PER_STEP) -> None:
+    """Copy a live SQLite database with the online backup API.
+
+    The copy is made ``pages_per_step`` pages at a time and is a consistent
+    image of the source as of the end of the backup; writes made by other
+    connections during the copy make SQLite restart it. ``dst_path`` is
+    replaced if it exists.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(dst_path)), exist_ok=True)
+    tmp_path = f"{dst_path}.partial"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    src = sqlite3.connect(src_path, timeout=BUSY_TIMEOUT)
+    try:
+        dst = sqlite3.connect(tmp_path)
+        try:
+            src.backup(dst, pages=pages_per_step)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+    # Rename into place so a crash never leaves a truncated snapshot behind
+    os.replace(tmp_path, dst_path)
+
+
+@dataclass(frozen=True)
+class Workspace:
+    """Isolated database and output root for one pipeline run"""
+
+    name: str
+    root: str = DEFAULT_RUNS_DIR
+
+    def __post_init__(self):
+        if not self.name or os.sep in self.name or self.name in (".", ".."):
+            raise ValueError(f"Invalid workspace name: {self.name!r}")
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.root, self.name)
+
+    @property
+    def storage_dir(self) -> str:
+        return os.path.join(self.path, "storyboard")
+
+    @property
+    def db_path(self) -> str:
+        return os.path.join(self.storage_dir, DB_FILENAME)
+
+    @property
+    def output_dir(self) -> str:
+        return os.path.join(self.path, "output")
+
+    @property
+    def snapshots_dir(self) -> str:
+        return os.path.join(self.path, "snapshots")
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.path)
+
+    def create(self) -> "Workspace":
+        """Create the workspace directories; existing data is left alone"""
+        os.makedirs(self.storage_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        for subdir in OUTPUT_SUBDIRS:
+            os.makedirs(os.path.join(self.output_dir, subdir), exist_ok=True)
+        return self
+
+    def activate(self) -> "Workspace":
+        """Point storage and rendered output in this process (and its children) here.
+
+        Call before the agents are constructed: storage and output directories
+        are resolved when a storage client or service is created.
+        """
+        self.create()
+        os.environ["HITCHCOCK_STORAGE_DIR"] = self.storage_dir
+        os.environ["HITCHCOCK_OUTPUT_DIR"] = self.output_dir
+        # LLM usage (see llm_usage) is reported per run under the workspace name
+        os.environ["HITCHCOCK_RUN_ID"] = self.name
+        return self
+
+    def snapshot_path(self, label: str) -> str:
+        return os.path.join(self.snapshots_dir, f"{label}.db")
+
+    def snapshot(self, label: Optional[str] = None,
+                 pages_per_step: int = DEFAULT_PAGES_PER_STEP) -> str:
+        """Back up the run's database to ``snapshots/<label>.db`` and return its path"""
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Workspace {self.name!r} has no database yet")
+        label = label or datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = self.snapshot_path(label)
+        backup_database(self.db_path, path, pages_per_step)
+        return path
+
+    def list_snapshots(self) -> List[str]:
+        """Snapshot labels, oldest first"""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        paths = [
+            os.path.join(self.snapshots_dir, filename)
+            for filename in os.listdir(self.snapshots_dir)
+            if filename.endswith(".db")
+        ]
+        paths.sort(key=os.path.getmtime)
+        return [os.path.splitext(os.path.basename(path))[0] for path in paths]
+
+    def branch(self, name: str, snapshot: Optional[str] = None,
+               pages_per_step: int = DEFAULT_PAGES_PER_STEP) -> "Workspace":
+        """Start a new run from a snapshot of this one, or from its live database.
+
+        Only the database is copied; the new run renders into its own, empty
+        output root. Rows in rendered_assets keep pointing at this run's files.
+        """
+        source = self.snapshot_path(snapshot) if snapshot else self.db_path
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"No database to branch from at {source}")
+        child = Workspace(name, self.root)
+        if os.path.exists(child.db_path):
+            raise FileExistsError(f"Workspace {name!r} already has a database")
+        child.create()
+        backup_database(source, child.db_path, pages_per_step)
+        return child
+
+    def delete(self) -> None:
+        """Remove the workspace with its database, snapshots and output"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def list_workspaces(root: str = DEFAULT_RUNS_DIR) -> List[Workspace]:
+    """Workspaces under ``root``, by name"""
+    if not os.path.isdir(root):
+        return []
+    return [
+        Workspace(name, root) for name in sorted(os.listdir(root))
+        if os.path.isdir(os.path.join(root, name))
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage per-run storyboard workspaces")
+    parser.add_argument("--root", default=DEFAULT_RUNS_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    create = commands.add_parser("create")
+    create.add_argument("name")
+    snapshot = commands.add_parser("snapshot")
+    snapshot.add_argument("name")
+    snapshot.add_argument("--label")
+    snapshot.add_argument("--pages-per-step", type=int, default=DEFAULT_PAGES_PER_STEP)
+    branch = commands.add_parser("branch")
+    branch.add_argument("name")
+    branch.add_argument("new_name")
+    branch.add_argument("--snapshot")
+    branch.add_argument("--pages-per-step", type=int, default=DEFAULT_PAGES_PER_STEP)
+    delete = commands.add_parser("delete")
+    delete.add_argument("name")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for workspace in list_workspaces(args.root):
+            snapshots = ", ".join(workspace.list_snapshots()) or "no snapshots"
+            print(f"{workspace.name}: {snapshots}")
+        return
+    workspace = Workspace(args.name, args.root)
+    if args.command == "create":
+        workspace.create()
+        print(f"Created workspace at {workspace.path}; use it with "
+              f"HITCHCOCK_STORAGE_DIR={workspace.storage_dir} "
+              f"HITCHCOCK_OUTPUT_DIR={workspace.output_dir}")
+    elif args.command == "snapshot":
+        path = workspace.snapshot(args.label, args.pages_per_step)
+        print(f"Snapshot written to {path}")
+    elif args.command == "branch":
+        child = workspace.branch(args.new_name, args.snapshot, args.pages_per_step)
+        print(f"Branched {workspace.name} into {child.path}")
+    elif args.command == "delete":
+        workspace.delete()
+        print(f"Deleted workspace {workspace.name}")
+
+if __name__ == "__main__":
+    main()
@@ -24,7 +24,9 @@ app.add_middleware(
 # Get the absolute paths
 BASE_DIR = Path(__file__).resolve().parent
 PARENT_DIR = BASE_DIR.parent
-OUTPUT_DIR = PARENT_DIR / "output"
+# Serve the active run workspace (see agents.story_boarder.workspace)
+OUTPUT_DIR = PARENT_DIR / (os.getenv("HITCHCOCK_OUTPUT_DIR") or "output")
+STORAGE_DIR = PARENT_DIR / (os.getenv("HITCHCOCK_STORAGE_DIR") or "data/storyboard")
 STATIC_DIR = BASE_DIR / "static"
 
 logger.info(f"Base directory: {BASE_DIR}")
@@ -55,6 +57,17 @@ async def read_root():
         logger.error(f"Error serving index.html: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/search")
+async def search_storyboard(q: str, kinds: str = None, limit: int = 20):
+    """Ranked full-text search over the storyboard's scenes, shots and characters"""
+    from agents.story_boarder.storage import StoryboardStorage
+    try:
+        storage = StoryboardStorage(storage_dir=str(STORAGE_DIR))
+        results = storage.search(q, kinds=kinds.split(",") if kinds else None, limit=limit)
+        return {"results": [result._asdict() for result in results]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/files")
 async def list_files():
     """List all media files in the output directory"""
@@ -0,0 +1,24 @@
+"""Shared fixtures: a fresh storyboard database per test"""
+import pytest
+
+from agents.story_boarder.db_client import StoryboardDBClient
+from agents.story_boarder.models import ScriptScene
+
+
+def make_scene(number: int, **fields) -> ScriptScene:
+    """A small scene ``scene_<number>``, with any field overridden"""
+    values = dict(
+        scene_id=f"scene_{number}",
+        title=f"Scene {number}",
+        script_text=f"INT. ROOM {number} - DAY\nSomething happens.",
+        importance="high",
+        characters=["Ada", "Bob"],
+        description=f"Description of scene {number}",
+    )
+    values.update(fields)
+    return ScriptScene(**values)
+
+
+@pytest.fixture
+def client(tmp_path) -> StoryboardDBClient:
+    return StoryboardDBClient(str(tmp_path / "storyboard.db"))
@@ -0,0 +1,126 @@
+import json
+import os
+
+import pytest
+
+from agents.story_boarder import batch, llm_cache, llm_usage
+from agents.story_boarder.models import SceneAnalysis, Shot, VisualPlan
+from agents.story_boarder.storage import StoryboardStorage
+
+from tests.conftest import make_scene
+
+SCENES = [make_scene(1), make_scene(2)]
+
+
+@pytest.fixture
+def use_workspace(tmp_path, monkeypatch):
+    """Activate a fresh workspace under ``tmp_path/<name>``, with its own response cache and usage log"""
+    def activate(name: str) -> StoryboardStorage:
+        root = tmp_path / name
+        monkeypatch.setenv("HITCHCOCK_STORAGE_DIR", str(root / "storage"))
+        monkeypatch.setenv("HITCHCOCK_OUTPUT_DIR", str(root / "output"))
+        monkeypatch.setenv("HITCHCOCK_LLM_CACHE_DIR", str(root / "llm_cache"))
+        monkeypatch.setenv("HITCHCOCK_LLM_USAGE_DIR", str(root / "llm_usage"))
+        monkeypatch.setenv("HITCHCOCK_RUN_ID", name)
+        monkeypatch.setattr(llm_cache, "_default_cache", None)
+        monkeypatch.setattr(llm_usage, "_default_log", None)
+        storage = StoryboardStorage()
+        storage.save_scenes(SCENES)
+        return storage
+    return activate
+
+
+def _analysis(number: int) -> SceneAnalysis:
+    return SceneAnalysis(
+        scene_id="ignored", key_moments=[f"Moment {number}"], setting="Room", mood="calm",
+        pacing="slow", time_of_day="night",
+        shots=[Shot(type="establishing", camera="wide shot", description=f"Shot {n} of {number}",
+                    duration="3 seconds") for n in (1, 2)],
+    )
+
+
+def _plan(number: int) -> VisualPlan:
+    return VisualPlan(scene_id="ignored", lighting=f"Lamp {number}", props=["Bed"], atmosphere="Quiet",
+                      special_effects=[])
+
+
+def _output_line(custom_id: str, value) -> dict:
+    return {
+        "custom_id": custom_id,
+        "response": {"status_code": 200, "body": {
+            "model": batch.BATCH_MODEL,
+            "choices": [{"message": {"content": value.model_dump_json()}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+        }},
+        "error": None,
+    }
+
+
+def _write_lines(path, lines) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(line) + "\n" for line in lines)
+    return str(path)
+
+
+def _saved(storage: StoryboardStorage):
+    return (
+        [a.model_dump() for a in storage.load_scene_analyses()],
+        [p.model_dump() for p in storage.load_visual_plans()],
+        [s.model_dump() for s in storage.load_shot_image_specs()],
+    )
+
+
+def test_replayed_batch_saves_results_like_the_interactive_tools(tmp_path, use_workspace):
+    storage = use_workspace("first")
+    canned = _write_lines(tmp_path / "canned.jsonl", [
+        _output_line(f"scene_analyses:scene_{n}", _analysis(n)) for n in (1, 2)
+    ] + [_output_line(f"visual_plans:scene_{n}", _plan(n)) for n in (1, 2)])
+
+    reports = batch.run(["visual_plans", "scene_analyses"], batch.ReplayTransport(canned), interval=0)
+
+    assert storage.db.get_scene_analysis_by_id("scene_2").key_moments == ["Moment 2"]
+    assert storage.db.get_visual_plan_by_id("scene_1").lighting == "Lamp 1"
+    assert len(storage.load_shot_image_specs()) == 4
+    # Saved with the input hashes the requests were built from, so nothing is left stale
+    for stage in ("scene_analyses", "visual_plans", "shot_image_specs"):
+        assert storage.stage_inputs(stage) == {}, stage
+    assert reports[-1].startswith("Shot image specs of 2 scenes derived")
+    assert batch.run(["scene_analyses", "visual_plans"], batch.ReplayTransport(canned), interval=0)[:2] == [
+        "scene_analyses: nothing to do", "visual_plans: nothing to do"
+    ]
+    # Usage is recorded per stage, and the responses are cached for interactive re-runs
+    usage = {row["tool"]: row for row in llm_usage.get_usage_log().summary()}
+    assert usage["batch_scene_analyses"]["calls"] == 2
+    assert usage["batch_visual_plans"]["prompt_tokens"] == 200
+    assert llm_cache.get_response_cache().stats()["entries"] == 4
+
+
+def test_results_of_a_job_replay_to_the_same_storyboard(tmp_path, use_workspace):
+    canned = _write_lines(tmp_path / "canned.jsonl", [
+        _output_line(f"scene_analyses:scene_{n}", _analysis(n)) for n in (1, 2)
+    ] + [_output_line(f"visual_plans:scene_{n}", _plan(n)) for n in (1, 2)])
+    first = use_workspace("first")
+    batch.run(["scene_analyses", "visual_plans"], batch.ReplayTransport(canned), interval=0)
+    results = [
+        line for job in batch.list_jobs() for line in batch._read_jsonl(job.results_path)
+    ]
+    expected = _saved(first)
+
+    second = use_workspace("second")
+    replay = _write_lines(tmp_path / "replay.jsonl", results)
+    batch.run(["scene_analyses", "visual_plans"], batch.ReplayTransport(replay), interval=0)
+
+    assert _saved(second) == expected
+    assert not os.path.samefile(first.db.db_path, second.db.db_path)
+
+
+def test_failed_requests_stay_stale(tmp_path, use_workspace):
+    storage = use_workspace("partial")
+    canned = _write_lines(tmp_path / "canned.jsonl", [_output_line("scene_analyses:scene_1", _analysis(1))])
+
+    report = batch.run(["scene_analyses"], batch.ReplayTransport(canned), interval=0)[0]
+
+    assert "1 of 2 saved" in report
+    assert list(storage.stage_inputs("scene_analyses")) == ["scene_2"]
+    resubmitted = batch.submit("scene_analyses", batch.ReplayTransport(canned))
+    assert resubmitted.request_count == 1
@@ -0,0 +1,44 @@
+import pytest
+
+from agents.story_boarder.db_client import normalize_character_name
+
+
+@pytest.mark.parametrize("name, key", [
+    ("Ada", "ada"),
+    ("ADA", "ada"),
+    ("  Ada \n", "ada"),
+    ('"Ada"', "ada"),
+    ("“Ada”", "ada"),
+    ("Dr. Smith", "dr smith"),
+    ("DR SMITH", "dr smith"),
+    ("dr.  smith", "dr smith"),
+    ("Mary-Jane O'Neil", "mary-jane o'neil"),
+])
+def test_normalize_character_name(name, key):
+    assert normalize_character_name(name) == key
+
+
+def character(name, description="A doctor"):
+    return {"name": name, "description": description, "role": "support", "traits": "calm"}
+
+
+def test_saving_the_same_cast_twice_creates_no_duplicates(client):
+    cast = [character("Dr. Smith"), character("Ada", "The lead")]
+
+    first = client.save_script_characters(cast)
+    second = client.save_script_characters(cast)
+
+    assert (first.inserted, first.updated, first.deleted) == (2, 0, 0)
+    assert second.total == 0
+    assert sorted(c["name"] for c in client.load_script_characters()) == ["Ada", "Dr. Smith"]
+
+
+def test_name_variants_update_one_character(client):
+    client.save_script_characters([character("Dr. Smith")])
+
+    stats = client.save_script_characters([character("DR SMITH", "A surgeon"), character("dr smith", "A surgeon")])
+
+    assert (stats.inserted, stats.updated, stats.deleted) == (0, 1, 0)
+    characters = client.load_script_characters()
+    assert [(c["name"], c["description"]) for c in characters] == [("dr smith", "A surgeon")]
+    assert list(client.get_script_characters(["Dr. Smith"])) == ["dr smith"]
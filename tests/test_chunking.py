@@ -0,0 +1,45 @@
+from agents.story_boarder.tools import merge_chunk_scenes, split_script
+
+from tests.conftest import make_scene
+
+BLOCKS = [
+    "INT. KITCHEN - NIGHT\nAda cooks dinner while the radio plays.",
+    "EXT. GARDEN - DAY\nBob waters the roses. Ada cooks.",
+    "INT. KITCHEN - NIGHT\nAda washes up.",
+]
+
+
+def _scene(text: str):
+    return make_scene(0, script_text=text)
+
+
+def test_overlap_scenes_are_dropped_once():
+    chunks = split_script("\n\n".join(BLOCKS), max_chars=60)
+    assert [chunk.text for chunk in chunks] == BLOCKS
+    # The second chunk also broke down the overlapping scene it got as context
+    chunk_scenes = [[_scene(BLOCKS[0])], [_scene(BLOCKS[0]), _scene(BLOCKS[1])], [_scene(BLOCKS[2])]]
+
+    merged = merge_chunk_scenes(chunks, chunk_scenes)
+
+    assert [scene.script_text for scene in merged] == BLOCKS
+
+
+def test_short_scenes_inside_earlier_text_are_kept():
+    chunks = split_script("\n\n".join(BLOCKS), max_chars=60)
+    # A real scene whose whole text also appears in the previous chunk's overlap scene
+    chunk_scenes = [[_scene(BLOCKS[0])], [_scene(BLOCKS[1])], [_scene(BLOCKS[2]), _scene("Ada cooks.")]]
+
+    merged = merge_chunk_scenes(chunks, chunk_scenes)
+
+    assert "Ada cooks." in [scene.script_text for scene in merged]
+
+
+def test_scene_ids_survive_inserting_a_scene():
+    before = merge_chunk_scenes(split_script("\n\n".join(BLOCKS)), [[_scene(block) for block in BLOCKS]])
+    inserted = ["INT. HALLWAY - NIGHT\nA door creaks."] + BLOCKS
+    after = merge_chunk_scenes(split_script("\n\n".join(inserted)), [[_scene(block) for block in inserted]])
+
+    assert [scene.scene_id for scene in before] == [
+        "scene_int-kitchen-night", "scene_ext-garden-day", "scene_int-kitchen-night--2"
+    ]
+    assert [scene.scene_id for scene in after] == ["scene_int-hallway-night"] + [s.scene_id for s in before]
@@ -0,0 +1,127 @@
+from agents.story_boarder.benchmarks import seed_benchmark_db
+from agents.story_boarder.db_client import StoryboardDBClient, resume_cursor
+
+from tests.conftest import make_scene
+
+
+def test_unchanged_save_writes_nothing(client):
+    seed_benchmark_db(client, scenes=3, shots_per_scene=2)
+
+    assert client.save_scenes(client.load_scenes()).total == 0
+    assert client.save_scene_analyses(client.load_scene_analyses()).total == 0
+    assert client.save_visual_plans(client.load_visual_plans()).total == 0
+    assert client.save_shot_image_specs(client.load_shot_image_specs()).total == 0
+
+
+def test_save_touches_only_changed_rows(client):
+    client.save_scenes([make_scene(1), make_scene(2)])
+
+    stats = client.save_scenes([make_scene(1, title="Renamed", characters=["Ada", "Cy"]), make_scene(2)])
+
+    # The parent row, plus Bob's row swapped for Cy's
+    assert (stats.inserted, stats.updated, stats.deleted) == (1, 1, 1)
+    assert client.get_scene_by_id("scene_1").title == "Renamed"
+    assert sorted(client.get_scene_by_id("scene_1").characters) == ["Ada", "Cy"]
+
+
+def test_ordered_children_keep_their_rowids(client):
+    seed_benchmark_db(client, scenes=1, shots_per_scene=1)
+    analysis = client.get_scene_analysis_by_id("scene_1")
+    with client._get_connection() as conn:
+        before = conn.execute("SELECT rowid, moment FROM key_moments ORDER BY rowid").fetchall()
+
+    analysis.key_moments[1] = "Twist"
+    stats = client.save_scene_analyses([analysis])
+
+    with client._get_connection() as conn:
+        after = conn.execute("SELECT rowid, moment FROM key_moments ORDER BY rowid").fetchall()
+    # The moment, and the analysis row for its new content hash
+    assert (stats.inserted, stats.updated, stats.deleted) == (0, 2, 0)
+    assert [row[0] for row in after] == [row[0] for row in before]
+    assert [row[1] for row in after] == ["Opening", "Twist", "Resolution"]
+
+
+def _changes(client, cursor=0, tables=None):
+    changes, _ = client.changes_since(cursor, tables)
+    return [(change.table, change.key, change.operation) for change in changes]
+
+
+def test_changes_since_merges_changes_per_row(client):
+    client.save_scenes([make_scene(1), make_scene(2)])
+    _, cursor = client.changes_since()
+
+    client.save_scenes([make_scene(1, title="Renamed"), make_scene(2), make_scene(3)])
+    client.save_scenes([make_scene(1, title="Renamed"), make_scene(2), make_scene(3, title="New")])
+    client.delete_scenes(["scene_2"])
+
+    assert _changes(client, cursor) == [
+        ("scenes", "scene_1", "update"), ("scenes", "scene_3", "insert"), ("scenes", "scene_2", "delete"),
+    ]
+    # From the start, rows created since are inserts whatever happened to them next
+    assert ("scenes", "scene_1", "insert") in _changes(client)
+
+
+def test_child_changes_are_logged_as_parent_updates(client):
+    seed_benchmark_db(client, scenes=2, shots_per_scene=2)
+    _, cursor = client.changes_since()
+
+    plan = client.get_visual_plan_by_id("scene_2")
+    plan.props.append("Lantern")
+    client.save_visual_plans([plan])
+
+    assert _changes(client, cursor) == [("visual_plans", "scene_2", "update")]
+    assert _changes(client, cursor, ["scenes"]) == []
+
+
+def test_unchanged_saves_log_nothing(client):
+    seed_benchmark_db(client, scenes=2, shots_per_scene=2)
+    _, cursor = client.changes_since()
+
+    client.save_scenes(client.load_scenes())
+    client.save_scene_analyses(client.load_scene_analyses())
+
+    assert client.changes_since(cursor) == ([], cursor)
+
+
+def test_consumer_cursors_are_kept_per_consumer_and_project(tmp_path):
+    db_path = str(tmp_path / "storyboard.db")
+    client = StoryboardDBClient(db_path)
+    other_project = StoryboardDBClient(db_path, project_id="sequel")
+    client.save_scenes([make_scene(1)])
+    _, cursor = client.changes_since()
+
+    client.save_consumer_cursor("dop", cursor)
+
+    assert client.get_consumer_cursor("dop") == cursor
+    assert client.get_consumer_cursor("audio") is None
+    assert other_project.get_consumer_cursor("dop") is None
+    assert other_project.changes_since() == ([], 0)
+
+
+def test_prune_keeps_changes_a_consumer_has_not_processed(client):
+    client.save_scenes([make_scene(1), make_scene(2)])
+    _, audio_cursor = client.changes_since()
+    client.save_scenes([make_scene(1, title="Renamed"), make_scene(2), make_scene(3)])
+    _, dop_cursor = client.changes_since()
+    client.save_consumer_cursor("audio", audio_cursor)
+    client.save_consumer_cursor("dop", dop_cursor)
+
+    unprocessed = _changes(client, audio_cursor)
+
+    # Only the changes both consumers have processed go
+    assert client.prune_change_log() > 0
+    assert _changes(client) == unprocessed == [("scenes", "scene_1", "update"), ("scenes", "scene_3", "insert")]
+
+    client.save_consumer_cursor("audio", dop_cursor)
+    assert client.prune_change_log() > 0
+    assert _changes(client) == []
+
+
+def test_resume_cursor_stops_before_the_first_failed_change(client):
+    client.save_scenes([make_scene(1), make_scene(2), make_scene(3)])
+    changes, cursor = client.changes_since()
+
+    assert resume_cursor(changes, cursor, set()) == cursor
+    resumed = resume_cursor(changes, cursor, {"scene_2"})
+    # Read again next time: the failed row and everything after it
+    assert [change.key for change in client.changes_since(resumed)[0]] == ["scene_2", "scene_3"]
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from agents.story_boarder.benchmarks import IMPORT_BUDGET_MS, REPO_ROOT, profile_import_time
+
+TOOL_MODULES = ("agents.story_boarder.tools", "agents.script_writer.tools", "agents.dop.tools", "agents.audio.tools")
+# Imported by the tools only once they actually call a model or render something
+HEAVY_MODULES = ("openai", "instructor", "litellm", "fal_client", "smolagents", "transformers", "moviepy", "mutagen")
+
+
+def test_control_plane_cold_import_is_within_budget():
+    try:
+        total_ms, imports = profile_import_time()
+    except RuntimeError as e:
+        pytest.skip(f"control plane dependencies are not installed: {e}")
+
+    assert total_ms < IMPORT_BUDGET_MS, f"slowest imports: {list(imports.items())[:5]}"
+
+
+def test_tool_modules_import_within_budget():
+    total_ms, imports = profile_import_time(TOOL_MODULES)
+
+    assert total_ms < IMPORT_BUDGET_MS, f"slowest imports: {list(imports.items())[:5]}"
+
+
+def test_importing_tools_loads_no_clients_and_touches_no_storage(tmp_path):
+    storage_dir = tmp_path / "storage"
+    code = "; ".join(f"import {module}" for module in TOOL_MODULES) + (
+        f"; import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True,
+        env={**os.environ, "HITCHCOCK_STORAGE_DIR": str(storage_dir)}
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+    assert not storage_dir.exists()
@@ -0,0 +1,70 @@
+import pytest
+
+from agents.story_boarder import tools
+from agents.story_boarder.benchmarks import seed_benchmark_db
+from agents.story_boarder.storage import StoryboardStorage
+
+from tests.conftest import make_scene
+
+
+def test_spec_inputs_changing_without_spec_content_is_not_a_change(client):
+    seed_benchmark_db(client, scenes=2, shots_per_scene=2)
+    client.derive_shot_image_specs()
+    _, cursor = client.changes_since()
+
+    analysis = client.get_scene_analysis_by_id("scene_1")
+    client.save_scene_analyses([analysis.model_copy(update={"mood": "tense", "key_moments": ["Twist"]})])
+    client.save_scenes([client.get_scene_by_id("scene_1").model_copy(update={"title": "Renamed"})])
+    stats = client.derive_shot_image_specs(list(client.stage_inputs("shot_image_specs")))
+
+    assert stats.total == 0
+    assert client.changes_since(cursor, ["shot_image_specs"])[0] == []
+    # The new input hashes were still recorded
+    assert client.stage_inputs("shot_image_specs") == {}
+
+
+def test_spec_content_changes_are_written_and_logged(client):
+    seed_benchmark_db(client, scenes=2, shots_per_scene=2)
+    client.derive_shot_image_specs()
+    _, cursor = client.changes_since()
+
+    client.save_scenes([client.get_scene_by_id("scene_1").model_copy(update={"description": "Night falls"})])
+    stats = client.derive_shot_image_specs(list(client.stage_inputs("shot_image_specs")))
+
+    assert (stats.inserted, stats.updated, stats.deleted) == (0, 2, 0)
+    assert [change.key for change in client.changes_since(cursor, ["shot_image_specs"])[0]] == [
+        "scene_1_shot_1", "scene_1_shot_2"
+    ]
+
+
+@pytest.fixture
+def failing_llm(tmp_path, monkeypatch):
+    """Storyboard tools on a fresh database, with every LLM request failing"""
+    async def fail(*args, **kwargs):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(tools, "_storage", StoryboardStorage(storage_dir=str(tmp_path)))
+    monkeypatch.setattr(tools, "_instructor_client", lambda async_client=False: None)
+    for request in ("_request_analysis", "_request_visual_plan", "_request_analysis_and_plan"):
+        monkeypatch.setattr(tools, request, fail)
+    return tools.get_storage()
+
+
+@pytest.mark.parametrize("fused", [False, True])
+def test_fallback_analyses_stay_stale(failing_llm, fused):
+    failing_llm.save_scenes([make_scene(1), make_scene(2)])
+
+    tools.analyze_script_scenes(fused=fused)
+
+    assert len(failing_llm.load_scene_analyses()) == 2
+    assert sorted(failing_llm.stage_inputs("scene_analyses")) == ["scene_1", "scene_2"]
+
+
+def test_fallback_plans_stay_stale(failing_llm):
+    failing_llm.save_scenes([make_scene(1)])
+    tools.analyze_script_scenes()
+
+    tools.plan_visual_elements()
+
+    assert len(failing_llm.load_visual_plans()) == 1
+    assert list(failing_llm.stage_inputs("visual_plans")) == ["scene_1"]
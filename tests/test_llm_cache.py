@@ -0,0 +1,101 @@
+import asyncio
+import itertools
+import sqlite3
+import types
+
+import pytest
+from pydantic import BaseModel
+
+from agents.story_boarder import llm_cache
+from agents.story_boarder.llm_cache import ResponseCache, acached_create, cache_key, cached_create
+
+MESSAGES = [{"role": "user", "content": "Plan the scene"}]
+
+
+class Answer(BaseModel):
+    text: str
+
+
+@pytest.fixture(autouse=True)
+def no_usage_log(monkeypatch):
+    monkeypatch.setenv("HITCHCOCK_LLM_USAGE", "0")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Make time.time() tick one second per call, so last_used orders reliably"""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(llm_cache.time, "time", lambda: float(next(ticks)))
+
+
+def fake_client(calls):
+    def create(**kwargs):
+        calls.append(kwargs)
+        return Answer(text=f"answer {len(calls)}")
+    return types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)))
+
+
+def count(cache, key):
+    with sqlite3.connect(cache.db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_expired_entry_is_a_miss_and_is_deleted(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=-1)
+    cache.put("k", "gpt-4o-mini", Answer, Answer(text="old"))
+
+    assert cache.get("k", Answer) is None
+    assert count(cache, "k") == 0
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_least_recently_used_entry_is_evicted_first(tmp_path, clock):
+    entry_size = len(Answer(text="a").model_dump_json())
+    cache = ResponseCache(str(tmp_path), max_bytes=2 * entry_size)
+    cache.put("a", "gpt-4o-mini", Answer, Answer(text="a"))
+    cache.put("b", "gpt-4o-mini", Answer, Answer(text="b"))
+    assert cache.get("a", Answer) == Answer(text="a")
+
+    cache.put("c", "gpt-4o-mini", Answer, Answer(text="c"))
+
+    assert [count(cache, key) for key in "abc"] == [1, 0, 1]
+
+
+def test_bypass_skips_the_lookup_but_still_stores(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    calls = []
+    client = fake_client(calls)
+    first = cached_create(client, model="gpt-4o-mini", response_model=Answer, messages=MESSAGES, cache=cache)
+
+    fresh = cached_create(client, model="gpt-4o-mini", response_model=Answer, messages=MESSAGES,
+                          cache=cache, bypass=True)
+
+    assert (first.text, fresh.text, len(calls)) == ("answer 1", "answer 2", 2)
+    assert cached_create(client, model="gpt-4o-mini", response_model=Answer, messages=MESSAGES,
+                         cache=cache) == fresh
+    assert len(calls) == 2
+
+
+def test_request_arguments_are_part_of_the_key():
+    key = cache_key("gpt-4o-mini", MESSAGES, Answer, temperature=0)
+
+    assert key == cache_key("gpt-4o-mini", MESSAGES, Answer, temperature=0)
+    assert key != cache_key("gpt-4o-mini", MESSAGES, Answer, temperature=1)
+    assert key != cache_key("gpt-4o-mini", MESSAGES, Answer, temperature=0, max_tokens=100)
+    assert key != cache_key("gpt-4o", MESSAGES, Answer, temperature=0)
+
+
+def test_failed_cache_write_still_returns_the_response(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path))
+
+    def put(*args):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(cache, "put", put)
+
+    async def create(**kwargs):
+        return Answer(text="paid for")
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)))
+
+    response = asyncio.run(acached_create(client, model="gpt-4o-mini", response_model=Answer,
+                                          messages=MESSAGES, cache=cache))
+    assert response.text == "paid for"
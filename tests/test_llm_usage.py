@@ -0,0 +1,85 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from agents.story_boarder import llm_usage
+from agents.story_boarder.llm_usage import LLMCall, get_usage_log, track_llm_call, usage_tags
+
+
+@pytest.fixture(autouse=True)
+def usage_log(tmp_path, monkeypatch):
+    monkeypatch.setenv("HITCHCOCK_LLM_USAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("HITCHCOCK_RUN_ID", "run-1")
+    monkeypatch.delenv("HITCHCOCK_LLM_USAGE", raising=False)
+    monkeypatch.setattr(llm_usage, "_default_log", None)
+
+
+def recorded_tags():
+    log = get_usage_log()
+    log.flush()
+    with sqlite3.connect(log.db_path) as conn:
+        return conn.execute(
+            "SELECT agent, tool, scene_id, shot_id FROM llm_calls ORDER BY scene_id, shot_id IS NOT NULL"
+        ).fetchall()
+
+
+def test_tags_follow_gathered_tasks_and_worker_threads():
+    def render(shot_id):
+        with usage_tags(shot_id=shot_id), track_llm_call("gpt-4o-mini"):
+            pass
+
+    async def scene(number):
+        with usage_tags(scene_id=f"scene_{number}"):
+            await asyncio.sleep(0)
+            with track_llm_call("gpt-4o-mini"):
+                await asyncio.sleep(0)
+            await asyncio.to_thread(render, f"scene_{number}_shot_1")
+
+    async def run():
+        with usage_tags(agent="story_boarder", tool="analyze_scenes"):
+            await asyncio.gather(scene(1), scene(2))
+
+    asyncio.run(run())
+
+    assert recorded_tags() == [
+        ("story_boarder", "analyze_scenes", "scene_1", None),
+        ("story_boarder", "analyze_scenes", "scene_1", "scene_1_shot_1"),
+        ("story_boarder", "analyze_scenes", "scene_2", None),
+        ("story_boarder", "analyze_scenes", "scene_2", "scene_2_shot_1"),
+    ]
+
+
+def call(tool, model="gpt-4o-mini", started_at=1.0, **fields):
+    return LLMCall(model=model, tags={"agent": "story_boarder", "tool": tool}, started_at=started_at, **fields)
+
+
+def test_summary_aggregates_a_run_per_tool_and_model():
+    log = get_usage_log()
+    log.record(call("analyze_scenes", prompt_tokens=100, completion_tokens=20, latency=2.0))
+    log.record(call("analyze_scenes", prompt_tokens=50, completion_tokens=10, latency=1.0, retries=2))
+    log.record(call("analyze_scenes", latency=0.0, cache_hit=True))
+    log.record(call("plan_visual_elements", model="gpt-4o", latency=0.5, error="Timeout"))
+    log.record(call("analyze_scenes", latency=9.0), run_id="run-0")
+
+    summary = log.summary()
+
+    assert [(row["tool"], row["model"]) for row in summary] == [
+        ("analyze_scenes", "gpt-4o-mini"), ("plan_visual_elements", "gpt-4o"),
+    ]
+    analyze, plan = summary
+    assert (analyze["calls"], analyze["cache_hits"], analyze["retries"], analyze["errors"]) == (3, 1, 2, 0)
+    assert (analyze["prompt_tokens"], analyze["completion_tokens"]) == (150, 30)
+    assert (analyze["latency"], analyze["max_latency"]) == (3.0, 2.0)
+    assert (plan["calls"], plan["errors"], plan["prompt_tokens"]) == (1, 1, 0)
+
+
+def test_runs_are_listed_most_recent_first():
+    log = get_usage_log()
+    log.record(call("analyze_scenes", started_at=10.0), run_id="old")
+    log.record(call("analyze_scenes", started_at=20.0), run_id="new")
+    log.record(call("plan_visual_elements", started_at=30.0), run_id="new")
+
+    assert [(run["run_id"], run["started_at"], run["calls"]) for run in log.runs()] == [
+        ("new", 20.0, 2), ("old", 10.0, 1),
+    ]
@@ -0,0 +1,124 @@
+import asyncio
+import sqlite3
+import sys
+import types
+
+from agents.story_boarder.db_client import StoryboardDBClient
+from agents.story_boarder.migrations import MIGRATIONS, SCHEMA_VERSION, run_migrations, transaction
+
+
+def make_baseline_db(path: str) -> None:
+    """A storyboard.db as the original, unversioned code left it"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    with transaction(conn, immediate=True):
+        StoryboardDBClient._create_baseline_tables(conn.cursor())
+        conn.executescript("""
+            INSERT INTO scenes VALUES ('scene_1', 'Opening', 'INT. ROOM - DAY', 'high', 'Ada wakes up');
+            INSERT INTO scene_characters VALUES ('scene_1', 'Ada');
+            INSERT INTO scene_analyses VALUES ('scene_1', 'Room', 'calm', 'slow', 'day');
+            INSERT INTO key_moments (scene_id, moment) VALUES ('scene_1', 'Wakes'), ('scene_1', 'Stands');
+            INSERT INTO shots (scene_id, type, camera, description, duration, camera_movement, focus)
+            VALUES ('scene_1', 'establishing', 'wide shot', 'The room', '3 seconds', 'static', 'Ada');
+            INSERT INTO visual_plans VALUES ('scene_1', 'Soft', 'Quiet');
+            INSERT INTO visual_plan_props (scene_id, prop) VALUES ('scene_1', 'Bed');
+            INSERT INTO shot_image_specs VALUES
+            ('scene_1', 'scene_1_shot_1', 'The room', 'wide shot', 'static', 'Ada', 'Soft', 'Quiet', 'day');
+            -- Left behind by a deleted analysis, before foreign keys were enforced
+            INSERT INTO key_moments (scene_id, moment) VALUES ('scene_9', 'Orphan');
+            INSERT INTO script_characters (name, description, role, traits)
+            VALUES ('Ada', 'Old entry', 'lead', 'curious'), ('"ada" ', 'New entry', 'lead', 'brave');
+        """)
+    conn.close()
+
+
+def test_baseline_database_migrates_to_current_schema(tmp_path):
+    path = str(tmp_path / "storyboard.db")
+    make_baseline_db(path)
+
+    client = StoryboardDBClient(path)
+
+    assert client.schema_version() == SCHEMA_VERSION
+    analysis = client.get_scene_analysis_by_id("scene_1")
+    assert analysis.key_moments == ["Wakes", "Stands"]
+    assert analysis.shots[0].description == "The room"
+    assert client.get_visual_plan_by_id("scene_1").props == ["Bed"]
+    assert client.get_scene_by_id("scene_1").characters == ["Ada"]
+    with client._get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM key_moments WHERE scene_id = 'scene_9'").fetchone()[0] == 0
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    # Duplicate characters collapse into the newest entry
+    assert [c["description"] for c in client.load_script_characters()] == ["New entry"]
+    # Existing rows can be found and tracked like new ones
+    assert [r.key for r in client.search("wakes")] == ["scene_1"]
+    client.save_scenes([client.get_scene_by_id("scene_1").model_copy(update={"title": "Morning"})])
+    changes, _ = client.changes_since(0)
+    assert [(c.table, c.key, c.operation) for c in changes] == [("scenes", "scene_1", "update")]
+
+
+def test_migrations_are_not_rerun(tmp_path):
+    path = str(tmp_path / "storyboard.db")
+    make_baseline_db(path)
+    StoryboardDBClient(path)
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        steps = conn.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0]
+        assert run_migrations(conn) == SCHEMA_VERSION
+        assert conn.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0] == steps
+    finally:
+        conn.close()
+
+
+def test_interrupted_migration_resumes_after_its_last_finished_step(tmp_path):
+    path = str(tmp_path / "storyboard.db")
+    make_baseline_db(path)
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        run_migrations(conn, [m for m in MIGRATIONS if m.version < 3])
+        # Version 3 stopped after rebuilding its first table
+        partitioning = next(m for m in MIGRATIONS if m.version == 3)
+        partitioning.steps[0].run(conn, 100)
+        conn.execute("INSERT INTO schema_migrations (version, step) VALUES (3, ?)",
+                     (partitioning.steps[0].name,))
+    finally:
+        conn.close()
+
+    client = StoryboardDBClient(path)
+
+    assert client.schema_version() == SCHEMA_VERSION
+    assert client.get_scene_by_id("scene_1").title == "Opening"
+    assert client.get_scene_analysis_by_id("scene_1").key_moments == ["Wakes", "Stands"]
+
+
+def test_first_run_after_upgrade_processes_existing_rows(tmp_path, monkeypatch):
+    make_baseline_db(str(tmp_path / "storyboard.db"))
+    monkeypatch.setenv("HITCHCOCK_STORAGE_DIR", str(tmp_path))
+    rendered, voiced = [], []
+
+    async def generate_test_image(panel):
+        rendered.append(panel.panel_id)
+        return False
+
+    class ElevenLabsService:
+        def generate_audio(self, text, scene_id):
+            voiced.append(scene_id)
+            return str(tmp_path / f"{scene_id}.mp3")
+
+    # Neither run talks to fal or ElevenLabs
+    monkeypatch.setitem(sys.modules, "agents.dop.image_service",
+                        types.SimpleNamespace(generate_test_image=generate_test_image))
+    monkeypatch.setitem(sys.modules, "agents.audio.eleven_labs_service",
+                        types.SimpleNamespace(ElevenLabsService=ElevenLabsService))
+    from agents.audio import tools as audio_tools
+    from agents.dop.tools import generate_shot_images
+    monkeypatch.setattr(audio_tools, "create_videos_from_audio_and_images", lambda: "")
+
+    # The change log only starts at the upgrade, but the first run of each
+    # consumer still covers the rows written before it
+    asyncio.run(generate_shot_images())
+    audio_tools.process_scripts_for_audio()
+    assert (rendered, voiced) == (["scene_1_shot_1"], ["scene_1"])
+
+    asyncio.run(generate_shot_images())
+    audio_tools.process_scripts_for_audio()
+    assert (rendered, voiced) == (["scene_1_shot_1"], ["scene_1"])
@@ -0,0 +1,33 @@
+from agents.story_boarder.benchmarks import seed_benchmark_db
+from agents.story_boarder.storage import StoryboardStorage
+
+from tests.conftest import make_scene
+
+
+def test_projects_sharing_a_database_never_see_each_other(tmp_path):
+    pilot = StoryboardStorage(str(tmp_path), project_id="pilot")
+    sequel = StoryboardStorage(str(tmp_path), project_id="sequel")
+    seed_benchmark_db(pilot.db, scenes=2, shots_per_scene=2)
+    seed_benchmark_db(sequel.db, scenes=3, shots_per_scene=1)
+    # Warm both read caches before the other project writes the same keys
+    assert [scene.title for scene in pilot.load_scenes()] == ["Scene 1", "Scene 2"]
+    assert len(sequel.load_scenes()) == 3
+    _, pilot_cursor = pilot.changes_since()
+    _, sequel_cursor = sequel.changes_since()
+
+    sequel.save_scenes([make_scene(1, title="Lighthouse")])
+
+    assert [scene.title for scene in pilot.load_scenes()] == ["Scene 1", "Scene 2"]
+    assert sequel.load_scenes()[0].title == "Lighthouse"
+    assert [result.key for result in sequel.search("lighthouse")] == ["scene_1"]
+    assert pilot.search("lighthouse") == []
+    assert pilot.changes_since(pilot_cursor) == ([], pilot_cursor)
+    assert [change.key for change in sequel.changes_since(sequel_cursor)[0]] == ["scene_1"]
+
+    sequel.db.delete_scenes(["scene_1", "scene_2", "scene_3"])
+
+    assert sequel.load_scenes() == [] and sequel.load_shot_image_specs() == []
+    assert len(pilot.load_scenes()) == 2
+    assert len(pilot.load_shot_image_specs()) == len(list(pilot.iter_shot_image_specs())) == 4
+    assert pilot.db.get_scene_analysis_by_id("scene_1").shots[0].description == "Shot 1 of scene 1"
+    assert pilot.db.list_projects() == ["pilot"]
@@ -0,0 +1,32 @@
+from agents.story_boarder.benchmarks import HOT_QUERIES, check_query_plans, seed_benchmark_db
+
+
+def test_hot_queries_use_an_index(client):
+    seed_benchmark_db(client, scenes=2, shots_per_scene=2)
+
+    assert check_query_plans(client) == {}
+
+
+def test_check_query_plans_reports_full_scans(client, monkeypatch):
+    seed_benchmark_db(client, scenes=2, shots_per_scene=2)
+    unindexed = "SELECT * FROM shots WHERE description = ?"
+    monkeypatch.setattr(
+        "agents.story_boarder.benchmarks.HOT_QUERIES", HOT_QUERIES + [(unindexed, ("Shot 1 of scene 1",))]
+    )
+
+    failures = check_query_plans(client)
+
+    assert list(failures) == [unindexed]
+    assert failures[unindexed].startswith("SCAN")
+
+
+def test_deleting_a_scene_cascades_to_its_children(client):
+    seed_benchmark_db(client, scenes=2, shots_per_scene=2)
+
+    client.delete_scenes(["scene_1"])
+
+    with client._get_connection() as conn:
+        for table in ("scene_characters", "scene_analyses", "key_moments", "shots",
+                      "visual_plans", "visual_plan_props", "visual_plan_effects"):
+            scenes = {row[0] for row in conn.execute(f"SELECT DISTINCT scene_id FROM {table}")}
+            assert scenes == {"scene_2"}, table
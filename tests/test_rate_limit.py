@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from agents.story_boarder.rate_limit import AdaptiveLimiter, Limits, is_transient, throttle_status
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class APITimeoutError(APIConnectionError):
+    pass
+
+
+class Response:
+    def __init__(self, status_code: int, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int, headers=None):
+        super().__init__(status_code)
+        self.response = Response(status_code, headers)
+
+
+@pytest.fixture
+def limiter():
+    return AdaptiveLimiter("test", Limits(rate=1000, burst=1000, concurrency=8, max_retries=3, backoff=0.001))
+
+
+def flaky(errors):
+    """A call that raises ``errors`` in turn, then returns "ok" """
+    errors = list(errors)
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+    return call, attempts
+
+
+@pytest.mark.parametrize("error", [
+    APITimeoutError("timed out"), APIConnectionError("reset"), ConnectionResetError(), HTTPError(408), HTTPError(409),
+])
+def test_transient_errors_are_retried_without_lowering_the_limit(limiter, error):
+    call, attempts = flaky([error])
+    limit = limiter.concurrency
+
+    assert limiter.call(call) == "ok"
+    assert len(attempts) == 2
+    assert limiter.concurrency >= limit
+    assert limiter.throttled == 0
+
+
+def test_throttles_are_retried_and_halve_the_limit(limiter):
+    call, attempts = flaky([HTTPError(429, {"retry-after-ms": "1"})])
+
+    assert limiter.call(call) == "ok"
+    assert len(attempts) == 2
+    assert limiter.throttled == 1
+    assert limiter.concurrency == 2
+
+
+def test_other_errors_are_not_retried(limiter):
+    call, attempts = flaky([ValueError("bad request")])
+
+    with pytest.raises(ValueError):
+        limiter.call(call)
+    assert len(attempts) == 1
+
+
+def test_retries_stop_after_max_retries(limiter):
+    call, attempts = flaky([APITimeoutError("timed out")] * 10)
+    retries = []
+
+    with pytest.raises(APITimeoutError):
+        limiter.call(call, on_retry=lambda: retries.append(1))
+    assert len(attempts) == 4
+    assert len(retries) == 3
+
+
+def test_async_calls_retry_transient_errors(limiter):
+    errors = [TimeoutError()]
+
+    async def call():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert asyncio.run(limiter.acall(call)) == "ok"
+
+
+def test_transient_responses_are_retried(limiter):
+    responses = iter([Response(408), Response(200)])
+
+    assert limiter.call(lambda: next(responses)).status_code == 200
+
+
+def test_wrapped_errors_are_classified_through_their_cause():
+    try:
+        try:
+            raise APITimeoutError("timed out")
+        except APITimeoutError as e:
+            raise RuntimeError("instructor gave up") from e
+    except RuntimeError as wrapped:
+        assert is_transient(wrapped)
+        assert throttle_status(wrapped) is None
+    assert not is_transient(ValueError())
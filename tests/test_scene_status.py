@@ -0,0 +1,50 @@
+from agents.story_boarder.benchmarks import seed_benchmark_db
+from agents.story_boarder.db_client import StoryboardDBClient
+
+from tests.conftest import make_scene
+
+
+def progress(status):
+    return {key: status[key] for key in
+            ("has_analysis", "has_visual_plan", "shot_spec_count", "images_rendered", "has_audio")}
+
+
+def test_status_follows_a_scene_through_the_pipeline(client):
+    seed_benchmark_db(client, scenes=1, shots_per_scene=2)
+    client.save_scenes([make_scene(2)])
+    assert progress(client.get_scene_status("scene_2")) == dict(
+        has_analysis=False, has_visual_plan=False, shot_spec_count=0, images_rendered=0, has_audio=False
+    )
+
+    client.save_scene_analyses([client.get_scene_analysis_by_id("scene_1").model_copy(update={"scene_id": "scene_2"})])
+    assert progress(client.get_scene_status("scene_2"))["has_analysis"]
+    client.save_visual_plans([client.get_visual_plan_by_id("scene_1").model_copy(update={"scene_id": "scene_2"})])
+    client.save_shot_image_specs([
+        spec.model_copy(update={"scene_id": "scene_2", "shot_id": spec.shot_id.replace("scene_1", "scene_2")})
+        for spec in client.get_shot_specs_by_scene_id("scene_1")
+    ])
+    client.record_rendered_asset("scene_2", "image", "out/scene_2_shot_1.png", "scene_2_shot_1")
+    # Rendering the same shot again counts once
+    client.record_rendered_asset("scene_2", "image", "out/scene_2_shot_1_v2.png", "scene_2_shot_1")
+    client.record_rendered_asset("scene_2", "audio", "out/scene_2.mp3")
+
+    assert progress(client.get_scene_status("scene_2")) == dict(
+        has_analysis=True, has_visual_plan=True, shot_spec_count=2, images_rendered=1, has_audio=True
+    )
+
+
+def test_status_is_filtered_to_one_scene_and_project(tmp_path):
+    db_path = str(tmp_path / "storyboard.db")
+    client = StoryboardDBClient(db_path)
+    seed_benchmark_db(client, scenes=3, shots_per_scene=1)
+    sequel = StoryboardDBClient(db_path, project_id="sequel")
+    sequel.save_scenes([make_scene(2, title="Sequel"), make_scene(4)])
+    client.record_rendered_asset("scene_2", "audio", "out/scene_2.mp3")
+
+    status = client.get_scene_status("scene_2")
+    assert (status["scene_id"], status["title"], status["character_count"]) == ("scene_2", "Scene 2", 3)
+    assert status == client.get_all_scene_statuses()[1]
+    assert client.get_scene_status("scene_4") is None
+    sequel_status = sequel.get_scene_status("scene_2")
+    assert (sequel_status["title"], sequel_status["has_analysis"], sequel_status["has_audio"]) == ("Sequel", False, False)
+    assert [s["scene_id"] for s in sequel.get_all_scene_statuses()] == ["scene_2", "scene_4"]
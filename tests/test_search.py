@@ -0,0 +1,29 @@
+import pytest
+
+from agents.story_boarder.benchmarks import seed_benchmark_db
+
+
+@pytest.fixture
+def seeded(client):
+    seed_benchmark_db(client, scenes=3, shots_per_scene=2)
+    return client
+
+
+def test_plain_text_ranks_matching_rows(seeded):
+    results = seeded.search("scene 2", kinds=["scene"])
+
+    assert results[0].key == "scene_2"
+
+
+def test_fts5_syntax_is_passed_through(seeded):
+    assert [r.key for r in seeded.search('"Scene 2"', kinds=["scene"])] == ["scene_2"]
+
+
+@pytest.mark.parametrize("query", ["INT: scene", '"scene 2', "scene AND", "NEAR( scene", "scene OR ("])
+def test_invalid_fts5_syntax_falls_back_to_words(seeded, query):
+    assert seeded.search(query, kinds=["scene"])
+
+
+def test_unknown_kinds_are_rejected(seeded):
+    with pytest.raises(ValueError):
+        seeded.search("scene", kinds=["props"])
@@ -0,0 +1,39 @@
+import os
+import sqlite3
+
+from agents.story_boarder import workspace
+from agents.story_boarder.storage import StoryboardStorage
+
+from tests.conftest import make_scene
+
+
+def test_loads_are_cached_until_the_table_is_written(tmp_path):
+    storage = StoryboardStorage(storage_dir=str(tmp_path))
+    storage.save_scenes([make_scene(1), make_scene(2)])
+
+    first = storage.load_scenes()
+    assert storage.load_scenes()[0] is first[0]
+
+    storage.save_scenes([make_scene(1, title="Renamed"), make_scene(2)])
+    assert storage.load_scenes()[0].title == "Renamed"
+
+
+def test_writes_from_another_connection_invalidate_the_cache(tmp_path):
+    storage = StoryboardStorage(storage_dir=str(tmp_path))
+    storage.save_scenes([make_scene(1)])
+    assert storage.load_scenes()[0].title == "Scene 1"
+
+    # As another process would
+    conn = sqlite3.connect(os.path.join(str(tmp_path), workspace.DB_FILENAME))
+    with conn:
+        conn.execute("UPDATE scenes SET title = 'Elsewhere' WHERE scene_id = 'scene_1'")
+    conn.close()
+
+    assert storage.load_scenes()[0].title == "Elsewhere"
+
+
+def test_uncached_storage_always_reloads(tmp_path):
+    storage = StoryboardStorage(storage_dir=str(tmp_path), use_cache=False)
+    storage.save_scenes([make_scene(1)])
+
+    assert storage.load_scenes()[0] is not storage.load_scenes()[0]
@@ -0,0 +1,29 @@
+import pytest
+
+from agents.story_boarder.benchmarks import seed_benchmark_db
+from agents.story_boarder.db_client import StoryboardDBClient
+
+
+@pytest.fixture
+def seeded(tmp_path):
+    db_path = str(tmp_path / "storyboard.db")
+    client = StoryboardDBClient(db_path)
+    seed_benchmark_db(client, scenes=7, shots_per_scene=3)
+    # Same keys in another project, whose child rows must not leak into batches
+    seed_benchmark_db(StoryboardDBClient(db_path, project_id="sequel"), scenes=7, shots_per_scene=1)
+    return client
+
+
+@pytest.mark.parametrize("batch_size", [1, 4, 7, 21, 500])
+def test_iter_shot_image_specs_matches_the_list_reader(seeded, batch_size):
+    listed = sorted(seeded.load_shot_image_specs(), key=lambda spec: spec.shot_id)
+
+    assert list(seeded.iter_shot_image_specs(batch_size)) == listed
+    assert len(listed) == 21
+
+
+@pytest.mark.parametrize("reader", ["scenes", "scene_analyses", "visual_plans"])
+def test_iter_readers_match_the_list_readers_across_batches(seeded, reader):
+    listed = sorted(getattr(seeded, f"load_{reader}")(), key=lambda model: model.scene_id)
+
+    assert list(getattr(seeded, f"iter_{reader}")(batch_size=3)) == listed
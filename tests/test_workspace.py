@@ -0,0 +1,39 @@
+import os
+import sqlite3
+
+from agents.story_boarder.db_client import StoryboardDBClient
+from agents.story_boarder.migrations import SCHEMA_VERSION
+from agents.story_boarder.workspace import Workspace
+
+from tests.conftest import make_scene
+
+
+def test_branch_from_a_snapshot_of_a_busy_database(tmp_path):
+    take_1 = Workspace("take-1", str(tmp_path / "runs")).create()
+    source = StoryboardDBClient(take_1.db_path)
+    source.save_scenes([make_scene(1)])
+    # The committed scene is still only in the write-ahead log
+    assert os.path.getsize(f"{take_1.db_path}-wal") > 0
+    writer = sqlite3.connect(take_1.db_path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("UPDATE scenes SET title = 'Uncommitted'")
+
+    try:
+        snapshot = take_1.snapshot("planned")
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+    with sqlite3.connect(snapshot) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    take_2 = take_1.branch("take-2", snapshot="planned")
+    branch = StoryboardDBClient(take_2.db_path)
+    assert branch.schema_version() == SCHEMA_VERSION
+    assert branch.get_scene_by_id("scene_1").title == "Scene 1"
+
+    branch.save_scenes([make_scene(1, title="Branched"), make_scene(2)])
+    source.save_scenes([make_scene(1), make_scene(3)])
+    assert [scene.scene_id for scene in branch.load_scenes()] == ["scene_1", "scene_2"]
+    assert [scene.scene_id for scene in source.load_scenes()] == ["scene_1", "scene_3"]
+    assert source.get_scene_by_id("scene_1").title == "Scene 1"
+    assert take_1.list_snapshots() == ["planned"]